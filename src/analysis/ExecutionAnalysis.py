@@ -2,13 +2,25 @@ from database.Database import Database
 
 
 class ExecutionAnalysis:
-    def __init__(self, database: Database):
-        pass
+    def __init__(self, database: Database, analysis_reports: list = None):
+        # the value and variable analyses of each data file (see Extract.run_value_analysis), when they were asked
+        self.analysis_reports = analysis_reports if analysis_reports is not None else []
+        self.nb_wrongly_typed_columns = 0
+        self.nb_unrecognized_data_types = 0
 
     def run(self):
-        pass
+        # summarize the data quality of all the files of the execution
+        self.nb_wrongly_typed_columns = 0
+        self.nb_unrecognized_data_types = 0
+        for analysis_report in self.analysis_reports:
+            for value_analysis in analysis_report["values"]:
+                self.nb_wrongly_typed_columns += int(value_analysis["nb_wrongly_typed_values_in_column"])
+                self.nb_unrecognized_data_types += int(value_analysis["nb_unrecognized_data_types"])
 
     def to_json(self) -> dict:
         return {
-
+            "nb_analysed_files": str(len(self.analysis_reports)),
+            "nb_wrongly_typed_columns": str(self.nb_wrongly_typed_columns),
+            "nb_unrecognized_data_types": str(self.nb_unrecognized_data_types),
+            "files": self.analysis_reports
         }
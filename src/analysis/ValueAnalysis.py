@@ -1,9 +1,13 @@
 import json
+import logging
+import math
+import numbers
 
+import numpy as np
+import pandas as pd
 from pandas import Series
 
-from utils.utils import get_int_from_str, is_not_nan, get_float_from_str, is_equal_insensitive, is_not_empty, \
-    get_mongodb_date_from_datetime
+from utils.utils import is_equal_insensitive, is_not_empty, get_delocalized_values
 from utils.setup_logger import log
 
 
@@ -12,10 +16,9 @@ class ValueAnalysis:
         self.column_name = column_name
         self.values = values
         self.expected_type = expected_type
-        # we ask for sets to have good performances, especially because we need to check whether values are
-        # accepted based on a set of accepted values.
-        # such an operation is in O(n) for a list and O(1) or a set
-        self.unique_values = set(values.unique())
+        # the values are compared with the expected type and the accepted values whole column at once:
+        # each distinct value is checked once, and its number of occurrences is given by a single value_counts()
+        self.value_counts = None
         self.accepted_values = set(accepted_values)
         self.columns_to_check = {}  # columns for which the value analysis has revealed problems
 
@@ -28,6 +31,7 @@ class ValueAnalysis:
         self.ratio_non_empty_values_matching_accepted = 0.0
 
     def run_analysis(self):
+        self.value_counts = self.values.value_counts(dropna=True, sort=False)
         self.compare_values_with_expected_type()  # this will call compare values for categorical values
 
     def compare_values_with_expected_type(self):
@@ -36,55 +40,58 @@ class ValueAnalysis:
                 # for categorical values, we have a dedicated method to check whether the values match the expected ones
                 self.compare_values_with_accepted_values()
             else:
-                type_is_int = is_equal_insensitive(value=self.expected_type, compared="int")
-                type_is_float = is_equal_insensitive(value=self.expected_type, compared="float")
-                type_is_datetime = is_equal_insensitive(value=self.expected_type, compared="datetime64") or is_equal_insensitive(value=self.expected_type, compared="datetime")
-                type_is_str = is_equal_insensitive(value=self.expected_type, compared="str")
-                wrong_type = False  # when a mistyped value is encountered this values false
-                if not type_is_int and not type_is_float and not type_is_datetime and not type_is_str:
+                # for primitive types, we check that all (distinct) values can be converted to the expected type (or are NaN)
+                # value_counts() has already dropped NaN, None and NaT, and strings parsed as NaN by float() are empty too
+                unique_values = Series(self.value_counts.index, dtype=object)
+                is_str = unique_values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+                is_nan_str = np.zeros(len(unique_values), dtype=bool)
+                is_nan_str[is_str] = unique_values[is_str].str.fullmatch(r"\s*[+-]?nan\s*", case=False).to_numpy(dtype=bool)
+                unique_values = unique_values[~is_nan_str]
+                typed_mask = self.get_typed_mask(values=unique_values)
+                if typed_mask is None:
                     log.error("Unrecognized type variable '%s'.", self.expected_type)
                     self.nb_unrecognized_data_types += 1
+                elif not typed_mask.all():
+                    # some wrong types have been detected
+                    if log.isEnabledFor(logging.DEBUG):
+                        log.debug("Could not convert %s to %s values", unique_values[~typed_mask.to_numpy()].tolist(), self.expected_type)
+                    log.error("Some wrong type have been detected for %s", self.column_name)
+                    self.nb_wrongly_typed_values_in_column += 1
                 else:
-                    # for primitive types, we check that all values can be converted to the expected type (or are NaN)
-                    if type_is_int:
-                        for value in self.unique_values:
-                            # check that all values can be cast to int or are NaN
-                            value_is_not_nan = is_not_nan(value=value)
-                            int_value = get_int_from_str(str_value=value)
-                            if value_is_not_nan and int_value is None:
-                                log.debug("Could not convert %s to int value", value)
-                                wrong_type = True
-                    elif type_is_float:
-                        for value in self.unique_values:
-                            # check that all values can be cast to float or are NaN
-                            value_is_not_nan = is_not_nan(value=value)
-                            float_value = get_float_from_str(str_value=value)
-                            if value_is_not_nan and float_value is None:
-                                log.debug("Could not convert %s to float value", value)
-                                wrong_type = True
-                    elif type_is_datetime:
-                        for value in self.unique_values:
-                            # check that all values can be cast to float or are NaN
-                            value_is_not_nan = is_not_nan(value=value)
-                            datetime_value = get_mongodb_date_from_datetime(current_datetime=value)
-                            if value_is_not_nan and datetime_value is None:
-                                log.debug("Could not convert %s to datetime value", value)
-                                wrong_type = True
-                    elif type_is_str:
-                        for value in self.unique_values:
-                            # check that all values can be cast to str or are NaN
-                            value_is_not_nan = is_not_nan(value=value)
-                            if value_is_not_nan and not isinstance(value, str):
-                                log.debug("Could not convert %s to string value", value)
-                                wrong_type = True
+                    # no wrong type has been detected
+                    log.debug("No wrong type detected for %s", self.column_name)
 
-                    if wrong_type:
-                        # some wrong types have been detected
-                        log.error("Some wrong type have been detected for %s", self.column_name)
-                        self.nb_wrongly_typed_values_in_column += 1
-                    else:
-                        # no wrong type has been detected
-                        log.debug("No wrong type detected for %s", self.column_name)
+    def get_typed_mask(self, values: Series) -> Series | None:
+        # for each (non-empty) value, whether it has the expected type (None when this type is not known)
+        # a value has the expected type when int(value), locale.atof(value), value.strftime() or isinstance(value, str)
+        # succeeds, as the value analysis did value per value. The values on which these raised are now checked too:
+        # - None and NaT are empty values (as for pandas), they are no more wrongly typed values in str columns either
+        # - infinite numbers and objects other than numbers and strings are not int values
+        # - numbers are float values (locale.atof only took strings)
+        # - strings are datetime values when pandas parses them, as the Extract step does (see convert_datetime_values)
+        is_str = values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+        str_values = values[is_str].astype(str)
+        is_number = values.map(lambda value: isinstance(value, (numbers.Real, np.bool_))).to_numpy(dtype=bool)
+        typed_mask = np.zeros(len(values), dtype=bool)
+        # the syntax of strings accepted by int() and float(), with digits possibly grouped by underscores
+        digits = r"\d(?:_?\d)*"
+        if is_equal_insensitive(value=self.expected_type, compared="int"):
+            typed_mask[is_str] = str_values.str.fullmatch(rf"\s*[+-]?{digits}\s*").to_numpy(dtype=bool)
+            # int() truncates the other numbers, e.g., 1.5, thus only infinite numbers cannot be converted
+            typed_mask[is_number] = [math.isfinite(value) for value in values[is_number]]
+        elif is_equal_insensitive(value=self.expected_type, compared="float"):
+            number = rf"(?:{digits}\.(?:{digits})?|\.{digits}|{digits})(?:[eE][+-]?{digits})?"
+            typed_mask[is_str] = get_delocalized_values(str_values=str_values).str.fullmatch(rf"\s*[+-]?(?:{number}|inf|infinity|nan)\s*", case=False).to_numpy(dtype=bool)
+            typed_mask[is_number] = True
+        elif is_equal_insensitive(value=self.expected_type, compared="datetime64") or is_equal_insensitive(value=self.expected_type, compared="datetime"):
+            # values may already be dates (converted in the Extract step), otherwise only strings are parsed
+            typed_mask = values.map(lambda value: hasattr(value, "strftime")).to_numpy(dtype=bool)
+            typed_mask[is_str] = pd.to_datetime(str_values, errors="coerce").notna().to_numpy(dtype=bool)
+        elif is_equal_insensitive(value=self.expected_type, compared="str"):
+            typed_mask = is_str
+        else:
+            return None
+        return Series(typed_mask, index=values.index)
 
     def compare_values_with_accepted_values(self):
         # we only compare the SET of values with the SET of accepted values
@@ -92,25 +99,24 @@ class ValueAnalysis:
         # in the LIST of values
         log.debug(self.accepted_values)
         if is_not_empty(variable=self.accepted_values):
-            matching_values = []
-            for value in self.unique_values:
-                # we only iterate on the distinct set of values, e.g., no need to compare twice 'Cesarean')
-                for accepted_value in self.accepted_values:
-                    if is_equal_insensitive(value=value, compared=accepted_value):
-                        matching_values.append(value)
-                        break  # do not continue to check other accepted values as we found one
-            if len(matching_values) < len(self.values):
-                total_nb_mathing_value = 0
-                for matching_value in matching_values:
-                    # compute the real number of values for which this value matches
-                    total_nb_mathing_value += self.values.value_counts()[matching_value]
+            # values are matched case-insensitively with accepted values (and other values are compared as is)
+            accepted_str_values = {accepted_value.casefold() for accepted_value in self.accepted_values if isinstance(accepted_value, str)}
+            accepted_other_values = [accepted_value for accepted_value in self.accepted_values if not isinstance(accepted_value, str)]
+            unique_values = Series(self.value_counts.index, dtype=object)
+            is_str = unique_values.map(lambda value: isinstance(value, str)).astype(bool).to_numpy()
+            is_matching = unique_values.isin(accepted_other_values).to_numpy() & ~is_str
+            is_matching[is_str] = unique_values[is_str].str.casefold().isin(accepted_str_values).to_numpy()
+            if is_matching.sum() < len(self.values):
+                # compute the real number of values for which this value matches
+                total_nb_mathing_value = int(self.value_counts.to_numpy()[is_matching].sum())
                 nb_values = len(self.values)
-                self.nb_empty_values = self.values.isna().sum()
-                self.ratio_empty_values = self.nb_empty_values / len(self.values)
+                self.nb_empty_values = int(self.values.isna().sum())
+                self.ratio_empty_values = self.nb_empty_values / nb_values
                 log.debug("Number of empty values: %s (%s)", self.nb_empty_values, self.ratio_empty_values)
                 self.ratio_values_matching_accepted = total_nb_mathing_value/nb_values
                 log.debug("Ratio of values matching an accepted value: %s/%s=%s", total_nb_mathing_value, nb_values, self.ratio_values_matching_accepted)
-                self.ratio_non_empty_values_matching_accepted = total_nb_mathing_value/(nb_values - self.nb_empty_values)
+                if nb_values > self.nb_empty_values:
+                    self.ratio_non_empty_values_matching_accepted = total_nb_mathing_value/(nb_values - self.nb_empty_values)
                 log.debug("Ratio of non-empty values matching an accepted value: %s/(%s-%s)=%s", total_nb_mathing_value, nb_values, self.nb_empty_values, self.ratio_non_empty_values_matching_accepted)
         else:
             log.debug("No categorical values are expected...")
@@ -1,17 +1,17 @@
 import json
 
-from utils.MetadataColumns import MetadataColumns
+from etl.MetadataCatalog import MetadataCatalog
 from utils.utils import is_not_nan
 from utils.setup_logger import log
 
 
 class VariableAnalysis:
-    def __init__(self, samples, metadata):
+    def __init__(self, samples, metadata_catalog: MetadataCatalog):
         self.samples = samples
-        self.metadata = metadata
+        self.metadata_catalog = metadata_catalog
 
         self.sample_variables = self.samples.columns.to_list()
-        self.metadata_variables = self.metadata["name"].to_list()
+        self.metadata_variables = set(self.metadata_catalog.get_names())
 
         # cumulative variables to count what happens in the variable analysis
         self.nb_categorical_features_without_mapping = 0
@@ -39,10 +39,10 @@ class VariableAnalysis:
 
     def compute_nb_categorical_features_without_mapping(self):
         self.nb_categorical_features_without_mapping = 0
-        for index, metadata_variable in self.metadata.iterrows():
-            if metadata_variable[MetadataColumns.VAR_TYPE.value] == "category":
-                if not is_not_nan(metadata_variable[MetadataColumns.JSON_VALUES.value]):
-                    log.debug(metadata_variable[MetadataColumns.COLUMN_NAME.value])
+        for metadata_variable in self.metadata_catalog.variables:
+            if metadata_variable["var_type"] == "category":
+                if not is_not_nan(metadata_variable["json_values"]):
+                    log.debug(metadata_variable["name"])
                     self.nb_categorical_features_without_mapping += 1
                 self.total_nb_categorical_features += 1
         self.ratio_categorical_feature_with_no_mapping = self.nb_categorical_features_without_mapping / self.total_nb_categorical_features
@@ -1,5 +1,6 @@
 import configparser
 import getpass
+import logging
 import os
 import os.path
 import platform
@@ -9,8 +10,10 @@ from datetime import datetime
 
 import pymongo
 
-from utils.constants import DEFAULT_CONFIG_FILE
-from utils.setup_logger import log
+from utils.IntermediateFormats import IntermediateFormats
+from utils.constants import DEFAULT_CONFIG_FILE, DEFAULT_NB_LOADERS, DEFAULT_LOADING_QUEUE_SIZE, IDENTIFIER_BLOCK_SIZE, \
+    BATCH_SIZE, DEFAULT_DB_BATCH_SIZE, DEFAULT_NB_WRITERS, DEFAULT_NB_WRITE_RETRIES, VALUE_CACHE_SIZE, DEFAULT_LOG_LEVEL
+from utils.setup_logger import log, set_log_levels
 from utils.utils import is_not_empty
 
 
@@ -27,10 +30,22 @@ class BetterConfig:
     METADATA_FILEPATH_KEY = "metadata_filepath"
     DATA_FILEPATHS_KEY = "data_filepaths"
     CURRENT_FILEPATH_KEY = "current_filepath"
+    CHUNK_SIZE_KEY = "chunk_size"
+    CHUNK_BYTES_KEY = "chunk_bytes"
+    DEBUG_FILES_KEY = "debug_files"
+    BATCH_SIZE_KEY = "batch_size"
+    INTERMEDIATE_FORMAT_KEY = "intermediate_format"
     # DATABASE section
     CONNECTION_KEY = "connection"
     DROP_KEY = "drop"
     NO_INDEX_KEY = "no_index"
+    DIRECT_LOAD_KEY = "direct_load"
+    DB_BATCH_SIZE_KEY = "db_batch_size"
+    ADAPTIVE_BATCHING_KEY = "adaptive_batching"
+    UNORDERED_UPSERTS_KEY = "unordered_upserts"
+    NB_WRITERS_KEY = "nb_writers"
+    NB_WRITE_RETRIES_KEY = "nb_write_retries"
+    INCREMENTAL_KEY = "incremental"
     # DATABASE and HOSPITAL sections
     NAME_KEY = "name"
     # SYSTEM section
@@ -46,21 +61,46 @@ class BetterConfig:
     TRANSFORM_KEY = "transform"
     LOAD_KEY = "load"
     ANALYSIS_KEY = "analysis"
+    ANALYSIS_NB_PROCESSES_KEY = "analysis_nb_processes"
+    ANALYSIS_SAMPLE_SIZE_KEY = "analysis_sample_size"
+    COLUMNAR_TRANSFORM_KEY = "columnar_transform"
+    CONVERT_COLUMNS_KEY = "convert_columns"
+    PIPELINED_KEY = "pipelined"
+    NB_LOADERS_KEY = "nb_loaders"
+    LOADING_QUEUE_SIZE_KEY = "loading_queue_size"
+    NB_PROCESSES_KEY = "nb_processes"
+    IDENTIFIER_BLOCK_SIZE_KEY = "identifier_block_size"
+    VALUE_CACHE_SIZE_KEY = "value_cache_size"
+    METADATA_CACHE_KEY = "metadata_cache"
+    LOG_LEVEL_KEY = "log_level"
+    SUBSYSTEM_LOG_LEVELS_KEY = "subsystem_log_levels"
 
     def __init__(self):
         self.config = configparser.ConfigParser()
         self.config.read(DEFAULT_CONFIG_FILE)
-        log.debug(self.to_json())
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(self.to_json())
 
     def set_from_parameters(self, args: Namespace) -> None:
         # the user gave parameters
         # set the Config internals with the user parameters (taken as Python main arguments)
+        # the log levels are set first, to apply them to the messages about the other parameters
+        self.set_log_level(log_level=args.log_level)
+        self.set_subsystem_log_levels(subsystem_log_levels=args.subsystem_log_levels)
+        self.apply_log_levels()
         # otherwise (when no parameters are provided), the default config is used
         self.set_hospital_name(hospital_name=args.hospital_name)
         self.set_db_connection(db_connection=args.connection)
         self.set_db_name(db_name=args.database_name)
         self.set_db_drop(drop=args.drop)
         self.set_no_index(no_index=args.no_index)
+        self.set_direct_load(direct_load=args.direct_load)
+        self.set_db_batch_size(db_batch_size=args.db_batch_size)
+        self.set_adaptive_batching(adaptive_batching=args.adaptive_batching)
+        self.set_unordered_upserts(unordered_upserts=args.unordered_upserts)
+        self.set_nb_writers(nb_writers=args.nb_writers)
+        self.set_nb_write_retries(nb_write_retries=args.nb_write_retries)
+        self.set_incremental(incremental=args.incremental)
 
         # create a new folder within the tmp dir to store the current execution tmp files and config
         # this folder is named after the DB name (instead of a timestamp, which will create one folder at each run)
@@ -92,7 +132,12 @@ class BetterConfig:
                 exit()
         # we do not copy the data in our working dir because it is too large to be copied
         self.set_data_filepaths(data_filepaths=args.data_filepath)  # file 1,file 2, ...,file N
-        log.debug(self.get_data_filepaths())
+        log.debug("The data filepaths are: %s", self.get_data_filepaths())
+        self.set_chunk_size(chunk_size=args.chunk_size)
+        self.set_chunk_bytes(chunk_bytes=args.chunk_bytes)
+        self.set_debug_files(debug_files=args.debug_files)
+        self.set_batch_size(batch_size=args.batch_size)
+        self.set_intermediate_format(intermediate_format=args.intermediate_format)
 
         # write more information about the current run in the config
         self.add_python_version()
@@ -109,6 +154,21 @@ class BetterConfig:
         self.set_transform(transform=args.transform)
         self.set_load(load=args.load)
         self.set_analysis(analyze=args.analysis)
+        self.set_analysis_nb_processes(analysis_nb_processes=args.analysis_nb_processes)
+        self.set_analysis_sample_size(analysis_sample_size=args.analysis_sample_size)
+        self.set_columnar_transform(columnar_transform=args.columnar_transform)
+        self.set_convert_columns(convert_columns=args.convert_columns)
+        self.set_pipelined(pipelined=args.pipelined)
+        self.set_nb_loaders(nb_loaders=args.nb_loaders)
+        self.set_loading_queue_size(loading_queue_size=args.loading_queue_size)
+        self.set_nb_processes(nb_processes=args.nb_processes)
+        self.set_identifier_block_size(identifier_block_size=args.identifier_block_size)
+        self.set_value_cache_size(value_cache_size=args.value_cache_size)
+        self.set_metadata_cache(metadata_cache=args.metadata_cache)
+        if self.get_pipelined() and not self.get_direct_load():
+            # in the pipelined mode, batches are given to the loaders as is, thus without intermediate files to load
+            log.info("The pipelined mode loads the resources directly, thus direct_load is set to True.")
+            self.set_direct_load(direct_load="True")
 
         # save the config file in the current working directory
         self.write_to_file()
@@ -122,12 +182,29 @@ class BetterConfig:
         log.info("The metadata file is located at: %s", self.get_metadata_filepath())
         log.info("The data files are located at: %s", self.get_data_filepaths())
         log.info("The data files are located at: %s", self.get_data_filepaths())
+        log.info("The data files will be read by chunks of %s lines and %s bytes (0 means no limit)", self.get_chunk_size(), self.get_chunk_bytes())
         log.info("The Extract step will be performed: %s", ("yes" if self.get_extract() else "no"))
         log.info("The Analysis step will be performed: %s", ("yes" if self.get_analysis() else "no"))
+        log.info("The data columns will be analysed by %s processes, on at most %s rows (0 means no limit)", self.get_analysis_nb_processes(), self.get_analysis_sample_size())
         log.info("The Transform step will be performed: %s", ("yes" if self.get_transform() else "no"))
         log.info("The Load step will be performed: %s", ("yes" if self.get_load() else "no"))
+        log.info("The resources will be loaded directly, without intermediate files: %s", ("yes" if self.get_direct_load() else "no"))
+        log.info("The intermediate files will be written for debug purposes: %s", ("yes" if self.get_debug_files() else "no"))
+        log.info("The intermediate files will be written in %s", self.get_intermediate_format())
+        log.info("The resources will be saved by batches of %s, and upserted by bulk writes of %s operations (adaptive: %s)", self.get_batch_size(), self.get_db_batch_size(), ("yes" if self.get_adaptive_batching() else "no"))
+        log.info("Only new and changed resources will be written (incremental mode): %s", ("yes" if self.get_incremental() else "no"))
+        log.info("The bulk writes will be unordered: %s (sent by %s threads, and retried at most %s times)", ("yes" if self.get_unordered_upserts() else "no"), self.get_nb_writers(), self.get_nb_write_retries())
+        log.info("The Transform step will use the columnar engine: %s", ("yes" if self.get_columnar_transform() else "no"))
+        log.info("The typed columns will be converted at once, based on their vartype: %s", ("yes" if self.get_convert_columns() else "no"))
+        log.info("The Transform and Load steps will be pipelined: %s (with %s loaders and at most %s waiting batches)", ("yes" if self.get_pipelined() else "no"), self.get_nb_loaders(), self.get_loading_queue_size())
+        log.info("The data files will be ingested by %s processes", self.get_nb_processes())
+        log.info("Resource IDs will be allocated by blocks of %s", self.get_identifier_block_size())
+        log.info("The compiled metadata will be cached on disk across runs: %s", ("yes" if self.get_metadata_cache() else "no"))
+        log.info("The log level is %s (and %s for the given subsystems)", self.get_log_level(), self.get_subsystem_log_levels())
+        log.info("The fairified values of at most %s distinct values per column will be cached", self.get_value_cache_size())
         log.info("Use english (en_US) locale instead of the one assigned by the system: %s", ("yes" if self.get_use_en_locale() else "no"))
-        log.debug(self.to_json())
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(self.to_json())
 
     # below, define methods for each parameter in the config
     # keep it up-to-date wrt the config file
@@ -168,6 +245,45 @@ class BetterConfig:
         else:
             log.error("The data filepaths cannot be set in the config because it is None or empty.")
 
+    def set_chunk_size(self, chunk_size: str) -> None:
+        # the maximum number of lines of a data chunk (0 means that the data file is not read by chunks)
+        if is_not_empty(chunk_size):
+            self.set_files_section()
+            self.config.set(BetterConfig.FILES_SECTION, BetterConfig.CHUNK_SIZE_KEY, chunk_size)
+        else:
+            log.error("The chunk size cannot be set in the config because it is None or empty.")
+
+    def set_chunk_bytes(self, chunk_bytes: str) -> None:
+        # the maximum number of bytes (in memory) of a data chunk (0 means that the data file is not read by chunks)
+        if is_not_empty(chunk_bytes):
+            self.set_files_section()
+            self.config.set(BetterConfig.FILES_SECTION, BetterConfig.CHUNK_BYTES_KEY, chunk_bytes)
+        else:
+            log.error("The chunk bytes cannot be set in the config because it is None or empty.")
+
+    def set_batch_size(self, batch_size: str) -> None:
+        # the number of resources written in one file (or given at once to the database in the direct load mode)
+        if is_not_empty(batch_size):
+            self.set_files_section()
+            self.config.set(BetterConfig.FILES_SECTION, BetterConfig.BATCH_SIZE_KEY, batch_size)
+        else:
+            log.error("The batch size cannot be set in the config because it is None or empty.")
+
+    def set_intermediate_format(self, intermediate_format: str) -> None:
+        # the format of the intermediate files, see IntermediateFormats
+        if is_not_empty(intermediate_format):
+            self.set_files_section()
+            self.config.set(BetterConfig.FILES_SECTION, BetterConfig.INTERMEDIATE_FORMAT_KEY, intermediate_format)
+        else:
+            log.error("The intermediate format cannot be set in the config because it is None or empty.")
+
+    def set_debug_files(self, debug_files: str) -> None:
+        if is_not_empty(debug_files):
+            self.set_files_section()
+            self.config.set(BetterConfig.FILES_SECTION, BetterConfig.DEBUG_FILES_KEY, debug_files)
+        else:
+            log.error("The debug_files parameter cannot be set in the config because it is None or empty.")
+
     def set_db_connection(self, db_connection: str) -> None:
         if is_not_empty(db_connection):
             self.set_database_section()
@@ -196,6 +312,56 @@ class BetterConfig:
         else:
             log.error("The no_index parameter cannot be set in the config because it is None or empty.")
 
+    def set_direct_load(self, direct_load: str) -> None:
+        if is_not_empty(direct_load):
+            self.set_database_section()
+            self.config.set(BetterConfig.DB_SECTION, BetterConfig.DIRECT_LOAD_KEY, direct_load)
+        else:
+            log.error("The direct_load parameter cannot be set in the config because it is None or empty.")
+
+    def set_db_batch_size(self, db_batch_size: str) -> None:
+        # the number of operations sent in one bulk write (this is the initial one in the adaptive mode)
+        if is_not_empty(db_batch_size):
+            self.set_database_section()
+            self.config.set(BetterConfig.DB_SECTION, BetterConfig.DB_BATCH_SIZE_KEY, db_batch_size)
+        else:
+            log.error("The DB batch size cannot be set in the config because it is None or empty.")
+
+    def set_adaptive_batching(self, adaptive_batching: str) -> None:
+        if is_not_empty(adaptive_batching):
+            self.set_database_section()
+            self.config.set(BetterConfig.DB_SECTION, BetterConfig.ADAPTIVE_BATCHING_KEY, adaptive_batching)
+        else:
+            log.error("The adaptive_batching parameter cannot be set in the config because it is None or empty.")
+
+    def set_unordered_upserts(self, unordered_upserts: str) -> None:
+        if is_not_empty(unordered_upserts):
+            self.set_database_section()
+            self.config.set(BetterConfig.DB_SECTION, BetterConfig.UNORDERED_UPSERTS_KEY, unordered_upserts)
+        else:
+            log.error("The unordered_upserts parameter cannot be set in the config because it is None or empty.")
+
+    def set_nb_writers(self, nb_writers: str) -> None:
+        if is_not_empty(nb_writers):
+            self.set_database_section()
+            self.config.set(BetterConfig.DB_SECTION, BetterConfig.NB_WRITERS_KEY, nb_writers)
+        else:
+            log.error("The number of writers cannot be set in the config because it is None or empty.")
+
+    def set_nb_write_retries(self, nb_write_retries: str) -> None:
+        if is_not_empty(nb_write_retries):
+            self.set_database_section()
+            self.config.set(BetterConfig.DB_SECTION, BetterConfig.NB_WRITE_RETRIES_KEY, nb_write_retries)
+        else:
+            log.error("The number of write retries cannot be set in the config because it is None or empty.")
+
+    def set_incremental(self, incremental: str) -> None:
+        if is_not_empty(incremental):
+            self.set_database_section()
+            self.config.set(BetterConfig.DB_SECTION, BetterConfig.INCREMENTAL_KEY, incremental)
+        else:
+            log.error("The incremental parameter cannot be set in the config because it is None or empty.")
+
     def set_hospital_name(self, hospital_name: str) -> None:
         if is_not_empty(hospital_name):
             self.set_hospital_section()
@@ -247,6 +413,67 @@ class BetterConfig:
         self.set_run_section()
         self.config.set(BetterConfig.RUN_SECTION, BetterConfig.ANALYSIS_KEY, analyze)
 
+    def set_columnar_transform(self, columnar_transform: str) -> None:
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.COLUMNAR_TRANSFORM_KEY, columnar_transform)
+
+    def set_convert_columns(self, convert_columns: str) -> None:
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.CONVERT_COLUMNS_KEY, convert_columns)
+
+    def set_metadata_cache(self, metadata_cache: str) -> None:
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.METADATA_CACHE_KEY, metadata_cache)
+
+    def set_log_level(self, log_level: str) -> None:
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.LOG_LEVEL_KEY, log_level)
+
+    def set_subsystem_log_levels(self, subsystem_log_levels: str) -> None:
+        # subsystem_log_levels is a set of <subsystem>=<level>, concatenated with commas (,), e.g., database=DEBUG,etl=WARNING
+        # where a subsystem is a package of the project
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.SUBSYSTEM_LOG_LEVELS_KEY, subsystem_log_levels)
+
+    def apply_log_levels(self) -> None:
+        try:
+            set_log_levels(log_level=self.get_log_level(), subsystem_levels=self.get_subsystem_log_levels())
+        except ValueError as error:
+            log.error("The log levels cannot be applied: %s", error)
+            exit()
+
+    def set_pipelined(self, pipelined: str) -> None:
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.PIPELINED_KEY, pipelined)
+
+    def set_nb_loaders(self, nb_loaders: str) -> None:
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.NB_LOADERS_KEY, nb_loaders)
+
+    def set_loading_queue_size(self, loading_queue_size: str) -> None:
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.LOADING_QUEUE_SIZE_KEY, loading_queue_size)
+
+    def set_analysis_nb_processes(self, analysis_nb_processes: str) -> None:
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.ANALYSIS_NB_PROCESSES_KEY, analysis_nb_processes)
+
+    def set_analysis_sample_size(self, analysis_sample_size: str) -> None:
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.ANALYSIS_SAMPLE_SIZE_KEY, analysis_sample_size)
+
+    def set_nb_processes(self, nb_processes: str) -> None:
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.NB_PROCESSES_KEY, nb_processes)
+
+    def set_identifier_block_size(self, identifier_block_size: str) -> None:
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.IDENTIFIER_BLOCK_SIZE_KEY, identifier_block_size)
+
+    def set_value_cache_size(self, value_cache_size: str) -> None:
+        self.set_run_section()
+        self.config.set(BetterConfig.RUN_SECTION, BetterConfig.VALUE_CACHE_SIZE_KEY, value_cache_size)
+
     # set sections
     def set_files_section(self) -> None:
         if not self.config.has_section(BetterConfig.FILES_SECTION):
@@ -300,6 +527,36 @@ class BetterConfig:
         except Exception:
             return []
 
+    def get_chunk_size(self) -> int:
+        try:
+            return int(self.config.get(BetterConfig.FILES_SECTION, BetterConfig.CHUNK_SIZE_KEY))
+        except Exception:
+            return 0
+
+    def get_chunk_bytes(self) -> int:
+        try:
+            return int(self.config.get(BetterConfig.FILES_SECTION, BetterConfig.CHUNK_BYTES_KEY))
+        except Exception:
+            return 0
+
+    def get_batch_size(self) -> int:
+        try:
+            return max(1, int(self.config.get(BetterConfig.FILES_SECTION, BetterConfig.BATCH_SIZE_KEY)))
+        except Exception:
+            return BATCH_SIZE
+
+    def get_intermediate_format(self) -> str:
+        try:
+            return self.config.get(BetterConfig.FILES_SECTION, BetterConfig.INTERMEDIATE_FORMAT_KEY).lower()
+        except Exception:
+            return IntermediateFormats.JSON.value
+
+    def get_debug_files(self) -> bool:
+        try:
+            return self.config.get(BetterConfig.FILES_SECTION, BetterConfig.DEBUG_FILES_KEY) == "True"
+        except Exception:
+            return False
+
     def get_db_connection(self) -> str:
         try:
             return self.config.get(BetterConfig.DB_SECTION, BetterConfig.CONNECTION_KEY)
@@ -324,6 +581,48 @@ class BetterConfig:
         except Exception:
             return False
 
+    def get_direct_load(self) -> bool:
+        try:
+            return self.config.get(BetterConfig.DB_SECTION, BetterConfig.DIRECT_LOAD_KEY) == "True"
+        except Exception:
+            return False
+
+    def get_db_batch_size(self) -> int:
+        try:
+            return max(1, int(self.config.get(BetterConfig.DB_SECTION, BetterConfig.DB_BATCH_SIZE_KEY)))
+        except Exception:
+            return DEFAULT_DB_BATCH_SIZE
+
+    def get_adaptive_batching(self) -> bool:
+        try:
+            return self.config.get(BetterConfig.DB_SECTION, BetterConfig.ADAPTIVE_BATCHING_KEY) == "True"
+        except Exception:
+            return False
+
+    def get_unordered_upserts(self) -> bool:
+        try:
+            return self.config.get(BetterConfig.DB_SECTION, BetterConfig.UNORDERED_UPSERTS_KEY) == "True"
+        except Exception:
+            return False
+
+    def get_nb_writers(self) -> int:
+        try:
+            return int(self.config.get(BetterConfig.DB_SECTION, BetterConfig.NB_WRITERS_KEY))
+        except Exception:
+            return DEFAULT_NB_WRITERS
+
+    def get_nb_write_retries(self) -> int:
+        try:
+            return max(0, int(self.config.get(BetterConfig.DB_SECTION, BetterConfig.NB_WRITE_RETRIES_KEY)))
+        except Exception:
+            return DEFAULT_NB_WRITE_RETRIES
+
+    def get_incremental(self) -> bool:
+        try:
+            return self.config.get(BetterConfig.DB_SECTION, BetterConfig.INCREMENTAL_KEY) == "True"
+        except Exception:
+            return False
+
     def get_hospital_name(self) -> str:
         try:
             return self.config.get(BetterConfig.HOSPITAL_SECTION, BetterConfig.NAME_KEY)
@@ -396,6 +695,89 @@ class BetterConfig:
         except Exception:
             return False
 
+    def get_columnar_transform(self) -> bool:
+        try:
+            return self.config.get(BetterConfig.RUN_SECTION, BetterConfig.COLUMNAR_TRANSFORM_KEY) == "True"
+        except Exception:
+            return False
+
+    def get_convert_columns(self) -> bool:
+        try:
+            return self.config.get(BetterConfig.RUN_SECTION, BetterConfig.CONVERT_COLUMNS_KEY) == "True"
+        except Exception:
+            return False
+
+    def get_metadata_cache(self) -> bool:
+        try:
+            return self.config.get(BetterConfig.RUN_SECTION, BetterConfig.METADATA_CACHE_KEY) == "True"
+        except Exception:
+            return False
+
+    def get_log_level(self) -> str:
+        try:
+            return self.config.get(BetterConfig.RUN_SECTION, BetterConfig.LOG_LEVEL_KEY).upper()
+        except Exception:
+            return DEFAULT_LOG_LEVEL
+
+    def get_subsystem_log_levels(self) -> dict:
+        try:
+            subsystem_log_levels = {}
+            for subsystem_log_level in self.config.get(BetterConfig.RUN_SECTION, BetterConfig.SUBSYSTEM_LOG_LEVELS_KEY).split(","):
+                if "=" in subsystem_log_level:
+                    subsystem, log_level = subsystem_log_level.split("=", 1)
+                    subsystem_log_levels[subsystem.strip()] = log_level.strip().upper()
+            return subsystem_log_levels
+        except Exception:
+            return {}
+
+    def get_pipelined(self) -> bool:
+        try:
+            return self.config.get(BetterConfig.RUN_SECTION, BetterConfig.PIPELINED_KEY) == "True"
+        except Exception:
+            return False
+
+    def get_nb_loaders(self) -> int:
+        try:
+            return int(self.config.get(BetterConfig.RUN_SECTION, BetterConfig.NB_LOADERS_KEY))
+        except Exception:
+            return DEFAULT_NB_LOADERS
+
+    def get_loading_queue_size(self) -> int:
+        try:
+            return int(self.config.get(BetterConfig.RUN_SECTION, BetterConfig.LOADING_QUEUE_SIZE_KEY))
+        except Exception:
+            return DEFAULT_LOADING_QUEUE_SIZE
+
+    def get_analysis_nb_processes(self) -> int:
+        try:
+            return max(1, int(self.config.get(BetterConfig.RUN_SECTION, BetterConfig.ANALYSIS_NB_PROCESSES_KEY)))
+        except Exception:
+            return 1
+
+    def get_analysis_sample_size(self) -> int:
+        try:
+            return max(0, int(self.config.get(BetterConfig.RUN_SECTION, BetterConfig.ANALYSIS_SAMPLE_SIZE_KEY)))
+        except Exception:
+            return 0
+
+    def get_nb_processes(self) -> int:
+        try:
+            return int(self.config.get(BetterConfig.RUN_SECTION, BetterConfig.NB_PROCESSES_KEY))
+        except Exception:
+            return 1
+
+    def get_identifier_block_size(self) -> int:
+        try:
+            return int(self.config.get(BetterConfig.RUN_SECTION, BetterConfig.IDENTIFIER_BLOCK_SIZE_KEY))
+        except Exception:
+            return IDENTIFIER_BLOCK_SIZE
+
+    def get_value_cache_size(self) -> int:
+        try:
+            return max(0, int(self.config.get(BetterConfig.RUN_SECTION, BetterConfig.VALUE_CACHE_SIZE_KEY)))
+        except Exception:
+            return VALUE_CACHE_SIZE
+
     # write config to file
     def write_to_file(self) -> None:
         config_filepath = os.path.join(self.get_working_dir_current(), DEFAULT_CONFIG_FILE)
@@ -409,9 +791,19 @@ class BetterConfig:
             BetterConfig.FILES_SECTION + "/" + BetterConfig.METADATA_FILEPATH_KEY: self.get_metadata_filepath(),
             BetterConfig.FILES_SECTION + "/" + BetterConfig.DATA_FILEPATHS_KEY: self.get_data_filepaths(),
             BetterConfig.FILES_SECTION + "/" + BetterConfig.CURRENT_FILEPATH_KEY: self.get_current_filepath(),
+            BetterConfig.FILES_SECTION + "/" + BetterConfig.CHUNK_SIZE_KEY: self.get_chunk_size(),
+            BetterConfig.FILES_SECTION + "/" + BetterConfig.CHUNK_BYTES_KEY: self.get_chunk_bytes(),
             BetterConfig.DB_SECTION + "/" + BetterConfig.CONNECTION_KEY: self.get_db_connection(),
             BetterConfig.DB_SECTION + "/" + BetterConfig.NAME_KEY: self.get_db_name(),
             BetterConfig.DB_SECTION + "/" + BetterConfig.DROP_KEY: self.get_db_drop(),
+            BetterConfig.DB_SECTION + "/" + BetterConfig.DIRECT_LOAD_KEY: self.get_direct_load(),
+            BetterConfig.FILES_SECTION + "/" + BetterConfig.DEBUG_FILES_KEY: self.get_debug_files(),
+            BetterConfig.FILES_SECTION + "/" + BetterConfig.BATCH_SIZE_KEY: self.get_batch_size(),
+            BetterConfig.FILES_SECTION + "/" + BetterConfig.INTERMEDIATE_FORMAT_KEY: self.get_intermediate_format(),
+            BetterConfig.DB_SECTION + "/" + BetterConfig.DB_BATCH_SIZE_KEY: self.get_db_batch_size(),
+            BetterConfig.DB_SECTION + "/" + BetterConfig.ADAPTIVE_BATCHING_KEY: self.get_adaptive_batching(),
+            BetterConfig.DB_SECTION + "/" + BetterConfig.UNORDERED_UPSERTS_KEY: self.get_unordered_upserts(),
+            BetterConfig.DB_SECTION + "/" + BetterConfig.INCREMENTAL_KEY: self.get_incremental(),
             BetterConfig.HOSPITAL_SECTION + "/" + BetterConfig.NAME_KEY: self.get_hospital_name(),
             BetterConfig.SYSTEM_SECTION + "/" + BetterConfig.PYTHON_VERSION_KEY: self.get_python_version(),
             BetterConfig.SYSTEM_SECTION + "/" + BetterConfig.EXECUTION_KEY: self.get_execution_date(),
@@ -0,0 +1,64 @@
+import threading
+
+import bson
+
+from utils.constants import MIN_DB_BATCH_SIZE, MAX_DB_BATCH_SIZE, MAX_DB_BATCH_BYTES, ADAPTIVE_BATCH_TARGET_LATENCY, \
+    DB_BATCH_NB_SAMPLES
+from utils.setup_logger import log
+
+
+class BatchSizer:
+    """
+    The class BatchSizer splits the tuples to upsert in batches, each batch being sent in one bulk write.
+    In the adaptive mode, the batch size grows while bulk writes are fast and shrinks when they are slow. In any mode,
+    batches stay under the MongoDB limits on the number of operations and the size of a bulk write.
+    """
+
+    def __init__(self, batch_size: int, adaptive: bool):
+        """
+        Create a new batch sizer.
+        :param batch_size: An integer being the number of tuples per batch (the initial one in the adaptive mode).
+        :param adaptive: A boolean being whether to adapt the batch size to the observed bulk write latency.
+        """
+        self.batch_size = min(max(1, batch_size), MAX_DB_BATCH_SIZE)
+        self.adaptive = adaptive
+        self.lock = threading.Lock()  # bulk writes may be sent by several threads, e.g., in the pipelined mode
+
+    def compute_batches(self, tuples: list[dict]) -> list[list[dict]]:
+        """
+        Split the given tuples in batches.
+        :param tuples: A list of dicts being the tuples to upsert.
+        :return: A list of lists of dicts, each being one batch of tuples.
+        """
+        batch_size = self.get_batch_size(tuples=tuples)
+        return [tuples[i:i + batch_size] for i in range(0, len(tuples), batch_size)]
+
+    def get_batch_size(self, tuples: list[dict]) -> int:
+        with self.lock:
+            batch_size = self.batch_size
+        if len(tuples) > 1:
+            # estimate the size of a tuple to keep batches under the maximum size of a bulk write (in any mode),
+            # even when the tuples fit in one batch, because a few large tuples may exceed it
+            samples = tuples[:DB_BATCH_NB_SAMPLES]
+            tuple_size = sum(len(bson.encode(one_tuple)) for one_tuple in samples) / len(samples)
+            batch_size = max(1, min(batch_size, int(MAX_DB_BATCH_BYTES // tuple_size)))
+        return batch_size
+
+    def record_bulk_write(self, nb_operations: int, duration: float) -> None:
+        """
+        Adapt the batch size to the latency of the last bulk write (this does nothing in the non-adaptive mode).
+        :param nb_operations: An integer being the number of operations of the bulk write.
+        :param duration: A float being the duration (in seconds) of the bulk write.
+        :return: Nothing.
+        """
+        if not self.adaptive:
+            return
+        with self.lock:
+            previous_batch_size = self.batch_size
+            if duration > 2 * ADAPTIVE_BATCH_TARGET_LATENCY:
+                self.batch_size = max(MIN_DB_BATCH_SIZE, self.batch_size // 2)
+            elif duration < ADAPTIVE_BATCH_TARGET_LATENCY / 2 and nb_operations >= self.batch_size:
+                # only full batches tell whether larger batches would still be fast
+                self.batch_size = min(MAX_DB_BATCH_SIZE, self.batch_size * 2)
+            if self.batch_size != previous_batch_size:
+                log.debug("The bulk write of %s operations took %.3f seconds, the batch size is now %s", nb_operations, duration, self.batch_size)
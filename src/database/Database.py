@@ -1,22 +1,30 @@
 import json
 import os
 import re
+import threading
+import time
 import traceback
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 import bson
 from bson.json_util import loads
 import pymongo
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import DuplicateKeyError, BulkWriteError, ConnectionFailure, OperationFailure, PyMongoError
 from pymongo.command_cursor import CommandCursor
 from pymongo.cursor import Cursor
 
 from config.BetterConfig import BetterConfig
+from database.BatchSizer import BatchSizer
+from utils.IntermediateFormats import IntermediateFormats
 from utils.TableNames import TableNames
 from utils.UpsertPolicy import UpsertPolicy
-from utils.constants import BATCH_SIZE
+from utils.constants import UNIQUE_VARIABLES, COUNTERS_TABLE_NAME, RESOURCE_COUNTER_NAME, RETRYABLE_WRITE_ERROR_CODES, \
+    WRITE_RETRY_DELAY, HASHES_TABLE_NAME, DUPLICATE_KEY_ERROR_CODE
 from utils.setup_logger import log
 from utils.utils import mongodb_match, mongodb_unwind, mongodb_project_one, mongodb_min, mongodb_max, mongodb_group_by, \
-    mongodb_sort
+    mongodb_sort, get_hash, read_bson_file, get_projected_value, get_bson_date_from_datetime
 
 
 class Database:
@@ -38,9 +46,24 @@ class Database:
         self.config = config
         self.client = MongoClient(host=self.config.get_db_connection(),
                                   serverSelectionTimeoutMS=5000)  # timeout after 5 sec instead of 20 (the default)
+        # for each table and projection (e.g., Examination and code.text), map the values of the projection to the
+        # identifiers of their resources, see retrieve_identifiers()
+        self.identifiers_cache = {}
+        # the tables whose hashes have been checked against their content, see forget_hashes_of_empty_table()
+        self.hashed_tables = set()
         if config.get_db_drop():
             self.drop_db()
         self.db = self.client[self.config.get_db_name()]
+        self.batch_sizer = BatchSizer(batch_size=self.config.get_db_batch_size(), adaptive=self.config.get_adaptive_batching())
+        # the threads sending the bulk writes in parallel (unordered mode), created here because upsert_batch_of_tuples()
+        # may be called by several loader threads at the same time (pipelined mode)
+        self.writers = None
+        if self.config.get_unordered_upserts() and self.config.get_nb_writers() > 1:
+            self.writers = ThreadPoolExecutor(max_workers=self.config.get_nb_writers(), thread_name_prefix="writer")
+        # the upserts that failed (after retries), each being a dict with the table, the error code and message,
+        # and the failed operation
+        self.write_errors = []
+        self.write_errors_lock = threading.Lock()
 
         log.debug("the connection string is: %s", self.config.get_db_connection())
         log.debug("the new MongoClient is: %s", self.client)
@@ -71,8 +94,12 @@ class Database:
         """
         log.info("WARNING: The database %s will be dropped!", self.config.get_db_name())
         self.client.drop_database(name_or_database=self.config.get_db_name())
+        self.identifiers_cache = {}
+        self.hashed_tables = set()
 
     def close(self) -> None:
+        if self.writers is not None:
+            self.writers.shutdown()
         self.client.close()
 
     def insert_one_tuple(self, table_name: str, one_tuple: dict) -> None:
@@ -121,65 +148,294 @@ class Database:
         :param tuples:
         :return: An integer being the number of upserted tuples.
         """
-        # in case there are more than 1000 tuples to upserts, we split them in batch of 1000
+        # in case there are many tuples to upsert, we split them in batches (of db_batch_size tuples)
         # and send one bulk operation per batch. This allows to save time by not doing a db call per upsert
         # but do not overload the MongoDB with thousands of upserts.
-        # we use the bulk operation to send sets of BATCH_SIZE operations, each doing an upsert
         # this allows to have only on call to the database for each bulk operation (instead of one per upsert operation)
-        operations = []
+        incremental = self.config.get_incremental()
+        if incremental:
+            # only new and changed resources are written
+            tuples, tuple_hashes = self.filter_unchanged_tuples(table_name=table_name, unique_variables=unique_variables, tuples=tuples)
+            if len(tuples) == 0:
+                return
+        batches = self.compute_batches(tuples=tuples)
+        batches_of_operations = []
+        for batch in batches:
+            operations = []
+            for one_tuple in batch:
+                filter_dict = {}
+                for unique_variable in unique_variables:
+                    filter_dict[unique_variable] = one_tuple[unique_variable]
+                if incremental:
+                    # the resource may exist with another content, thus we update it, but we keep its identifier
+                    # (it may be referred to by other resources) and its creation date
+                    kept_keys = ["identifier", "identifierNumber", "createdAt"]
+                    update_stmt = {"$set": {key: value for key, value in one_tuple.items() if key not in kept_keys}}
+                    set_on_insert = {key: one_tuple[key] for key in kept_keys if key in one_tuple}
+                    if len(set_on_insert) > 0:
+                        update_stmt["$setOnInsert"] = set_on_insert
+                else:
+                    update_stmt = {"$setOnInsert": one_tuple}
+                operations.append(pymongo.UpdateOne(filter=filter_dict, update=update_stmt, upsert=True))
+            batches_of_operations.append(operations)
+        if self.writers is not None and len(batches_of_operations) > 1:
+            # unordered batches are independent, thus they are sent in parallel over the connection pool
+            futures = [self.writers.submit(self.write_batch, table_name, operations) for operations in batches_of_operations]
+            written_indexes = [future.result() for future in futures]  # this raises the error of the batch, if any
+        else:
+            written_indexes = [self.write_batch(table_name=table_name, operations=operations) for operations in batches_of_operations]
+        failed_indexes = [failed_indexes_of_batch for failed_indexes_of_batch, _ in written_indexes]
+
+        if incremental:
+            # record the hashes of the resources that have been written, so that they are skipped next time
+            written_hashes = []
+            offset = 0
+            for batch, failed_indexes_of_batch in zip(batches, failed_indexes):
+                written_hashes.extend([tuple_hashes[offset + i] for i in range(len(batch)) if i not in failed_indexes_of_batch])
+                offset = offset + len(batch)
+            self.save_tuple_hashes(tuple_hashes=written_hashes)
+        # the identifiers of the inserted resources are cached, thus they are not retrieved from the database
+        inserted_tuples = []
+        for batch, (_, inserted_indexes_of_batch) in zip(batches, written_indexes):
+            inserted_tuples.extend([batch[i] for i in inserted_indexes_of_batch])
+        self.cache_identifiers(table_name=table_name, tuples=inserted_tuples)
+
+    def filter_unchanged_tuples(self, table_name: str, unique_variables: list[str], tuples: list[dict]) -> tuple[list[dict], list[tuple[str, str]]]:
+        """
+        Remove the tuples whose content has not changed since they have been written, using the content hashes
+        kept in the hashes table.
+        :param table_name: A string being the table name in which the tuples are upserted.
+        :param unique_variables: A list of strings being the fields on which a tuple is unique.
+        :param tuples: A list of dicts being the tuples to upsert.
+        :return: A tuple with the list of new or changed tuples, and the list of their hashes, each hash being
+        a tuple (hash ID, content hash).
+        """
+        # the identifier of resources created by the FAIRificator changes at each run, thus it is not hashed
+        # (except when it is unique, e.g., for Patient instances)
+        excluded_keys = ["createdAt"]
+        if "identifier" not in unique_variables:
+            excluded_keys.extend(["identifier", "identifierNumber"])
+        self.forget_hashes_of_empty_table(table_name=table_name)
+        tuple_hashes = []
         for one_tuple in tuples:
-            filter_dict = {}
-            for unique_variable in unique_variables:
-                filter_dict[unique_variable] = one_tuple[unique_variable]
-            update_stmt = {"$setOnInsert": one_tuple}
-            operations.append(pymongo.UpdateOne(filter=filter_dict, update=update_stmt, upsert=True))
-        log.debug("Table %s: sending a bulk write of %s operations", table_name, len(operations))
-        result_upsert = self.db[table_name].bulk_write(operations)
-        log.info("In %s, %s inserted, %s upserted, %s modified tuples", table_name, result_upsert.inserted_count, result_upsert.upserted_count, result_upsert.modified_count)
+            hash_id = table_name + "/" + get_hash(value=[one_tuple[unique_variable] for unique_variable in unique_variables])
+            content_hash = get_hash(value={key: value for key, value in one_tuple.items() if key not in excluded_keys})
+            tuple_hashes.append((hash_id, content_hash))
+        cursor = self.db[HASHES_TABLE_NAME].find({"_id": {"$in": [hash_id for hash_id, _ in tuple_hashes]}}, {"hash": 1})
+        existing_hashes = {result["_id"]: result["hash"] for result in cursor}
+
+        changed_tuples = []
+        changed_hashes = []
+        for one_tuple, (hash_id, content_hash) in zip(tuples, tuple_hashes):
+            if existing_hashes.get(hash_id) != content_hash:
+                changed_tuples.append(one_tuple)
+                changed_hashes.append((hash_id, content_hash))
+        log.info("In %s, %s unchanged tuples are skipped, %s tuples are new or changed", table_name, len(tuples) - len(changed_tuples), len(changed_tuples))
+        return changed_tuples, changed_hashes
+
+    def forget_hashes_of_empty_table(self, table_name: str) -> None:
+        # when a table has been dropped (or emptied) without the hashes table, its hashes do not describe its content
+        # anymore, thus they are removed so that all its resources are written again
+        if table_name not in self.hashed_tables:
+            self.hashed_tables.add(table_name)
+            if self.db[table_name].estimated_document_count() == 0:
+                result = self.db[HASHES_TABLE_NAME].delete_many({"_id": {"$regex": "^" + re.escape(table_name + "/")}})
+                if result.deleted_count > 0:
+                    log.info("The table %s is empty, thus its %s resource hashes are removed", table_name, result.deleted_count)
+
+    def save_tuple_hashes(self, tuple_hashes: list[tuple[str, str]]) -> None:
+        if len(tuple_hashes) > 0:
+            operations = [pymongo.UpdateOne(filter={"_id": hash_id}, update={"$set": {"hash": content_hash}}, upsert=True) for hash_id, content_hash in tuple_hashes]
+            self.db[HASHES_TABLE_NAME].bulk_write(operations, ordered=False)
+
+    def write_batch(self, table_name: str, operations: list[pymongo.UpdateOne]) -> tuple[list[int], list[int]]:
+        """
+        Send one bulk write, and retry it on transient failures. Upserts are idempotent, thus sending again an
+        operation that has already been applied does not change the database.
+        In the unordered mode, the server applies all the operations, even after a failed one: the operations that
+        failed with a transient error are retried, and the other failed ones are recorded in write_errors.
+        :param table_name: A string being the table name in which the operations are applied.
+        :param operations: A list of UpdateOne operations, being the upserts of one batch.
+        :return: A tuple with the list of the indexes of the operations that failed, and the list of the indexes of
+        the operations that inserted a new document.
+        """
+        ordered = not self.config.get_unordered_upserts()
+        nb_retries = self.config.get_nb_write_retries()
+        indexes = list(range(len(operations)))  # the index of each sent operation in the given operations
+        failed_indexes = []
+        inserted_indexes = []
+        for attempt in range(nb_retries + 1):
+            if attempt > 0:
+                time.sleep(WRITE_RETRY_DELAY * 2 ** (attempt - 1))  # exponential backoff
+                log.info("Table %s: retrying a bulk write of %s operations (attempt %s/%s)", table_name, len(operations), attempt, nb_retries)
+            log.debug("Table %s: sending a bulk write of %s operations", table_name, len(operations))
+            try:
+                start_time = time.perf_counter()
+                result_upsert = self.db[table_name].bulk_write(operations, ordered=ordered)
+                self.batch_sizer.record_bulk_write(nb_operations=len(operations), duration=time.perf_counter() - start_time)
+                log.info("In %s, %s inserted, %s upserted, %s modified tuples", table_name, result_upsert.inserted_count, result_upsert.upserted_count, result_upsert.modified_count)
+                inserted_indexes.extend([indexes[position] for position in result_upsert.upserted_ids])
+                return failed_indexes, inserted_indexes
+            except BulkWriteError as error:
+                if ordered:
+                    # the operations after the failed one have not been applied, thus we stop as before
+                    raise
+                log.info("In %s, %s upserted tuples and %s failed operations", table_name, error.details["nUpserted"], len(error.details["writeErrors"]))
+                inserted_indexes.extend([indexes[upserted["index"]] for upserted in error.details["upserted"]])
+                retryable_positions = []  # the positions of the operations to retry in the sent operations
+                for write_error in error.details["writeErrors"]:
+                    if self.is_retryable_write_error(write_error=write_error) and attempt < nb_retries:
+                        retryable_positions.append(write_error["index"])
+                    else:
+                        self.add_write_error(table_name=table_name, code=write_error["code"], message=write_error["errmsg"], operation=write_error["op"])
+                        failed_indexes.append(indexes[write_error["index"]])
+                if len(retryable_positions) == 0:
+                    return failed_indexes, inserted_indexes
+                operations = [operations[position] for position in retryable_positions]
+                indexes = [indexes[position] for position in retryable_positions]
+            except PyMongoError as error:
+                if not self.is_transient_error(error=error) or attempt == nb_retries:
+                    raise
+                log.warning("Table %s: a bulk write failed with a transient error: %s", table_name, error)
+        return failed_indexes, inserted_indexes
+
+    @staticmethod
+    def is_retryable_write_error(write_error: dict) -> bool:
+        if write_error["code"] in RETRYABLE_WRITE_ERROR_CODES:
+            return True
+        elif write_error["code"] == DUPLICATE_KEY_ERROR_CODE:
+            # a duplicate key is transient only when it comes from an upsert race: two upserts of the same document
+            # have both inserted it, thus the one that failed finds the document when it is retried
+            # otherwise (e.g., the upsert would create a second document with the same key), it fails again
+            operation = write_error.get("op", {})
+            key_value = write_error.get("keyValue", {})
+            if not operation.get("upsert", False) or len(key_value) == 0:
+                return False
+            filter_dict = operation.get("q", {})
+            for key, value in key_value.items():
+                if (filter_dict[key] if key in filter_dict else get_projected_value(value=filter_dict, projection=key)) != value:
+                    return False
+            return True
+        else:
+            return False
+
+    def is_transient_error(self, error: PyMongoError) -> bool:
+        if isinstance(error, ConnectionFailure):
+            # this covers network errors and timeouts, and replica set elections
+            return True
+        elif isinstance(error, OperationFailure) and error.code in RETRYABLE_WRITE_ERROR_CODES:
+            return True
+        else:
+            return error.has_error_label("RetryableWriteError") or error.has_error_label("TransientTransactionError")
+
+    def add_write_error(self, table_name: str, code: int, message: str, operation: dict) -> None:
+        log.error("In %s, an upsert failed with error %s: %s", table_name, code, message)
+        with self.write_errors_lock:
+            self.write_errors.append({"table": table_name, "code": code, "message": message, "operation": operation})
 
     def compute_batches(self, tuples: list[dict]) -> list[list[dict]]:
-        batch_tuples = []
-        if len(tuples) <= BATCH_SIZE:
-            batch_tuples.append(tuples)
+        return self.batch_sizer.compute_batches(tuples=tuples)
+
+    def retrieve_identifiers(self, table_name: str, projection: str, values: list = None) -> dict:
+        """
+        Map the values of a (unique) field of the resources of a table to the identifiers of these resources.
+        :param table_name: A string being the table name in which the resources are.
+        :param projection: A string being the field, possibly nested, e.g., code.text.
+        :param values: A list of the values to look for, or None to get all the resources of the table.
+        Resources looked up by values are cached, thus they are not retrieved again (resources inserted later on
+        are added to the cache, see cache_identifiers()).
+        :return: A dict mapping the found values to the identifiers of their resources.
+        """
+        if values is None:
+            mapping = self.find_identifiers(table_name=table_name, projection=projection, filter_dict={})
         else:
-            # +1 to take the elements remaining after X thousands,
-            # e.g., in 4321, we need one more iteration to gt the 321 remaining elements in a batch
-            nb_batch = (len(tuples) // BATCH_SIZE) + 1
-            for i in range(0, nb_batch):
-                left_index = i * BATCH_SIZE
-                right_index = (i + 1) * BATCH_SIZE
-                batch = tuples[left_index: right_index]
-                batch_tuples.append(batch)
-        return batch_tuples
-
-    def retrieve_identifiers(self, table_name: str, projection: str) -> dict:
+            cached_mapping = self.identifiers_cache.setdefault((table_name, projection), {})
+            missing_values = [value for value in set(values) if value not in cached_mapping]
+            if len(missing_values) > 0:
+                # this uses the index on the projection, see Load.create_db_indexes()
+                cached_mapping.update(self.find_identifiers(table_name=table_name, projection=projection,
+                                                            filter_dict={projection: {"$in": missing_values}}))
+            mapping = {value: cached_mapping[value] for value in values if value in cached_mapping}
+        log.debug(mapping)
+        return mapping
+
+    def find_identifiers(self, table_name: str, projection: str, filter_dict: dict) -> dict:
         projection_as_dict = {projection: 1, "identifier": 1}
-        cursor = self.find_operation(table_name=table_name, filter_dict={}, projection=projection_as_dict)
+        cursor = self.find_operation(table_name=table_name, filter_dict=filter_dict, projection=projection_as_dict)
         mapping = {}
         for result in cursor:
-            projected_value = result
-            for key in projection.split("."):
-                # this covers the case when the project is a nested key, e.g., code.text
-                projected_value = projected_value[key]
-            mapping[projected_value] = result["identifier"]
-        log.debug(mapping)
+            mapping[get_projected_value(value=result, projection=projection)] = result["identifier"]
         return mapping
 
+    def cache_identifiers(self, table_name: str, tuples: list[dict]) -> None:
+        # the identifiers of the inserted resources are added to the cached mappings of their table
+        # (an upsert that matches an existing resource never changes its identifier, thus its cached one stays valid)
+        for (cached_table_name, projection), cached_mapping in self.identifiers_cache.items():
+            if cached_table_name == table_name:
+                for one_tuple in tuples:
+                    projected_value = get_projected_value(value=one_tuple, projection=projection)
+                    if projected_value is not None and "identifier" in one_tuple:
+                        cached_mapping[projected_value] = one_tuple["identifier"]
+
     def write_in_file(self, data_array: list, table_name: str, count: int) -> None:
         if len(data_array) > 0:
-            filename = os.path.join(self.config.get_working_dir_current(), table_name + str(count) + ".json")
-            with open(filename, "w") as data_file:
-                try:
-                    json.dump([resource.to_json() for resource in data_array], data_file)
-                except Exception:
-                    traceback.print_exc()
-                    log.error("The %s instances could not be converted to JSON. Stopping here.", table_name)
-                    exit()
+            if self.config.get_intermediate_format() == IntermediateFormats.BSON.value:
+                self.write_in_bson_file(data_array=data_array, table_name=table_name)
+            else:
+                filename = os.path.join(self.config.get_working_dir_current(), table_name + str(count) + ".json")
+                with open(filename, "w") as data_file:
+                    try:
+                        # the resources of a batch share the same creation date (as in get_bson_tuples)
+                        created_at = datetime.now()
+                        json.dump([resource.to_json(created_at=created_at) for resource in data_array], data_file)
+                    except Exception:
+                        traceback.print_exc()
+                        log.error("The %s instances could not be converted to JSON. Stopping here.", table_name)
+                        exit()
         else:
             log.info("No data when writing file %s/%s", table_name, count)
 
+    def clear_intermediate_files(self) -> None:
+        # the intermediate files of the previous data file have already been loaded, and the BSON files are appended to,
+        # thus they are removed before a new data file is transformed, otherwise they would be loaded again with it
+        table_names = "|".join([table_name.value for table_name in TableNames])
+        for filename in os.listdir(self.config.get_working_dir_current()):
+            if re.fullmatch("(" + table_names + ")([0-9]+\\.json|\\.bson)", filename) is not None:
+                os.remove(os.path.join(self.config.get_working_dir_current(), filename))
+
+    def write_in_bson_file(self, data_array: list, table_name: str) -> None:
+        # the resources of a table are appended to a single file, as BSON documents one after the other
+        # dates are given as datetime objects, thus they are written as BSON dates (as in write_in_table)
+        filename = os.path.join(self.config.get_working_dir_current(), table_name + ".bson")
+        try:
+            documents = b"".join([bson.encode(one_tuple) for one_tuple in self.get_bson_tuples(data_array=data_array)])
+        except Exception:
+            traceback.print_exc()
+            log.error("The %s instances could not be converted to BSON. Stopping here.", table_name)
+            exit()
+        with open(filename, "ab") as data_file:
+            data_file.write(documents)
+
+    def get_bson_tuples(self, data_array: list) -> list[dict]:
+        # the resources of a batch share the same creation date, and their dates are datetime objects
+        # (instead of MongoDB dates), thus pymongo stores them as BSON dates
+        created_at = get_bson_date_from_datetime(current_datetime=datetime.now())
+        return [resource.to_bson(created_at=created_at) for resource in data_array]
+
+    def write_in_table(self, data_array: list, table_name: str) -> None:
+        # upsert the resources directly, instead of writing them in a file which is parsed later (see load_json_in_table)
+        # dates are given as datetime objects, thus pymongo stores them as BSON dates
+        if len(data_array) > 0:
+            tuples = self.get_bson_tuples(data_array=data_array)
+            self.upsert_batch_of_tuples(table_name=table_name, unique_variables=UNIQUE_VARIABLES[table_name], tuples=tuples)
+        else:
+            log.info("No data when writing in table %s", table_name)
+
     def load_json_in_table(self, table_name: str, unique_variables) -> None:
         log.info("insert data in %s", table_name)
+        if self.config.get_intermediate_format() == IntermediateFormats.BSON.value:
+            self.load_bson_in_table(table_name=table_name, unique_variables=unique_variables)
+            return
         for filename in os.listdir(self.config.get_working_dir_current()):
             if re.search(table_name+"[0-9]+", filename) is not None:
                 # implementation note: we cannot simply use filename.startswith(table_name)
@@ -187,12 +443,31 @@ class Database:
                 # the solution is to use a regex
                 with open(os.path.join(self.config.get_working_dir_current(), filename), "r") as json_datafile:
                     tuples = bson.json_util.loads(json_datafile.read())
-                    log.info(tuples)
                     log.debug("Table %s, file %s, loading %s tuples", table_name, filename, len(tuples))
                     self.upsert_batch_of_tuples(table_name=table_name,
                                                          unique_variables=unique_variables,
                                                          tuples=tuples)
 
+    def load_bson_in_table(self, table_name: str, unique_variables) -> None:
+        # the BSON documents of the table file are read lazily, and upserted by batches of (at most) db_batch_size
+        # thus, only one batch of documents is in memory at a time, whatever the size of the file
+        filename = os.path.join(self.config.get_working_dir_current(), table_name + ".bson")
+        if not os.path.isfile(filename):
+            log.info("No file %s to load in table %s", filename, table_name)
+            return
+        tuples = []
+        nb_tuples = 0
+        for one_tuple in read_bson_file(filepath=filename):
+            tuples.append(one_tuple)
+            if len(tuples) >= self.config.get_db_batch_size():
+                self.upsert_batch_of_tuples(table_name=table_name, unique_variables=unique_variables, tuples=tuples)
+                nb_tuples += len(tuples)
+                tuples = []
+        if len(tuples) > 0:
+            self.upsert_batch_of_tuples(table_name=table_name, unique_variables=unique_variables, tuples=tuples)
+            nb_tuples += len(tuples)
+        log.debug("Table %s, file %s, loaded %s tuples", table_name, filename, nb_tuples)
+
     def find_operation(self, table_name: str, filter_dict: dict, projection: dict) -> Cursor:
         """
         Perform a find operation (SELECT * FROM x WHERE filter_dict) in a given table.
@@ -222,6 +497,12 @@ class Database:
         """
         self.db[table_name].create_index(columns, unique=True)
 
+    def create_lookup_indexes(self) -> None:
+        # Hospital and Examination instances are retrieved by name (see retrieve_identifiers()) as soon as they are
+        # created, thus these indexes are created before the ingestion (and not at the end of the Load step)
+        self.create_non_unique_index(table_name=TableNames.EXAMINATION.value, columns={"code.text": 1})
+        self.create_non_unique_index(table_name=TableNames.HOSPITAL.value, columns={"name": 1})
+
     def create_non_unique_index(self, table_name: str, columns: dict) -> None:
         """
         Create an index on a (set of) column(s) for which uniqueness is not guaranteed.
@@ -260,6 +541,17 @@ class Database:
     def get_min_value(self, table_name: str, field: str) -> int | float:
         return self.get_min_or_max_value(table_name=table_name, field=field, sort_order=1)
 
+    def get_max_identifier_number(self, table_name: str) -> int | float | None:
+        # the max number is read from the index on identifierNumber (see Load.create_db_indexes)
+        result = self.db[table_name].find_one(filter={"identifierNumber": {"$type": "number"}},
+                                              projection={"identifierNumber": 1},
+                                              sort=[("identifierNumber", pymongo.DESCENDING)])
+        if result is not None:
+            return result["identifierNumber"]
+        else:
+            # the resources have been created before identifiers had a number, thus we parse their values
+            return self.get_max_value(table_name=table_name, field="identifier.value")
+
     def get_avg_value_of_examination_record(self, examination_url: str) -> int | float:
         """
         Compute the average value among all the examination records for a certain examination.
@@ -303,7 +595,7 @@ class Database:
                 # pass because Patient and Sample resources have their ID assigned by hospitals, not the FAIRificator
                 pass
             else:
-                current_max_identifier = self.get_max_value(table_name=table_name.value, field="identifier.value")
+                current_max_identifier = self.get_max_identifier_number(table_name=table_name.value)
                 if current_max_identifier is not None:
                     if current_max_identifier > max_value:
                         max_value = current_max_identifier
@@ -312,6 +604,34 @@ class Database:
                     pass
         return max_value
 
+    def allocate_resource_ids(self, nb_ids: int) -> tuple[int, int]:
+        """
+        Atomically allocate a block of resource IDs in the counters table. Several processes (or several ETL runs)
+        working on the same database never get the same IDs.
+        :param nb_ids: An integer being the number of IDs to allocate.
+        :return: A tuple being the first and the last IDs of the allocated block.
+        """
+        self.init_resource_counter()
+        counter = self.db[COUNTERS_TABLE_NAME].find_one_and_update(filter={"_id": RESOURCE_COUNTER_NAME},
+                                                                   update={"$inc": {"value": nb_ids}},
+                                                                   return_document=ReturnDocument.AFTER)
+        last_id = counter["value"]
+        return last_id - nb_ids + 1, last_id
+
+    def init_resource_counter(self) -> None:
+        # the counter keeps the last allocated ID
+        # when it does not exist yet, e.g., for databases created before the counters table, we start from the current
+        # max ID, which is computed only once for the database
+        if self.db[COUNTERS_TABLE_NAME].count_documents(filter={"_id": RESOURCE_COUNTER_NAME}, limit=1) == 0:
+            max_value = max(self.get_resource_counter_id(), 0)
+            log.debug("will init the resource counter with %s", max_value)
+            try:
+                self.db[COUNTERS_TABLE_NAME].update_one(filter={"_id": RESOURCE_COUNTER_NAME},
+                                                        update={"$setOnInsert": {"value": max_value}}, upsert=True)
+            except DuplicateKeyError:
+                # another process has created the counter in the meantime, thus we use it
+                pass
+
     def __str__(self) -> str:
         return "Database " + self.config.get_db_name()
 
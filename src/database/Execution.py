@@ -10,12 +10,12 @@ from utils.constants import NONE_VALUE
 
 
 class Execution(Resource):
-    def __init__(self, config: BetterConfig, database: Database, counter: Counter):
+    def __init__(self, config: BetterConfig, database: Database, counter: Counter, analysis_reports: list = None):
         super().__init__(id_value=NONE_VALUE, resource_type=self.get_type(), counter=counter)
 
         self.created_at = datetime.now().isoformat()
         self.config = config
-        self.execution_analysis = ExecutionAnalysis(database)
+        self.execution_analysis = ExecutionAnalysis(database, analysis_reports=analysis_reports)
         self.execution_analysis.run()
         self.database = database
         self.counter = counter
@@ -33,6 +33,7 @@ class Execution(Resource):
     def to_json(self):
         return {
             "identifier": self.identifier.to_json(),
+            "identifierNumber": self.identifier.number,
             "createdAt": self.created_at,
             "parameters": self.config.to_json(),
             "analysis": self.execution_analysis.to_json()
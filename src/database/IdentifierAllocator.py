@@ -0,0 +1,25 @@
+from database.Database import Database
+
+
+class IdentifierAllocator:
+    """
+    The class IdentifierAllocator gives blocks of resource IDs to a Counter. Blocks are allocated atomically in the
+    counters table of the database, thus processes (or ETL runs) creating resources concurrently never get the same
+    IDs. IDs are given by blocks so that processes do not call the database for each resource.
+    """
+
+    def __init__(self, database: Database, block_size: int):
+        """
+        Create a new allocator.
+        :param database: A Database instance in which the last allocated ID is kept.
+        :param block_size: An integer being the number of IDs given at once.
+        """
+        self.database = database
+        self.block_size = max(1, block_size)
+
+    def allocate_block(self) -> tuple[int, int]:
+        """
+        Allocate a new block of IDs.
+        :return: A tuple being the first and the last IDs of the block.
+        """
+        return self.database.allocate_resource_ids(nb_ids=self.block_size)
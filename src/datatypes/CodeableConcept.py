@@ -11,6 +11,8 @@ class CodeableConcept:
     and is composed of a system (LOINC, SNOMED, ...) and a value (123, 456, ...).
     For more details about Codings, see the class Coding.
     """
+    __slots__ = ("codings", "text")
+
     def __init__(self):
         """
         Instantiate a new CodeableConcept, empty or with a coding (represented as a tuple).
@@ -25,7 +27,7 @@ class CodeableConcept:
         :return: Nothing.
         """
         if triple is not None:
-            self.codings.append(Coding(triple=triple))
+            self.codings.append(Coding.get_interned(triple=triple))
 
     def to_json(self) -> dict:
         """
@@ -1,18 +1,39 @@
 import json
 
+from utils.LruCache import LruCache
+from utils.constants import MAX_INTERNED_VALUES
+
 
 class Coding:
+    __slots__ = ("system", "code", "display", "json")
+
+    # the codings shared by the concepts having the same (system, code, display), see get_interned()
+    interned_codings = LruCache(max_size=MAX_INTERNED_VALUES)
+
     def __init__(self, triple: tuple):
         self.system = triple[0]
         self.code = triple[1]
         self.display = triple[2]
+        self.json = None  # computed once, see to_json()
+
+    @classmethod
+    def get_interned(cls, triple: tuple) -> "Coding":
+        # the type of each element is part of the key because 1, 1.0 and True are equal in Python
+        key = tuple((type(element), element) for element in triple)
+        coding = cls.interned_codings.get(key)
+        if coding is None:
+            coding = Coding(triple=triple)
+            cls.interned_codings.put(key, coding)
+        return coding
 
     def to_json(self) -> dict:
-        return {
-            "system": str(self.system),
-            "code": str(self.code),
-            "display": str(self.display)
-        }
+        if self.json is None:
+            self.json = {
+                "system": str(self.system),
+                "code": str(self.code),
+                "display": str(self.display)
+            }
+        return self.json
 
     def __str__(self) -> str:
         return json.dumps(self.to_json())
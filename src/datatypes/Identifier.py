@@ -1,5 +1,14 @@
+from utils.LruCache import LruCache
+from utils.constants import MAX_INTERNED_VALUES
+
+
 class Identifier:
-    def __init__(self, id_value: str, resource_type: str):
+    __slots__ = ("value", "number", "json")
+
+    # the identifiers given by hospitals, shared by the resources referring to them, see get_interned()
+    interned_identifiers = LruCache(max_size=MAX_INTERNED_VALUES)
+
+    def __init__(self, id_value: str, resource_type: str, number: int = None):
         if not isinstance(id_value, str):
             # in case the dataframe has converted IDs to integers
             id_value = str(id_value)
@@ -11,8 +20,28 @@ class Identifier:
             self.value = id_value
         else:
             self.value = resource_type + "/" + id_value
+        # the number of the identifiers assigned by the FAIRificator (not the ones given by hospitals), which is
+        # stored as a number to get the max identifier from an index (see Database.get_max_identifier_number)
+        # it is stored next to the identifier (in identifierNumber), and not in it, because the identifiers are copied
+        # in references, which are part of the unique variables of some resources, e.g., ExaminationRecord instances
+        self.number = number
+        self.json = None  # computed once, see to_json()
+
+    @classmethod
+    def get_interned(cls, id_value: str, resource_type: str) -> "Identifier":
+        # get the (shared) identifier, e.g., of a patient whose ID is given in each row of the data
+        # the value is keyed as it is stored, i.e., as a string: 1 and 1.0 give different identifiers,
+        # while NaN values (which are not equal to themselves) are all found
+        key = (resource_type, str(id_value))
+        identifier = cls.interned_identifiers.get(key)
+        if identifier is None:
+            identifier = Identifier(id_value=id_value, resource_type=resource_type)
+            cls.interned_identifiers.put(key, identifier)
+        return identifier
 
     def to_json(self) -> dict:
-        return {
-            "value": self.value
-        }
+        if self.json is None:
+            self.json = {
+                "value": self.value
+            }
+        return self.json
@@ -1,5 +1,8 @@
 import json
 
+from utils.LruCache import LruCache
+from utils.constants import MAX_INTERNED_VALUES
+
 
 class Reference:
     """
@@ -7,6 +10,11 @@ class Reference:
     This allows to refer to other resources using their BETTER ID
     (not the local_id, which is proper to each hospital, but instead the id
     """
+    __slots__ = ("reference", "type", "json")
+
+    # the references shared by the resources referring to the same resource, see get_interned()
+    interned_references = LruCache(max_size=MAX_INTERNED_VALUES)
+
     def __init__(self, resource_identifier: str, resource_type: str):
         """
         Create a new reference to another resource.
@@ -14,12 +22,33 @@ class Reference:
         """
         self.reference = resource_identifier
         self.type = resource_type
+        self.json = None  # computed once, see to_json()
+
+    @classmethod
+    def get_interned(cls, resource_identifier: str | dict, resource_type: str) -> "Reference":
+        """
+        Get the (shared) reference to the given resource, instead of creating a new one for each referring resource.
+        :param resource_identifier: A string or a dict (e.g., the identifier of a resource in the database).
+        :param resource_type: A string being the type of the referred resource.
+        :return: A Reference instance, which should not be modified.
+        """
+        # the type of the identifier is part of the key because 1, 1.0 and True are equal in Python,
+        # but they are different identifiers once stored
+        identifier_key = tuple(resource_identifier.items()) if isinstance(resource_identifier, dict) else resource_identifier
+        key = (resource_type, type(resource_identifier), identifier_key)
+        reference = cls.interned_references.get(key)
+        if reference is None:
+            reference = Reference(resource_identifier=resource_identifier, resource_type=resource_type)
+            cls.interned_references.put(key, reference)
+        return reference
 
     def to_json(self) -> dict:
-        return {
-            "reference": self.reference,
-            "type": self.type
-        }
+        if self.json is None:
+            self.json = {
+                "reference": self.reference,
+                "type": self.type
+            }
+        return self.json
 
     def __str__(self) -> str:
         return json.dumps(self.to_json())
@@ -1,17 +1,23 @@
 import locale
+import multiprocessing
 import os
 import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pandas import DataFrame
 
 from config.BetterConfig import BetterConfig
 from database.Database import Database
 from database.Execution import Execution
+from database.IdentifierAllocator import IdentifierAllocator
 from etl.Extract import Extract
 from etl.Load import Load
+from etl.LoaderPool import LoaderPool
 from etl.Transform import Transform
 from utils.Counter import Counter
 from utils.HospitalNames import HospitalNames
 from utils.constants import LOCALES
-from utils.setup_logger import log
+from utils.setup_logger import log, start_log_listener_in_worker
 
 
 class ETL:
@@ -42,56 +48,193 @@ class ETL:
         self.transform = None
         self.load = None
 
+        # set when this ETL runs in a worker process (see ingest_file_in_worker)
+        self.counter = None
+        self.reference_resources_created = False
+        # the analysis of each ingested data file (when asked), stored with the Execution
+        self.analysis_reports = []
+
     def run(self) -> None:
+        if not self.config.get_no_index():
+            self.database.create_lookup_indexes()
+        if self.config.get_nb_processes() > 1 and len(self.config.get_data_filepaths()) > 1:
+            error_occurred = self.run_in_parallel()
+        else:
+            error_occurred = self.run_sequentially()
+        if len(self.database.write_errors) > 0:
+            log.error("%s upserts failed. Please check the complete log.", len(self.database.write_errors))
+            error_occurred = True
+
+        # saving the execution parameters in the database before closing the execution
+        log.info("Saving execution parameters in the database.")
+        # we ensure to have an existing counter, otherwise we create a new one taking a single ID in the counters table
+        # (and not a whole block, which would be lost at the end of the run)
+        if self.transform is not None:
+            counter_transform = self.transform.counter
+        else:
+            counter_transform = Counter()
+            counter_transform.set_identifier_allocator(identifier_allocator=IdentifierAllocator(database=self.database, block_size=1))
+        execution = Execution(config=self.config, database=self.database, counter=counter_transform,
+                              analysis_reports=self.analysis_reports)
+        execution.store_in_database()
+
+        if not error_occurred:
+            log.info("All given files have been processed without error. Goodbye!")
+        else:
+            log.error("The script stopped at some point due to errors. Please check the complete log.")
+
+    def run_sequentially(self) -> bool:
         error_occurred = False
-        is_last_file = False
         file_counter = 0
         for one_file in self.config.get_data_filepaths():
             log.debug(one_file)
             file_counter = file_counter + 1
-            if file_counter == len(self.config.get_data_filepaths()):
-                is_last_file = True
-            # set the current path in the config because the ETL only knows files declared in the config
-            if one_file.startswith("/"):
-                # this is an absolute filepath, so we keep it as is
+            # create indexes only if this is the last file (otherwise, we would create useless intermediate indexes)
+            is_last_file = file_counter == len(self.config.get_data_filepaths())
+            if not self.ingest_file(one_file=self.get_full_filepath(one_file=one_file), create_indexes=is_last_file):
+                error_occurred = True
+        return error_occurred
+
+    def run_in_parallel(self) -> bool:
+        data_filepaths = [self.get_full_filepath(one_file=one_file) for one_file in self.config.get_data_filepaths()]
+        nb_workers = min(self.config.get_nb_processes(), len(data_filepaths))
+        log.info("--- Starting to ingest %s files with %s worker processes", len(data_filepaths), nb_workers)
+        error_occurred = False
+        try:
+            # 1. Hospital and Examination instances are shared by all files, thus we create them once here,
+            # so that workers only retrieve their identifiers instead of creating them concurrently
+            # the metadata is the same for all files, and the Examination instances are created from the columns of
+            # all files at once, thus a single block of IDs is taken and each Examination is upserted once
+            self.extract = Extract(database=self.database, config=self.config)
+            self.extract.load_metadata_file()
+            columns = {}  # the columns of all files, in the order of the files (a dict keeps the insertion order)
+            for one_file in data_filepaths:
                 self.config.set_current_filepath(current_filepath=one_file)
-            else:
-                # this is a relative filepath, we consider it to be relative to the project root (BETTER-fairificator)
-                # we need to add twice .. because the data files are never copied to the working dir (but remain in their place)
-                full_path = os.path.join(self.config.get_working_dir_current(), "..", "..", str(one_file))
-                self.config.set_current_filepath(current_filepath=full_path)
+                self.extract.load_data_header()
+                columns.update(dict.fromkeys(self.extract.data.columns))
+            counter = Counter()
+            counter.set_with_database(database=self.database)
+            self.transform = Transform(database=self.database, config=self.config, data=DataFrame(columns=list(columns)),
+                                       metadata=self.extract.metadata, mapped_values={}, counter=counter,
+                                       metadata_catalog=self.extract.metadata_catalog)
+            # self.transform is kept: the Execution takes its ID from the block of its counter at the end
+            # (the counters of the workers are not known here)
+            self.transform.create_reference_resources()
+        except Exception:
+            traceback.print_exc()  # print the stack trace
+            log.error("An error occurred while creating the Hospital and Examination instances. Please check the complete log. ")
+            return True
 
-            log.info("--- Starting to ingest file '%s'", self.config.get_current_filepath())
-            try:
-                if self.config.get_extract():
-                    self.extract = Extract(database=self.database, config=self.config)
+        # 2. each worker ingests files and takes resource IDs by blocks from the counters table of the database,
+        # thus IDs never collide across workers
+        # workers are spawned (and not forked), because forking a process running threads (e.g., the log listener or
+        # the monitors of the MongoDB client) may copy locks held by these threads, and deadlock the worker
+        with ProcessPoolExecutor(max_workers=nb_workers, mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=start_log_listener_in_worker,
+                                 initargs=(self.config.get_log_level(), self.config.get_subsystem_log_levels())) as executor:
+            futures = {}
+            for file_index, one_file in enumerate(data_filepaths):
+                future = executor.submit(ingest_file_in_worker, self.config, one_file, file_index)
+                futures[future] = one_file
+            for future in as_completed(futures):
+                try:
+                    no_error, analysis_reports = future.result()
+                    self.analysis_reports.extend(analysis_reports)
+                    if not no_error:
+                        error_occurred = True
+                except Exception:
+                    traceback.print_exc()  # print the stack trace
+                    log.error("The worker ingesting file '%s' stopped unexpectedly.", futures[future])
+                    error_occurred = True
 
-                    self.extract.run()
-                if self.config.get_transform():
-                    self.transform = Transform(database=self.database, config=self.config, data=self.extract.data,
-                                               metadata=self.extract.metadata, mapped_values=self.extract.mapped_values)
-                    self.transform.run()
-                if self.config.get_load():
-                    # create indexes only if this is the last file (otherwise, we would create useless intermediate indexes)
-                    self.load = Load(database=self.database, config=self.config, create_indexes=is_last_file)
-                    self.load.run()
+        # 3. indexes are created once all workers have finished
+        if self.config.get_load() and not self.config.get_no_index():
+            try:
+                Load(database=self.database, config=self.config, create_indexes=True).create_db_indexes()
             except Exception:
                 traceback.print_exc()  # print the stack trace
-                log.error("An error occurred during the ETL. Please check the complete log. ")
+                log.error("An error occurred while creating the indexes. Please check the complete log. ")
                 error_occurred = True
+        return error_occurred
 
-        # saving the execution parameters in the database before closing the execution
-        log.info("Saving execution parameters in the database.")
-        # we ensure to have an existing counter, otherwise we create a new one and set it to the max current id
-        if self.transform is not None:
-            counter_transform = self.transform.counter
+    def get_full_filepath(self, one_file: str) -> str:
+        if one_file.startswith("/"):
+            # this is an absolute filepath, so we keep it as is
+            return one_file
         else:
-            counter_transform = Counter()
-            counter_transform.set_with_database(database=self.database)
-        execution = Execution(config=self.config, database=self.database, counter=counter_transform)
-        execution.store_in_database()
+            # this is a relative filepath, we consider it to be relative to the project root (BETTER-fairificator)
+            # we need to add twice .. because the data files are never copied to the working dir (but remain in their place)
+            return os.path.join(self.config.get_working_dir_current(), "..", "..", str(one_file))
 
-        if not error_occurred:
-            log.info("All given files have been processed without error. Goodbye!")
-        else:
-            log.error("The script stopped at some point due to errors. Please check the complete log.")
+    def ingest_file(self, one_file: str, create_indexes: bool) -> bool:
+        # set the current path in the config because the ETL only knows files declared in the config
+        self.config.set_current_filepath(current_filepath=one_file)
+
+        log.info("--- Starting to ingest file '%s'", self.config.get_current_filepath())
+        try:
+            if self.config.get_extract():
+                self.extract = Extract(database=self.database, config=self.config)
+
+                self.extract.run()
+                if self.extract.analysis_report is not None:
+                    self.analysis_reports.append(self.extract.analysis_report)
+            if self.config.get_transform():
+                loader_pool = None
+                if self.config.get_pipelined():
+                    # resources are loaded by a pool of threads while the Transform step creates the next ones
+                    loader_pool = LoaderPool(database=self.database, nb_loaders=self.config.get_nb_loaders(),
+                                             queue_size=self.config.get_loading_queue_size())
+                try:
+                    self.transform = Transform(database=self.database, config=self.config, data=self.extract.data,
+                                               metadata=self.extract.metadata, mapped_values=self.extract.mapped_values,
+                                               loader_pool=loader_pool, counter=self.counter,
+                                               reference_resources_created=self.reference_resources_created,
+                                               converted_columns=set(self.extract.column_converters.keys()),
+                                               mapped_codes=self.extract.mapped_codes,
+                                               metadata_catalog=self.extract.metadata_catalog)
+                    if self.extract.is_streaming():
+                        # the data file is read and transformed chunk by chunk to not have it entirely in memory
+                        self.transform.run_on_chunks(data_chunks=self.extract.load_data_file_in_chunks())
+                    else:
+                        self.transform.run()
+                except Exception:
+                    if loader_pool is not None:
+                        # the batches of a failed file are not loaded, and the Transform error is the one reported
+                        loader_pool.abort()
+                    raise
+                if loader_pool is not None:
+                    # wait for the last batches to be loaded, this raises the loading errors (if any)
+                    loader_pool.close()
+            if self.config.get_load():
+                self.load = Load(database=self.database, config=self.config, create_indexes=create_indexes)
+                self.load.run()
+            return True
+        except Exception:
+            traceback.print_exc()  # print the stack trace
+            log.error("An error occurred during the ETL. Please check the complete log. ")
+            return False
+
+
+def ingest_file_in_worker(config: BetterConfig, one_file: str, file_index: int) -> tuple[bool, list[dict]]:
+    # the config is a copy of the one of the main process, thus we can change it for this file only
+    # the database has already been dropped (if asked) by the main process
+    config.set_db_drop(drop="False")
+    # each file has its own working folder, otherwise workers would overwrite each other's intermediate files
+    working_folder = os.path.join(config.get_working_dir_current(), "file-" + str(file_index))
+    os.makedirs(working_folder, exist_ok=True)
+    config.set_working_dir_current(working_dir_current=working_folder)
+
+    database = Database(config=config)
+    try:
+        etl = ETL(config=config, database=database)
+        etl.counter = Counter()
+        etl.counter.set_with_database(database=database)
+        etl.reference_resources_created = True
+        no_error = etl.ingest_file(one_file=one_file, create_indexes=False)
+        if len(database.write_errors) > 0:
+            log.error("%s upserts failed while ingesting file '%s'.", len(database.write_errors), one_file)
+            no_error = False
+        # the analysis of the file is given back to the main process, which stores it with the Execution
+        return no_error, etl.analysis_reports
+    finally:
+        database.close()
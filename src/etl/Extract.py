@@ -1,47 +1,94 @@
-import json
+import contextlib
+import locale
+import logging
+import multiprocessing
 import os
-import re
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator
 
 import pandas as pd
+from pandas import DataFrame
 
 from analysis.ValueAnalysis import ValueAnalysis
 from analysis.VariableAnalysis import VariableAnalysis
 from config.BetterConfig import BetterConfig
 from database.Database import Database
+from etl.MetadataCatalog import MetadataCatalog
 from utils.HospitalNames import HospitalNames
 from utils.MetadataColumns import MetadataColumns
 from utils.Ontologies import Ontologies
-from utils.constants import METADATA_VARIABLES
-from utils.setup_logger import log
-from utils.utils import is_not_nan, convert_value, get_values_from_json_values
+from utils.constants import METADATA_VARIABLES, CHUNK_ESTIMATION_NB_LINES, METADATA_CACHE_FOLDER, DTYPES_INFERENCE_NB_LINES, \
+    METADATA_CACHE_VERSION
+from utils.setup_logger import log, start_log_listener_in_worker
+from utils.utils import is_not_nan, convert_value, get_values_from_json_values, get_values_converter, \
+    parse_json_values, get_file_hash, get_hash, convert_int_values
 
 
 class Extract:
+    # the metadata files read in this process (with their JSON_values parsed), keyed by the hash of their content,
+    # because the same metadata file is used for each data file of a run
+    parsed_metadata_files = {}
 
     def __init__(self, database: Database, config: BetterConfig):
         self.metadata = None
+        self.metadata_catalog = None  # the metadata variables indexed by their name, see MetadataCatalog
         self.data = None
         self.mapped_values = {}  # accepted values for some categorical columns (column "JSON_values" in metadata)
+        self.mapped_codes = {}  # for each categorical column, the JSON CodeableConcept of each (casefolded) accepted value
         self.mapped_types = {}  # expected data type for columns (column "vartype" in metadata)
+        self.column_converters = {}  # the function converting the values of each typed column, see compute_column_converters()
+        self.analysed_data = None  # the data (or a sample of its rows) analysed when asked, see get_analysed_data()
+        self.analysis_report = None  # the results of the value and variable analyses, stored with the Execution
 
         self.config = config
         self.database = database
 
     def run(self) -> None:
-        self.load_metadata_file()
-        self.load_data_file()
-        self.compute_mapped_values()
-        self.compute_mapped_types()
+        if not self.load_compiled_metadata():
+            self.load_metadata_file()
+            self.compute_mapped_values()
+            self.compute_mapped_types()
+            self.save_compiled_metadata()
+        if self.is_streaming():
+            # the data file will be given chunk by chunk to the Transform step, see load_data_file_in_chunks()
+            self.data = None
+        else:
+            self.load_data_file()
+        self.compute_column_converters()
 
         if self.config.get_analysis():
-            self.run_value_analysis()
-            self.run_variable_analysis()
+            if self.is_streaming():
+                # we cannot have the whole data file in memory, thus we analyse its first chunk only
+                log.info("The data analysis will be computed on the first chunk of the data file.")
+                self.data = self.load_first_data_chunk()
+            if self.data is not None:
+                self.analysed_data = self.get_analysed_data()
+                # in the streaming mode, the number of rows of the whole file is not known
+                nb_rows_key = "nbRowsInFirstChunk" if self.is_streaming() else "nbRows"
+                self.analysis_report = {
+                    "file": self.config.get_current_filepath(),
+                    nb_rows_key: len(self.data),
+                    "nbAnalysedRows": len(self.analysed_data)
+                }
+                self.run_value_analysis()
+                self.run_variable_analysis()
+                self.analysed_data = None
+            if self.is_streaming():
+                # the first chunk is read again (and converted) with the other ones in the Transform step
+                self.data = None
+
+        if not self.is_streaming() and self.data is not None:
+            # the data chunks are converted when they are read, see load_data_file_in_chunks()
+            self.data = self.convert_columns(data=self.data)
+
+    def is_streaming(self) -> bool:
+        return self.config.get_chunk_size() > 0 or self.config.get_chunk_bytes() > 0
 
     def load_metadata_file(self) -> None:
         log.info("Metadata filepath is %s.", self.config.get_metadata_filepath())
 
-        # index_col is False to not add a column with line numbers
-        self.metadata = pd.read_csv(self.config.get_metadata_filepath(), index_col=False)
+        self.metadata = self.read_metadata_file()
 
         # For UC2 and UC3 metadata files, we need to keep only the variables for the current hospital
         # and remove the columns for other hospitals
@@ -54,7 +101,8 @@ class Extract:
         # For any metadata file, we need to keep only the variables that concern the current dataset
         filename = os.path.basename(self.config.get_data_filepaths()[0])
         log.debug(filename)
-        log.debug(self.metadata[MetadataColumns.DATASET_NAME.value].unique())
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(self.metadata[MetadataColumns.DATASET_NAME.value].unique())
         if filename not in self.metadata[MetadataColumns.DATASET_NAME.value].unique():
             log.error("The current dataset is not described in the provided metadata file.")
             exit()
@@ -70,26 +118,77 @@ class Extract:
         self.metadata[MetadataColumns.SEC_ONTOLOGY_SYSTEM.value] = self.metadata[MetadataColumns.SEC_ONTOLOGY_SYSTEM.value].apply(lambda value: str(value).replace(" ", ""))
         self.metadata[MetadataColumns.SEC_ONTOLOGY_CODE.value] = self.metadata[MetadataColumns.SEC_ONTOLOGY_CODE.value].apply(lambda value: str(value).replace(" ", ""))
 
-        # the non-NaN JSON_values values are of the form: "{...}, {...}, ..."
-        # thus, we need to
-        # 1. create an empty list
-        # 2. add each JSON dict of JSON_values in that list
-        # Note: we cannot simply add brackets around the dicts because it would add a string with the dicts in the list
-        # we cannot either use json.loads on row["JSON_values"] because it is not parsable (it lacks the brackets)
-        for index, row in self.metadata.iterrows():
-            if is_not_nan(row[MetadataColumns.JSON_VALUES.value]):
-                values_dicts = []
-                json_dicts = re.split('}, {', row[MetadataColumns.JSON_VALUES.value])
-                for json_dict in json_dicts:
-                    if not json_dict.startswith("{"):
-                        json_dict = "{" + json_dict
-                    if not json_dict.endswith("}"):
-                        json_dict = json_dict + "}"
-                    values_dicts.append(json.loads(json_dict))
-                self.metadata.loc[index, MetadataColumns.JSON_VALUES.value] = json.dumps(values_dicts)  # set the new JSON values as a string
-
+        # index the metadata once, instead of filtering the DataFrame each time a column is looked up
+        self.metadata_catalog = MetadataCatalog(metadata=self.metadata)
         log.info("%s columns and %s lines in the metadata file.", len(self.metadata.columns), len(self.metadata))
 
+    def read_metadata_file(self) -> DataFrame:
+        metadata_filepath = self.config.get_metadata_filepath()
+        metadata_hash = get_file_hash(filepath=metadata_filepath)
+        if metadata_hash not in Extract.parsed_metadata_files:
+            # index_col is False to not add a column with line numbers
+            metadata = pd.read_csv(metadata_filepath, index_col=False)
+            if MetadataColumns.JSON_VALUES.value in metadata.columns:
+                # the non-NaN JSON_values values are of the form: "{...}, {...}, ...", we parse them once as lists of dicts
+                metadata[MetadataColumns.JSON_VALUES.value] = metadata[MetadataColumns.JSON_VALUES.value].apply(
+                    lambda value: parse_json_values(json_values=value) if is_not_nan(value) else value)
+            Extract.parsed_metadata_files[metadata_hash] = metadata
+        else:
+            log.info("The metadata file has already been parsed in this process, it is reused.")
+        # the cached metadata is not modified by the preprocessing of the current file
+        return Extract.parsed_metadata_files[metadata_hash].copy()
+
+    def get_compiled_metadata_filepath(self) -> str:
+        # the compiled metadata depends on the content of the metadata file, the hospital, the dataset, the locale
+        # and the version of the compiled metadata, thus a new file is computed (and used) as soon as one of them changes
+        metadata_key = get_hash(value=[METADATA_CACHE_VERSION,
+                                       get_file_hash(filepath=self.config.get_metadata_filepath()),
+                                       self.config.get_hospital_name(),
+                                       os.path.basename(self.config.get_data_filepaths()[0]),
+                                       self.config.get_use_en_locale()])
+        return os.path.join(self.config.get_working_dir(), METADATA_CACHE_FOLDER, metadata_key + ".pickle")
+
+    def load_compiled_metadata(self) -> bool:
+        # get the metadata, its catalog and the mapped values and types computed by a previous run, if any
+        if not self.config.get_metadata_cache():
+            return False
+        compiled_metadata_filepath = self.get_compiled_metadata_filepath()
+        if not os.path.isfile(compiled_metadata_filepath):
+            return False
+        try:
+            with open(compiled_metadata_filepath, "rb") as compiled_metadata_file:
+                compiled_metadata = pickle.load(compiled_metadata_file)
+            self.metadata = compiled_metadata["metadata"]
+            self.metadata_catalog = compiled_metadata["metadata_catalog"]
+            self.mapped_values = compiled_metadata["mapped_values"]
+            self.mapped_codes = compiled_metadata["mapped_codes"]
+            self.mapped_types = compiled_metadata["mapped_types"]
+        except Exception as error:
+            # e.g., the file has been truncated or written by another version of the code, thus this is a cache miss
+            log.warning("The compiled metadata %s cannot be read, thus it is computed again: %s", compiled_metadata_filepath, error)
+            return False
+        log.info("The compiled metadata has been loaded from %s.", compiled_metadata_filepath)
+        return True
+
+    def save_compiled_metadata(self) -> None:
+        if not self.config.get_metadata_cache():
+            return
+        compiled_metadata_filepath = self.get_compiled_metadata_filepath()
+        os.makedirs(os.path.dirname(compiled_metadata_filepath), exist_ok=True)
+        compiled_metadata = {
+            "metadata": self.metadata,
+            "metadata_catalog": self.metadata_catalog,
+            "mapped_values": self.mapped_values,
+            "mapped_codes": self.mapped_codes,
+            "mapped_types": self.mapped_types
+        }
+        # write a temporary file first, so that concurrent runs never read a partially written file
+        tmp_filepath = compiled_metadata_filepath + "." + str(os.getpid()) + ".tmp"
+        with open(tmp_filepath, "wb") as compiled_metadata_file:
+            pickle.dump(compiled_metadata, compiled_metadata_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_filepath, compiled_metadata_filepath)
+        log.info("The compiled metadata has been saved in %s.", compiled_metadata_filepath)
+
     def preprocess_metadata_file(self) -> None:
         # 1. capitalize and replace spaces in column names
         self.metadata.rename(columns=lambda x: x.upper().replace(" ", "_"), inplace=True)
@@ -117,21 +216,89 @@ class Extract:
         log.info("Data filepath is %s.", self.config.get_current_filepath())
 
         # index_col is False to not add a column with line numbers
-        self.data = pd.read_csv(self.config.get_current_filepath(), index_col=False)
+        dtypes = self.read_data_dtypes()
+        self.data = pd.read_csv(self.config.get_current_filepath(), index_col=False, dtype=self.get_object_dtypes(dtypes=dtypes))
+        self.data = self.set_data_dtypes(data=self.data, dtypes=dtypes)
 
         # lower case all column names to avoid inconsistencies
         self.data.columns = self.data.columns.str.lower()
 
         log.info("%s columns and %s lines in the data file.", len(self.data.columns), len(self.data))
 
+    def load_data_header(self) -> None:
+        # only read the columns of the data file, e.g., to create Examination instances without reading the data itself
+        assert os.path.exists(self.config.get_current_filepath()), "The provided samples file could not be found. Please check the filepath you specify when running this script."
+        self.data = pd.read_csv(self.config.get_current_filepath(), index_col=False, nrows=0)
+        self.data.columns = self.data.columns.str.lower()
+
+    def load_first_data_chunk(self) -> DataFrame | None:
+        # the first chunk is not converted, as the whole data file when it is analysed in the non-streaming mode,
+        # and the data file is closed right after it has been read
+        with contextlib.closing(self.load_data_file_in_chunks(convert=False)) as data_chunks:
+            return next(data_chunks, None)
+
+    def load_data_file_in_chunks(self, convert: bool = True) -> Iterator[DataFrame]:
+        assert os.path.exists(self.config.get_current_filepath()), "The provided samples file could not be found. Please check the filepath you specify when running this script."
+
+        nb_lines_per_chunk = self.compute_nb_lines_per_chunk()
+        log.info("Data filepath is %s, it will be read by chunks of %s lines.", self.config.get_current_filepath(), nb_lines_per_chunk)
+
+        # index_col is False to not add a column with line numbers
+        dtypes = self.read_data_dtypes()
+        with pd.read_csv(self.config.get_current_filepath(), index_col=False, chunksize=nb_lines_per_chunk, dtype=self.get_object_dtypes(dtypes=dtypes)) as reader:
+            for data_chunk in reader:
+                data_chunk = self.set_data_dtypes(data=data_chunk, dtypes=dtypes)
+                # lower case all column names to avoid inconsistencies
+                data_chunk.columns = data_chunk.columns.str.lower()
+                yield self.convert_columns(data=data_chunk) if convert else data_chunk
+
+    def read_data_dtypes(self) -> dict:
+        # pandas infers the type of each column from the lines it reads, thus a column may be int in a chunk and float
+        # in another one (e.g., when the latter has NaN values), and its values would depend on the chunk size
+        # instead, the types are inferred once on the first lines, and each chunk (or the whole file) is given them
+        first_lines = pd.read_csv(self.config.get_current_filepath(), index_col=False, nrows=DTYPES_INFERENCE_NB_LINES)
+        return first_lines.dtypes.to_dict()
+
+    @classmethod
+    def get_object_dtypes(cls, dtypes: dict) -> dict:
+        # the columns with strings in their first lines are read as strings, even when a chunk only has numbers
+        return {column_name: object for column_name, dtype in dtypes.items() if dtype == object}
+
+    @classmethod
+    def set_data_dtypes(cls, data: DataFrame, dtypes: dict) -> DataFrame:
+        # each value is converted on its own (e.g., 3.0 to 3 in an int column having NaN values, but not 3.5),
+        # thus it does not depend on the other values of its chunk
+        for column_name, dtype in dtypes.items():
+            if column_name in data.columns and data[column_name].dtype != dtype:
+                if pd.api.types.is_integer_dtype(dtype):
+                    data[column_name] = convert_int_values(values=data[column_name])
+                elif pd.api.types.is_float_dtype(dtype):
+                    numeric_values = pd.to_numeric(data[column_name], errors="coerce")
+                    data[column_name] = numeric_values.astype(object).where(numeric_values.notna(), data[column_name]) if data[column_name].dtype == object else numeric_values
+        return data
+
+    def compute_nb_lines_per_chunk(self) -> int:
+        nb_lines_per_chunk = self.config.get_chunk_size()
+        if self.config.get_chunk_bytes() > 0:
+            # we estimate the memory size of a line using the first lines of the data file
+            first_lines = pd.read_csv(self.config.get_current_filepath(), index_col=False, nrows=CHUNK_ESTIMATION_NB_LINES)
+            if len(first_lines) > 0:
+                nb_bytes_per_line = first_lines.memory_usage(index=False, deep=True).sum() / len(first_lines)
+                nb_lines_for_bytes = max(1, int(self.config.get_chunk_bytes() // nb_bytes_per_line))
+                log.debug("A data line takes %s bytes in memory, thus a chunk has at most %s lines", nb_bytes_per_line, nb_lines_for_bytes)
+                if nb_lines_per_chunk == 0 or nb_lines_for_bytes < nb_lines_per_chunk:
+                    nb_lines_per_chunk = nb_lines_for_bytes
+        return max(1, nb_lines_per_chunk)
+
     def compute_mapped_values(self) -> None:
         self.mapped_values = {}
 
-        for index, row in self.metadata.iterrows():
-            if is_not_nan(row[MetadataColumns.JSON_VALUES.value]):
-                current_dicts = json.loads(row[MetadataColumns.JSON_VALUES.value])
+        for variable in self.metadata_catalog.variables:
+            if is_not_nan(variable["json_values"]):
                 parsed_dicts = []
-                for current_dict in current_dicts:
+                for json_dict in variable["json_values"]:
+                    # the parsed JSON values are shared by all the files using that metadata, thus we work on a copy
+                    current_dict = dict(json_dict)
                     # if we can convert the JSON value to a float or an int, we do it, otherwise we let it as a string
                     current_dict["value"] = convert_value(value=current_dict["value"])
                     # if we can also convert the snomed_ct / loinc code, we do it
@@ -141,47 +308,86 @@ class Extract:
                     if Ontologies.LOINC.value["name"] in current_dict:
                         current_dict[Ontologies.LOINC.value["name"]] = convert_value(value=current_dict[Ontologies.LOINC.value])
                     parsed_dicts.append(current_dict)
-                self.mapped_values[row["name"]] = parsed_dicts
+                self.mapped_values[variable["name"]] = parsed_dicts
         log.debug(self.mapped_values)
+        self.mapped_codes = MetadataCatalog.get_mapped_codes(mapped_values=self.mapped_values)
 
     def compute_mapped_types(self) -> None:
-        self.mapped_types = {}
-
-        for index, row in self.metadata.iterrows():
-            if is_not_nan(row[MetadataColumns.VAR_TYPE.value]):
-                # we associate the column name to its expected type
-                self.mapped_types[row[MetadataColumns.COLUMN_NAME.value]] = row[MetadataColumns.VAR_TYPE.value]
+        # we associate each column name to its expected type
+        self.mapped_types = self.metadata_catalog.get_var_types()
         log.debug(self.mapped_types)
 
+    def compute_column_converters(self) -> None:
+        # build, once per column, the function converting the values of that column to its expected type
+        self.column_converters = {}
+        if self.config.get_convert_columns():
+            for column_name, var_type in self.mapped_types.items():
+                converter = get_values_converter(var_type=var_type)
+                if converter is not None:
+                    self.column_converters[column_name] = converter
+        log.debug(self.column_converters)
+
+    def convert_columns(self, data: DataFrame) -> DataFrame:
+        # convert whole columns at once, instead of guessing the type of each cell in the Transform step
+        for column_name, converter in self.column_converters.items():
+            if column_name in data.columns:
+                data[column_name] = converter(data[column_name])
+        return data
+
     def run_value_analysis(self) -> None:
         log.debug(self.mapped_values)
         # for each column in the sample data (and not in the metadata because some (empty) data columns are not
         # present in the metadata file), we compare the set of values it takes against the accepted set of values
         # (available in the mapped_values variable)
-        for column in self.data.columns:
-            values = pd.Series(self.data[column].values)
-            values = values.apply(lambda value: value.casefold().strip() if isinstance(value, str) else value)
-            # log.debug("Values are: %s", values)
-            # log.debug(self.metadata["name"])
-            # log.info("Working on column '%s'", column)
-            # trying to get the expected type of the current column
-            if column in self.mapped_types:
-                expected_type = self.mapped_types[column]
-            else:
-                expected_type = ""
-            # trying to get expected values for the current column
-            if column in self.mapped_values:
-                # self.mapped_values[column] contains the mappings (JSON dicts) for the given column
-                # we need to get only the set of values described in the mappings of the given column
-                accepted_values = get_values_from_json_values(json_values=self.mapped_values[column])
-            else:
-                accepted_values = []
-            value_analysis = ValueAnalysis(column_name=column, values=values, expected_type=expected_type, accepted_values=accepted_values)
-            value_analysis.run_analysis()
-            if value_analysis.nb_unrecognized_data_types > 0 or (0 < value_analysis.ratio_non_empty_values_matching_accepted < 1):
-                log.info("%s: %s", column, value_analysis)
+        columns = self.analysed_data.columns.to_list()
+        columns_values = [pd.Series(self.analysed_data[column].values) for column in columns]
+        # trying to get the expected type of the current column
+        expected_types = [self.mapped_types[column] if column in self.mapped_types else "" for column in columns]
+        # trying to get expected values for the current column
+        # self.mapped_values[column] contains the mappings (JSON dicts) for the given column
+        # we need to get only the set of values described in the mappings of the given column
+        columns_accepted_values = [get_values_from_json_values(json_values=self.mapped_values[column]) if column in self.mapped_values else [] for column in columns]
+        # the numbers written as strings are parsed with the current locale, which the workers may not have
+        numeric_locale = locale.setlocale(locale.LC_NUMERIC)
+        nb_workers = min(self.config.get_analysis_nb_processes(), len(columns))
+        if nb_workers > 1:
+            # columns are analysed independently, thus they are distributed across worker processes
+            log.info("The %s data columns are analysed by %s worker processes", len(columns), nb_workers)
+            # workers are spawned (and not forked), see ETL.run_in_parallel()
+            with ProcessPoolExecutor(max_workers=nb_workers, mp_context=multiprocessing.get_context("spawn"),
+                                     initializer=start_log_listener_in_worker,
+                                     initargs=(self.config.get_log_level(), self.config.get_subsystem_log_levels())) as executor:
+                value_analyses = list(executor.map(analyse_column_in_worker, columns, columns_values, expected_types,
+                                                   columns_accepted_values, [numeric_locale] * len(columns),
+                                                   chunksize=max(1, len(columns) // (4 * nb_workers))))
+        else:
+            value_analyses = list(map(analyse_column_in_worker, columns, columns_values, expected_types,
+                                      columns_accepted_values, [numeric_locale] * len(columns)))
+        self.analysis_report["values"] = value_analyses
 
     def run_variable_analysis(self) -> None:
-        variable_analysis = VariableAnalysis(samples=self.data, metadata=self.metadata)
+        variable_analysis = VariableAnalysis(samples=self.analysed_data, metadata_catalog=self.metadata_catalog)
         variable_analysis.run_analysis()
         log.info(variable_analysis)
+        self.analysis_report["variables"] = variable_analysis.to_json()
+
+    def get_analysed_data(self) -> DataFrame:
+        # the rows of large data files are sampled (the same for all columns) to bound the time of the analysis
+        sample_size = self.config.get_analysis_sample_size()
+        if 0 < sample_size < len(self.data):
+            log.info("The data analysis will be computed on %s rows sampled out of %s.", sample_size, len(self.data))
+            return self.data.sample(n=sample_size, random_state=0)
+        return self.data
+
+
+def analyse_column_in_worker(column: str, values: pd.Series, expected_type: str, accepted_values: list, numeric_locale: str) -> dict:
+    # this runs in the main process or in a worker process, thus the locale is set for the latter
+    if locale.setlocale(locale.LC_NUMERIC) != numeric_locale:
+        locale.setlocale(locale.LC_NUMERIC, numeric_locale)
+    values = values.apply(lambda value: value.casefold().strip() if isinstance(value, str) else value)
+    value_analysis = ValueAnalysis(column_name=column, values=values, expected_type=expected_type, accepted_values=accepted_values)
+    value_analysis.run_analysis()
+    if value_analysis.nb_unrecognized_data_types > 0 or (0 < value_analysis.ratio_non_empty_values_matching_accepted < 1):
+        log.info("%s: %s", column, value_analysis)
+    # column names are not used as keys because they may contain dots, which MongoDB does not accept in keys
+    return {"column": column, **value_analysis.to_json()}
@@ -3,6 +3,7 @@ import traceback
 from config.BetterConfig import BetterConfig
 from database.Database import Database
 from utils.TableNames import TableNames
+from utils.constants import UNIQUE_VARIABLES
 from utils.setup_logger import log
 
 
@@ -16,11 +17,15 @@ class Load:
         # Insert resources that have not been inserted yet, i.e.,
         # anything else than Hospital, Examination and Disease instances
         log.debug("in the Load class")
-        self.database.load_json_in_table(table_name=TableNames.PATIENT.value, unique_variables=["identifier"])
+        if self.config.get_direct_load():
+            # resources have already been upserted by the Transform step, files (if any) are only kept for debug
+            log.info("Resources have been loaded during the Transform step.")
+        else:
+            self.database.load_json_in_table(table_name=TableNames.PATIENT.value, unique_variables=UNIQUE_VARIABLES[TableNames.PATIENT.value])
 
-        self.database.load_json_in_table(table_name=TableNames.EXAMINATION_RECORD.value, unique_variables=["recordedBy", "subject", "basedOn", "instantiate"])
+            self.database.load_json_in_table(table_name=TableNames.EXAMINATION_RECORD.value, unique_variables=UNIQUE_VARIABLES[TableNames.EXAMINATION_RECORD.value])
 
-        self.database.load_json_in_table(table_name=TableNames.SAMPLE.value, unique_variables=["identifier"])
+            self.database.load_json_in_table(table_name=TableNames.SAMPLE.value, unique_variables=UNIQUE_VARIABLES[TableNames.SAMPLE.value])
 
         # if everything has been loaded, we can create indexes
         if self.create_indexes and not self.config.get_no_index():
@@ -33,10 +38,13 @@ class Load:
         for table_name in TableNames:
             self.database.create_unique_index(table_name=table_name.value, columns={"identifier.value": 1})
             self.database.create_non_unique_index(table_name=table_name.value, columns={"createdAt": 1})
+            # the number of identifiers assigned by the FAIRificator, to get the max one without a scan
+            self.database.create_non_unique_index(table_name=table_name.value, columns={"identifierNumber": 1})
         # 2. next, we also create resource-wise indexes
         # for Examination instances, we create an index both on the ontology (system) and a code
         # this is because we usually ask for a code for a given ontology (what is a coe without its ontology? nothing)
         self.database.create_non_unique_index(table_name=TableNames.EXAMINATION.value, columns={"code.coding.system": 1, "code.coding.code": 1})
+        # (the indexes on the names of Hospital and Examination instances are created before the ingestion, see ETL.run())
         # for ExaminationRecord instances, we create an index per reference because we usually join each reference to a table
         self.database.create_non_unique_index(table_name=TableNames.EXAMINATION_RECORD.value, columns={"instantiate.reference": 1})
         self.database.create_non_unique_index(table_name=TableNames.EXAMINATION_RECORD.value, columns={"subject.reference": 1})
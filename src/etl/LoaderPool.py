@@ -0,0 +1,113 @@
+import queue
+import threading
+
+from database.Database import Database
+from utils.setup_logger import log
+
+
+class LoaderPool:
+    """
+    The class LoaderPool represents a pool of threads upserting batches of resources in the database while the
+    Transform step creates the next batches. Batches go through a bounded queue: when it is full, the Transform step
+    waits for the loaders to catch up (backpressure) instead of accumulating resources in memory.
+    """
+
+    def __init__(self, database: Database, nb_loaders: int, queue_size: int):
+        """
+        Start the loader threads.
+        :param database: A Database instance in which the batches will be upserted.
+        :param nb_loaders: An integer being the number of threads upserting batches.
+        :param queue_size: An integer being the maximum number of batches waiting to be upserted.
+        """
+        self.database = database
+        self.batches = queue.Queue(maxsize=max(1, queue_size))
+        self.errors = []  # the exceptions raised by the loader threads
+        self.errors_lock = threading.Lock()
+        self.aborted = threading.Event()  # set when the remaining batches should not be loaded, see abort()
+        self.loaders = []
+        for i in range(max(1, nb_loaders)):
+            loader = threading.Thread(target=self.load_batches, name="loader-" + str(i), daemon=True)
+            loader.start()
+            self.loaders.append(loader)
+        log.info("%s loader threads have been started.", len(self.loaders))
+
+    def submit(self, data_array: list, table_name: str) -> None:
+        """
+        Give a batch of resources to the loader threads. This blocks while the queue is full.
+        :param data_array: A list of resources to be upserted in the given table.
+        :param table_name: A string being the table name in which the resources will be upserted.
+        :return: Nothing. Raise the first error of the loader threads, if any.
+        """
+        self.raise_error_if_any()
+        self.batches.put((data_array, table_name))
+
+    def wait(self) -> None:
+        """
+        Wait until all the submitted batches have been upserted, e.g., before reading them back from the database.
+        :return: Nothing. Raise the first error of the loader threads, if any.
+        """
+        self.batches.join()
+        self.raise_error_if_any()
+
+    def close(self) -> None:
+        """
+        Wait until all the submitted batches have been upserted and stop the loader threads.
+        :return: Nothing. Raise the first error of the loader threads, if any.
+        """
+        for _ in self.loaders:
+            self.batches.put(None)  # one stop signal per loader
+        for loader in self.loaders:
+            loader.join()
+        log.info("All loader threads have been stopped.")
+        self.raise_error_if_any()
+
+    def abort(self) -> None:
+        """
+        Stop the loader threads without loading the batches that are still in the queue, e.g., when the Transform step
+        has failed. The loading errors are logged, and not raised, to not hide the error that caused the abort.
+        :return: Nothing.
+        """
+        self.aborted.set()
+        try:
+            while True:
+                self.batches.get_nowait()
+                self.batches.task_done()
+        except queue.Empty:
+            pass
+        for _ in self.loaders:
+            self.batches.put(None)  # one stop signal per loader
+        for loader in self.loaders:
+            loader.join()
+        with self.errors_lock:
+            for error in self.errors:
+                log.error("A loader thread had stopped loading before the abort: %s", error)
+        log.info("All loader threads have been stopped without loading the remaining batches.")
+
+    def load_batches(self) -> None:
+        while True:
+            batch = self.batches.get()
+            try:
+                if batch is None:
+                    return
+                if not self.has_failed() and not self.aborted.is_set():
+                    data_array, table_name = batch
+                    self.database.write_in_table(data_array=data_array, table_name=table_name)
+                else:
+                    # once a batch could not be loaded (or the pool is aborted), we stop loading (but we still empty
+                    # the queue, otherwise the Transform step would wait forever for some space in it)
+                    pass
+            except Exception as error:
+                log.error("A batch could not be loaded in %s: %s", batch[1], error)
+                with self.errors_lock:
+                    self.errors.append(error)
+            finally:
+                self.batches.task_done()
+
+    def has_failed(self) -> bool:
+        with self.errors_lock:
+            return len(self.errors) > 0
+
+    def raise_error_if_any(self) -> None:
+        with self.errors_lock:
+            if len(self.errors) > 0:
+                raise self.errors[0]
@@ -0,0 +1,128 @@
+from typing import Any
+
+from pandas import DataFrame
+
+from datatypes.CodeableConcept import CodeableConcept
+from profiles.Examination import Examination
+from utils.MetadataColumns import MetadataColumns
+from utils.setup_logger import log
+from utils.utils import is_not_nan, get_ontology_system, normalize_value
+
+
+class MetadataCatalog:
+    """
+    The class MetadataCatalog gives access to the metadata variables by their (lower-cased) name, instead of filtering
+    the metadata DataFrame for each column. It is built once per metadata file, and ontology systems, codes and labels
+    are computed when it is built.
+    """
+
+    def __init__(self, metadata: DataFrame):
+        """
+        Build the catalog of the given metadata.
+        :param metadata: A DataFrame being the metadata of the current dataset, with lower-cased variable names.
+        """
+        self.variables = []  # one dict per metadata row (a variable may be described several times)
+        self.variables_by_name = {}  # map each variable name to the list of its dicts in variables
+        for row in metadata.to_dict(orient="records"):
+            variable = {
+                "name": row[MetadataColumns.COLUMN_NAME.value],
+                "var_type": row.get(MetadataColumns.VAR_TYPE.value),
+                "json_values": row.get(MetadataColumns.JSON_VALUES.value),
+                "codings": [],
+                "error": None
+            }
+            try:
+                for ontology_column, code_column in [(MetadataColumns.FIRST_ONTOLOGY_SYSTEM.value, MetadataColumns.FIRST_ONTOLOGY_CODE.value),
+                                                     (MetadataColumns.SEC_ONTOLOGY_SYSTEM.value, MetadataColumns.SEC_ONTOLOGY_CODE.value)]:
+                    coding = MetadataCatalog.get_coding(row=row, ontology_column=ontology_column, code_column=code_column)
+                    if coding is not None:
+                        variable["codings"].append(coding)
+            except Exception as error:
+                # this is raised when the variable is asked, as it would have been without the catalog
+                variable["error"] = error
+            self.variables.append(variable)
+            self.variables_by_name.setdefault(str(variable["name"]).lower(), []).append(variable)
+
+    @classmethod
+    def get_coding(cls, row: dict, ontology_column: str, code_column: str) -> tuple | None:
+        ontology = row[ontology_column]
+        if not is_not_nan(value=ontology):
+            # no ontology code has been provided for that variable name, let's skip it
+            return None
+        else:
+            ontology = get_ontology_system(ontology=ontology)  # get the URI of the ontology system instead of its string name
+            code = normalize_value(input_string=row[code_column])  # get the ontology code in the metadata for the given column and normalize it (just in case)
+            display = Examination.get_label(row=row)
+            return str(ontology), str(code), str(display)
+
+    @classmethod
+    def get_mapped_value_key(cls, value: Any) -> Any:
+        # mapped values are compared case-insensitively (see is_equal_insensitive)
+        return value.casefold() if isinstance(value, str) else value
+
+    @classmethod
+    def get_codeable_concept_from_mapping(cls, mapping: dict) -> CodeableConcept:
+        # recall that a mapping is of the form: {'value': 'X', 'explanation': '...', 'snomed_ct': '123', 'loinc': '456' }
+        # we create a CodeableConcept with each code added to the mapping, e.g., snomed_ct and loinc
+        cc = CodeableConcept()
+        for key, val in mapping.items():
+            # for any key value pair that is not about the value or the explanation
+            # (i.e., loinc and snomed_ct columns), we create a Coding, which we add to the CodeableConcept
+            # we need to do a loop because there may be several ontology terms for a single mapping
+            if key != 'value' and key != 'explanation':
+                system = get_ontology_system(ontology=key)
+                code = normalize_value(input_string=val)
+                display = mapping['explanation']
+                cc.add_coding(triple=(system, code, display))
+        return cc
+
+    @classmethod
+    def get_mapped_codes(cls, mapped_values: dict) -> dict:
+        # index the mappings of each column by their (casefolded) value, each value being associated to the JSON
+        # representation of its CodeableConcept, thus fairifying a categorical value is a single lookup
+        mapped_codes = {}
+        for column_name, mappings in mapped_values.items():
+            column_codes = {}
+            for mapping in mappings:
+                key = MetadataCatalog.get_mapped_value_key(value=mapping['value'])
+                if key not in column_codes:
+                    # when several mappings have the same value, the first one is used
+                    try:
+                        column_codes[key] = MetadataCatalog.get_codeable_concept_from_mapping(mapping=mapping).to_json()
+                    except Exception as error:
+                        # the values of this mapping will not be coded, they will only be normalized
+                        log.error("The mapping %s of column %s could not be converted to a CodeableConcept: %s", mapping, column_name, error)
+            mapped_codes[column_name] = column_codes
+        return mapped_codes
+
+    def get_variable(self, column_name: str) -> dict | None:
+        """
+        Get the metadata variable describing the given column.
+        :param column_name: A string being the name of a data column.
+        :return: A dict being the variable, or None if the column is not described exactly once in the metadata.
+        """
+        variables = self.variables_by_name.get(column_name.lower(), [])
+        if len(variables) == 1:
+            return variables[0]
+        else:
+            # either the column is not described in the metadata, or it is described several times
+            return None
+
+    def get_codeable_concept(self, column_name: str) -> CodeableConcept | None:
+        variable = self.get_variable(column_name=column_name)
+        if variable is None:
+            return None
+        if variable["error"] is not None:
+            raise variable["error"]
+        cc = CodeableConcept()
+        for coding in variable["codings"]:
+            cc.add_coding(triple=coding)
+        cc.text = variable["name"]  # the column name (display inside codings will have name+description)
+        return cc
+
+    def get_var_types(self) -> dict:
+        # map each variable name to its expected type (column "vartype" in metadata)
+        return {variable["name"]: variable["var_type"] for variable in self.variables if is_not_nan(variable["var_type"])}
+
+    def get_names(self) -> list[str]:
+        return [variable["name"] for variable in self.variables]
@@ -1,46 +1,67 @@
 from datetime import datetime
+from typing import Iterator
 
-from pandas import DataFrame
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
 
 from config.BetterConfig import BetterConfig
 from database.Database import Database
 from datatypes.CodeableConcept import CodeableConcept
 from datatypes.Identifier import Identifier
 from datatypes.Reference import Reference
+from etl.LoaderPool import LoaderPool
+from etl.MetadataCatalog import MetadataCatalog
 from profiles.Examination import Examination
 from profiles.ExaminationRecord import ExaminationRecord
 from profiles.Hospital import Hospital
 from profiles.Patient import Patient
+from profiles.Resource import Resource
 from profiles.Sample import Sample
 from utils.Counter import Counter
 from utils.ExaminationCategory import ExaminationCategory
 from utils.HospitalNames import HospitalNames
+from utils.MemoCache import MemoCache
 from utils.MetadataColumns import MetadataColumns
 from utils.TableNames import TableNames
-from utils.constants import NONE_VALUE, NO_EXAMINATION_COLUMNS, BATCH_SIZE, ID_COLUMNS, PHENOTYPIC_VARIABLES
+from utils.constants import NONE_VALUE, NO_EXAMINATION_COLUMNS, ID_COLUMNS, PHENOTYPIC_VARIABLES, \
+    UNIQUE_VARIABLES
 from utils.setup_logger import log
-from utils.utils import is_in_insensitive, is_not_nan, convert_value, get_ontology_system, normalize_value, \
-    is_equal_insensitive
+from utils.utils import is_in_insensitive, is_not_nan, convert_value, \
+    is_equal_insensitive, get_not_empty_mask
 
 
 class Transform:
 
-    def __init__(self, database: Database, config: BetterConfig, data: DataFrame, metadata: DataFrame, mapped_values: dict):
+    def __init__(self, database: Database, config: BetterConfig, data: DataFrame, metadata: DataFrame, mapped_values: dict,
+                 loader_pool: LoaderPool = None, counter: Counter = None, reference_resources_created: bool = False,
+                 converted_columns: set = None, mapped_codes: dict = None, metadata_catalog: MetadataCatalog = None):
         self.database = database
         self.config = config
-        self.counter = Counter()
+        self.counter = counter if counter is not None else Counter()
+        self.loader_pool = loader_pool  # when given, batches of resources are loaded by it (pipelined mode)
+        # when Hospital and Examination instances have already been created (e.g., by the main process when files are
+        # ingested in parallel), we only need to retrieve their identifiers
+        self.reference_resources_created = reference_resources_created
+        self.batch_size = self.config.get_batch_size()  # the number of resources saved at once (in a file or in the database)
 
         # get data, metadata and the mapped values computed in the Extract step
         self.data = data
         self.metadata = metadata
+        # the metadata indexed by variable name, computed in the Extract step (or here when it is not given)
+        if metadata_catalog is None and metadata is not None:
+            metadata_catalog = MetadataCatalog(metadata=metadata)
+        self.metadata_catalog = metadata_catalog
         self.mapped_values = mapped_values
+        # the index of mapped_values, computed in the Extract step (or here when it is not given)
+        self.mapped_codes = mapped_codes if mapped_codes is not None else MetadataCatalog.get_mapped_codes(mapped_values=mapped_values)
+        # the columns whose values have already been converted to their expected type in the Extract step
+        self.converted_columns = converted_columns if converted_columns is not None else set()
 
         # to record objects that will be further inserted in the database
+        # (Sample, Patient and ExaminationRecord instances are saved by batches, see create_data_resources())
         self.hospitals = []
-        self.patients = []
         self.examinations = []
-        self.examination_records = []
-        self.samples = []
 
         # to keep track off what is in the CSV and which objects (their identifiers) have been created out of it
         # this will also allow us to get resource identifiers of the referred resources
@@ -48,31 +69,82 @@ class Transform:
         self.mapping_column_to_examination_id = {}  # map the column names to their Examination IDs
         self.mapping_disease_to_disease_id = {}  # map the disease names to their Disease IDs
 
+        # when the data is given chunk by chunk, we need to remember what has been created in the previous chunks
+        self.created_patient_ids = set()
+        self.created_sample_barcodes = set()
+        self.file_counts = {}  # map the table names to the number of the next file to write
+
+        # the fairified values of the cells, per column, because the same values are repeated many times
+        self.value_cache = MemoCache(max_size=self.config.get_value_cache_size())
+
     def run(self) -> None:
-        self.set_resource_counter_id()
-        self.create_hospital(hospital_name=self.config.get_hospital_name())
-        self.database.load_json_in_table(table_name=TableNames.HOSPITAL.value, unique_variables=["name"])
-        log.info("Hospital count: %s", self.database.count_documents(table_name=TableNames.HOSPITAL.value, filter_dict={}))
-        self.create_examinations()
-        self.database.load_json_in_table(table_name=TableNames.EXAMINATION.value, unique_variables=["code"])
-        log.info("Examination count: %s", self.database.count_documents(table_name=TableNames.EXAMINATION.value, filter_dict={}))
-        self.create_samples()
-        self.create_patients()
-        self.create_examination_records()
+        self.create_reference_resources()
+        self.create_data_resources()
+
+    def run_on_chunks(self, data_chunks: Iterator[DataFrame]) -> None:
+        # the data file is given chunk by chunk (streaming mode), thus only one chunk is in memory at a time
+        # Hospital and Examination instances are created once, using the first chunk to know the data columns
+        nb_chunks = 0
+        for data_chunk in data_chunks:
+            self.data = data_chunk
+            if nb_chunks == 0:
+                self.create_reference_resources()
+            self.create_data_resources()
+            nb_chunks = nb_chunks + 1
+            log.info("Chunk %s has been transformed (%s lines).", nb_chunks, len(data_chunk))
+
+    def create_reference_resources(self) -> None:
+        # create the resources that are referred to by the ones created from the data,
+        # and load them right away so that we can get their identifiers
+        if not self.config.get_direct_load() or self.config.get_debug_files():
+            self.database.clear_intermediate_files()
+        if not self.reference_resources_created:
+            self.set_resource_counter_id()
+            self.create_hospital(hospital_name=self.config.get_hospital_name())
+            self.load_reference_table(table_name=TableNames.HOSPITAL.value)
+            log.info("Hospital count: %s", self.database.count_documents(table_name=TableNames.HOSPITAL.value, filter_dict={}))
+            self.create_examinations()
+            self.load_reference_table(table_name=TableNames.EXAMINATION.value)
+            log.info("Examination count: %s", self.database.count_documents(table_name=TableNames.EXAMINATION.value, filter_dict={}))
+        self.retrieve_reference_identifiers()
+
+    def create_data_resources(self) -> None:
+        # Sample, Patient and ExaminationRecord instances are created in a single pass over the data,
+        # either row by row or column-wise
+        log.info("create sample, patient and examination record instances in memory")
+        if self.config.get_columnar_transform():
+            new_resources = self.generate_data_resources_columnar()
+        else:
+            new_resources = self.generate_data_resources_row_wise()
+        batches = {TableNames.SAMPLE.value: [], TableNames.PATIENT.value: [], TableNames.EXAMINATION_RECORD.value: []}
+        for table_name, new_resource in new_resources:
+            batches[table_name].append(new_resource)
+            if len(batches[table_name]) >= self.batch_size:
+                self.save_resources(data_array=batches[table_name], table_name=table_name)
+                # no need to load these instances: samples and patients are referenced using the ID provided
+                # by the hospital, and examination records are never referenced
+                batches[table_name] = []
+
+        # save the remaining tuples that have not been saved (because there were less than batch_size tuples before the loop ends).
+        for table_name, batch in batches.items():
+            self.save_resources(data_array=batch, table_name=table_name)
+        self.value_cache.log_stats()
 
     def set_resource_counter_id(self) -> None:
-        self.counter.set_with_database(database=self.database)
+        if self.counter.identifier_allocator is None:
+            # a counter which is already set with the database (e.g., given by the ETL) keeps its current block of IDs
+            self.counter.set_with_database(database=self.database)
 
     def create_hospital(self, hospital_name: str) -> None:
         log.info("create hospital instance in memory")
         new_hospital = Hospital(id_value=NONE_VALUE, name=hospital_name, counter=self.counter)
         self.hospitals.append(new_hospital)
-        self.database.write_in_file(data_array=self.hospitals, table_name=TableNames.HOSPITAL.value, count=1)
+        self.save_resources(data_array=self.hospitals, table_name=TableNames.HOSPITAL.value)
+        self.hospitals = []
 
     def create_examinations(self) -> None:
         log.info("create examination instances in memory")
         columns = self.data.columns.values.tolist()
-        count = 1
         for column_name in columns:
             lower_column_name = column_name.lower()
             if lower_column_name not in NO_EXAMINATION_COLUMNS:
@@ -82,69 +154,70 @@ class Transform:
                     new_examination = Examination(id_value=NONE_VALUE, code=cc, category=category, permitted_data_types=[], counter=self.counter)
                     # log.info("adding a new examination about %s: %s", cc.text, new_examination)
                     self.examinations.append(new_examination)
-                    if len(self.examinations) >= BATCH_SIZE:
-                        self.database.write_in_file(data_array=self.examinations, table_name=TableNames.EXAMINATION.value, count=count)
+                    if len(self.examinations) >= self.batch_size:
+                        self.save_resources(data_array=self.examinations, table_name=TableNames.EXAMINATION.value)
                         self.examinations = []
-                        count = count + 1
                 else:
                     # This should never happen as all variables will end up to have a code
                     # TODO Nelly: this is not true: TooYoung, AnswerIX and BIS have no ontology code as of today (May, 29th 2024)
                     pass
             else:
                 log.debug("I am skipping column %s because it has been marked as not being part of examination instances.", lower_column_name)
-        # save the remaining tuples that have not been saved (because there were less than BATCH_SIZE tuples before the loop ends).
-        self.database.write_in_file(data_array=self.examinations, table_name=TableNames.EXAMINATION.value, count=count)
-
-    def create_samples(self) -> None:
-        if is_in_insensitive(value=ID_COLUMNS[HospitalNames.IT_BUZZI_UC1.value][TableNames.SAMPLE.value], list_of_compared=self.data.columns):
-            # this is a dataset with samples
-            log.info("create sample instances in memory")
-            created_sample_barcodes = set()
-            count = 1
-            for index, row in self.data.iterrows():
-                for column_name, value in row.items():
-                    if value is None or value == "" or not is_not_nan(value):
-                        # there is no value for that (sample) column, thus we skip it
-                        pass
-                    else:
-                        sample_barcode = row["samplebarcode"]
-                        if sample_barcode not in created_sample_barcodes:
-                            created_sample_barcodes.add(sample_barcode)
-                            # TODO Nelly: write a for loop based on SAMPLE_VARIABLES, instead of writing it by hand?
-                            sampling = row["sampling"] if "sampling" in row else None
-                            sample_quality = row["samplequality"] if "samplequality" in row else None
-                            time_collected = convert_value(value=row["samtimecollected"]) if "samtimecollected" in row else None
-                            time_received = convert_value(value=row["samtimereceived"]) if "samtimereceived" in row else None
-                            too_young = convert_value(value=row["tooyoung"]) if "tooyoung" in row else None
-                            bis = convert_value(value=row["bis"]) if "bis" in row else None
-                            new_sample = Sample(sample_barcode, sampling=sampling, quality=sample_quality,
-                                                time_collected=time_collected, time_received=time_received,
-                                                too_young=too_young, bis=bis, counter=self.counter)
-                            created_sample_barcodes.add(sample_barcode)
-                            self.samples.append(new_sample)
-                            if len(self.samples) >= BATCH_SIZE:
-                                self.database.write_in_file(data_array=self.samples, table_name=TableNames.SAMPLE.value, count=count)
-                                self.samples = []
-                                count = count + 1
-                                # no need to load Sample instances because they are referenced using their ID,
-                                # which was provided by the hospital (thus is known by the dataset)
-            self.database.write_in_file(data_array=self.samples, table_name=TableNames.SAMPLE.value, count=count)
-
-    def create_examination_records(self) -> None:
-        log.info("create examination record instances in memory")
-
-        # a. load some data from the database to compute references
+        # save the remaining tuples that have not been saved (because there were less than batch_size tuples before the loop ends).
+        self.save_resources(data_array=self.examinations, table_name=TableNames.EXAMINATION.value)
+        self.examinations = []
+
+    def has_samples(self) -> bool:
+        return is_in_insensitive(value=ID_COLUMNS[HospitalNames.IT_BUZZI_UC1.value][TableNames.SAMPLE.value], list_of_compared=self.data.columns)
+
+    def create_sample(self, row: Series) -> Sample:
+        # TODO Nelly: write a for loop based on SAMPLE_VARIABLES, instead of writing it by hand?
+        sample_barcode = row["samplebarcode"]
+        sampling = row["sampling"] if "sampling" in row else None
+        sample_quality = row["samplequality"] if "samplequality" in row else None
+        time_collected = convert_value(value=row["samtimecollected"]) if "samtimecollected" in row else None
+        time_received = convert_value(value=row["samtimereceived"]) if "samtimereceived" in row else None
+        too_young = convert_value(value=row["tooyoung"]) if "tooyoung" in row else None
+        bis = convert_value(value=row["bis"]) if "bis" in row else None
+        return Sample(sample_barcode, sampling=sampling, quality=sample_quality,
+                      time_collected=time_collected, time_received=time_received,
+                      too_young=too_young, bis=bis, counter=self.counter)
+
+    def retrieve_reference_identifiers(self) -> None:
+        # load some data from the database to compute references
+        # only the resources referred to by the current file are retrieved
+        # (the examination records still refer to the Buzzi hospital, see generate_data_resources_row_wise())
+        hospital_names = [self.config.get_hospital_name(), HospitalNames.IT_BUZZI_UC1.value]
         self.mapping_hospital_to_hospital_id = self.database.retrieve_identifiers(table_name=TableNames.HOSPITAL.value,
-                                                                              projection="name")
+                                                                              projection="name", values=hospital_names)
         log.debug(self.mapping_hospital_to_hospital_id)
 
+        # when there is no data, all the Examination instances are retrieved
+        lower_column_names = [column_name.lower() for column_name in self.data.columns] if self.data is not None else None
         self.mapping_column_to_examination_id = self.database.retrieve_identifiers(table_name=TableNames.EXAMINATION.value,
-                                                                               projection="code.text")
+                                                                               projection="code.text", values=lower_column_names)
         log.debug(self.mapping_column_to_examination_id)
 
-        # b. Create ExaminationRecord instance
-        count = 1
+    def generate_data_resources_row_wise(self) -> Iterator[tuple[str, Resource]]:
+        # a single pass over the rows: each row gives its Sample and its Patient (unless they have already been created),
+        # then its ExaminationRecord instances, each resource being given with the name of its table
+        # references to the same resource (e.g., the hospital, or the patient of a row) are shared by the records
+        has_samples = self.has_samples()
         for index, row in self.data.iterrows():
+            if has_samples:
+                # a sample is created out of the first row of its barcode having at least one value
+                sample_barcode = row["samplebarcode"]
+                if sample_barcode not in self.created_sample_barcodes and any(not (value is None or value == "" or not is_not_nan(value)) for value in row):
+                    self.created_sample_barcodes.add(sample_barcode)
+                    # no need to load Sample instances because they are referenced using their ID,
+                    # which was provided by the hospital (thus is known by the dataset)
+                    yield TableNames.SAMPLE.value, self.create_sample(row=row)
+            patient_id = row[ID_COLUMNS[HospitalNames.IT_BUZZI_UC1.value][TableNames.PATIENT.value]]
+            if patient_id not in self.created_patient_ids:
+                # the patient does not exist yet, we will create it
+                # (and, as samples, patients are referenced using the ID provided by the hospital)
+                self.created_patient_ids.add(patient_id)
+                yield TableNames.PATIENT.value, Patient(id_value=str(patient_id), counter=self.counter)
             # create examination records by associating observations to patients (and possibly the sample)
             for column_name, value in row.items():
                 lower_column_name = column_name.lower()
@@ -158,85 +231,140 @@ class Transform:
                         # log.info("I know a code for column %s", column_name)
                         # we know a code for this column, so we can register the value of that examination
                         examination_id = self.mapping_column_to_examination_id[lower_column_name]
-                        examination_ref = Reference(resource_identifier=examination_id, resource_type=TableNames.EXAMINATION.value)
+                        examination_ref = Reference.get_interned(resource_identifier=examination_id, resource_type=TableNames.EXAMINATION.value)
                         hospital_id = self.mapping_hospital_to_hospital_id[HospitalNames.IT_BUZZI_UC1.value]
-                        hospital_ref = Reference(resource_identifier=hospital_id, resource_type=TableNames.HOSPITAL.value)
+                        hospital_ref = Reference.get_interned(resource_identifier=hospital_id, resource_type=TableNames.HOSPITAL.value)
                         # for patient and sample instances, no need to go through a mapping because they have an ID assigned by the hospital
-                        patient_id = Identifier(id_value=row[ID_COLUMNS[HospitalNames.IT_BUZZI_UC1.value][TableNames.PATIENT.value]], resource_type=TableNames.PATIENT.value)  # TODO Nelly: Replace BUZZI by the current hospital
-                        subject_ref = Reference(resource_identifier=patient_id.value, resource_type=TableNames.PATIENT.value)
-                        sample_id = Identifier(id_value=row[ID_COLUMNS[HospitalNames.IT_BUZZI_UC1.value][TableNames.SAMPLE.value]], resource_type=TableNames.SAMPLE.value)  # TODO Nelly: Replace BUZZI by the current hospital
-                        sample_ref = Reference(resource_identifier=sample_id.value, resource_type=TableNames.SAMPLE.value)
+                        patient_id = Identifier.get_interned(id_value=row[ID_COLUMNS[HospitalNames.IT_BUZZI_UC1.value][TableNames.PATIENT.value]], resource_type=TableNames.PATIENT.value)  # TODO Nelly: Replace BUZZI by the current hospital
+                        subject_ref = Reference.get_interned(resource_identifier=patient_id.value, resource_type=TableNames.PATIENT.value)
+                        sample_id = Identifier.get_interned(id_value=row[ID_COLUMNS[HospitalNames.IT_BUZZI_UC1.value][TableNames.SAMPLE.value]], resource_type=TableNames.SAMPLE.value)  # TODO Nelly: Replace BUZZI by the current hospital
+                        sample_ref = Reference.get_interned(resource_identifier=sample_id.value, resource_type=TableNames.SAMPLE.value)
                         # TODO Pietro: we could even clean more the data, e.g., do not allow "Italy" as ethnicity (caucasian, etc)
                         fairified_value = self.fairify_value(column_name=column_name, value=value)
-                        new_examination_record = ExaminationRecord(id_value=NONE_VALUE, examination_ref=examination_ref,
-                                                                   subject_ref=subject_ref, hospital_ref=hospital_ref,
-                                                                   sample_ref=sample_ref, value=fairified_value,
-                                                                   counter=self.counter)
-                        self.examination_records.append(new_examination_record)
-                        if len(self.examination_records) >= BATCH_SIZE:
-                            self.database.write_in_file(data_array=self.examination_records, table_name=TableNames.EXAMINATION_RECORD.value, count=count)
-                            # no need to load ExaminationRecords instances because they are never referenced
-                            self.examination_records = []
-                            count = count + 1
+                        yield TableNames.EXAMINATION_RECORD.value, ExaminationRecord(id_value=NONE_VALUE, examination_ref=examination_ref,
+                                                                                     subject_ref=subject_ref, hospital_ref=hospital_ref,
+                                                                                     sample_ref=sample_ref, value=fairified_value, counter=self.counter)
                     else:
                         # Ideally, there will be no column left without a code
                         # So this should never happen
                         # TODO Nelly: this is not true, 3 columns in Buzzi are still not mapped
                         pass
 
-        self.database.write_in_file(data_array=self.examination_records, table_name=TableNames.EXAMINATION_RECORD.value, count=count)
+    def generate_data_resources_columnar(self) -> Iterator[tuple[str, Resource]]:
+        # this produces exactly the same resources (and in the same order, thus with the same IDs)
+        # as generate_data_resources_row_wise, but filters cells and rows with vectorized operations instead of one by one
+        # we use .values (and not each column separately) to get the same values (and types) as iterrows()
+        values = self.data.values
+        nb_rows, nb_columns = values.shape
+        if nb_rows == 0 or nb_columns == 0:
+            return
+        patient_index = self.data.columns.get_loc(ID_COLUMNS[HospitalNames.IT_BUZZI_UC1.value][TableNames.PATIENT.value])  # TODO Nelly: Replace BUZZI by the current hospital
+        sample_index = self.data.columns.get_loc(ID_COLUMNS[HospitalNames.IT_BUZZI_UC1.value][TableNames.SAMPLE.value])  # TODO Nelly: Replace BUZZI by the current hospital
+        # for patient and sample instances, no need to go through a mapping because they have an ID assigned by the hospital
+        # thus, we compute their identifiers once per row instead of once per cell
+        patient_ids = [Identifier(id_value=patient_id, resource_type=TableNames.PATIENT.value).value for patient_id in values[:, patient_index]]
+        sample_ids = [Identifier(id_value=sample_id, resource_type=TableNames.SAMPLE.value).value for sample_id in values[:, sample_index]]
 
-    def create_patients(self) -> None:
-        log.info("create patient instances in memory")
-        created_patient_ids = set()
-        count = 1
-        for index, row in self.data.iterrows():
-            patient_id = row[ID_COLUMNS[HospitalNames.IT_BUZZI_UC1.value][TableNames.PATIENT.value]]
-            if patient_id not in created_patient_ids:
-                # the patient does not exist yet, we will create it
-                new_patient = Patient(id_value=str(patient_id), counter=self.counter)
-                created_patient_ids.add(patient_id)
-                self.patients.append(new_patient)
-                if len(self.patients) >= BATCH_SIZE:
-                    self.database.write_in_file(data_array=self.patients, table_name=TableNames.PATIENT.value, count=count)  # this will save the data if it has reached BATCH_SIZE
-                    self.patients = []
-                    count = count + 1
-                    # no need to load Patient instances because they are referenced using their ID,
-                    # which was provided by the hospital (thus is known by the dataset)
-        self.database.write_in_file(data_array=self.patients, table_name=TableNames.PATIENT.value, count=count)
+        # 1. melt the data into a long (patient, sample, column, value) form, cells being ordered row by row
+        long_data = DataFrame({
+            "position": np.arange(nb_rows * nb_columns),
+            "patient": np.repeat(np.array(patient_ids, dtype=object), nb_columns),
+            "sample": np.repeat(np.array(sample_ids, dtype=object), nb_columns),
+            "column": np.tile(self.data.columns.values, nb_rows),
+            "value": pd.Series(values.ravel(), dtype=values.dtype)
+        })
+        not_empty_mask = get_not_empty_mask(values=long_data["value"])
 
-    def create_codeable_concept_from_column(self, column_name: str) -> CodeableConcept | None:
-        rows = self.metadata.loc[self.metadata['name'] == column_name]
-        if len(rows) == 1:
-            row = rows.iloc[0]
-            cc = CodeableConcept()
-            cc_tuple = self.create_code_from_metadata(row=row, ontology_column="ontology", code_column="ontology_code")
-            if cc_tuple is not None:
-                cc.add_coding(triple=cc_tuple)
-            cc_tuple = self.create_code_from_metadata(row=row, ontology_column="secondary_ontology", code_column="secondary_ontology_code")
-            if cc_tuple is not None:
-                cc.add_coding(triple=cc_tuple)
-            cc.text = row[MetadataColumns.COLUMN_NAME.value]  # the column name (display inside codings will have name+description)
-            return cc
-        elif len(rows) == 0:
-            # log.warn("Did not find the column '%s' in the metadata", column_name)
-            return None
-        else:
-            # log.warn("Found several times the column '%s' in the metadata", column_name)
-            return None
-
-    def create_code_from_metadata(self, row, ontology_column: str, code_column: str) -> tuple | None:
-        ontology = row[ontology_column]
-        if not is_not_nan(value=ontology):
-            # no ontology code has been provided for that variable name, let's skip it
-            return None
+        # 2. get the rows giving a new Sample (the first row of each barcode having at least one value)
+        # and the ones giving a new Patient (the first row of each patient ID) by dropping duplicates
+        new_sample_rows = set()
+        if self.has_samples():
+            row_has_value = not_empty_mask.to_numpy().reshape(nb_rows, nb_columns).any(axis=1)
+            new_sample_rows = self.get_first_rows(ids=values[:, sample_index], row_mask=row_has_value, created_ids=self.created_sample_barcodes)
+        new_patient_rows = self.get_first_rows(ids=values[:, patient_index], row_mask=np.full(nb_rows, True), created_ids=self.created_patient_ids)
+        new_rows = iter(sorted(new_sample_rows | new_patient_rows))
+
+        # 3. drop the cells for which there is no examination or no value
+        lower_columns = long_data["column"].str.lower()
+        long_data = long_data[~lower_columns.isin(NO_EXAMINATION_COLUMNS) & not_empty_mask]
+        long_data = long_data.assign(lower_column=lower_columns[long_data.index])
+
+        # 4. associate each cell to its Examination ID with a single join (cells whose column has no code are dropped)
+        mapping = DataFrame({
+            "lower_column": list(self.mapping_column_to_examination_id.keys()),
+            "examination_id": list(self.mapping_column_to_examination_id.values())
+        })
+        long_data = long_data.merge(mapping, how="inner", on="lower_column", sort=False).sort_values(by="position", kind="stable")
+
+        # 5. create the resources in bulk: the Sample and Patient of a row come before its ExaminationRecord instances,
+        # and references are shared by cells with the same column
+        next_new_row = next(new_rows, None)
+        examination_refs = {}
+        hospital_ref = None
+        for position, patient_id, sample_id, column_name, lower_column_name, value, examination_id in zip(long_data["position"], long_data["patient"], long_data["sample"], long_data["column"], long_data["lower_column"], long_data["value"], long_data["examination_id"]):
+            while next_new_row is not None and next_new_row <= position // nb_columns:
+                yield from self.generate_row_resources(values=values, row_index=next_new_row, new_sample_rows=new_sample_rows, new_patient_rows=new_patient_rows)
+                next_new_row = next(new_rows, None)
+            if hospital_ref is None:
+                hospital_id = self.mapping_hospital_to_hospital_id[HospitalNames.IT_BUZZI_UC1.value]
+                hospital_ref = Reference.get_interned(resource_identifier=hospital_id, resource_type=TableNames.HOSPITAL.value)
+            if lower_column_name not in examination_refs:
+                examination_refs[lower_column_name] = Reference.get_interned(resource_identifier=examination_id, resource_type=TableNames.EXAMINATION.value)
+            subject_ref = Reference.get_interned(resource_identifier=patient_id, resource_type=TableNames.PATIENT.value)
+            sample_ref = Reference.get_interned(resource_identifier=sample_id, resource_type=TableNames.SAMPLE.value)
+            fairified_value = self.fairify_value(column_name=column_name, value=value)
+            yield TableNames.EXAMINATION_RECORD.value, ExaminationRecord(id_value=NONE_VALUE, examination_ref=examination_refs[lower_column_name],
+                                                                         subject_ref=subject_ref, hospital_ref=hospital_ref,
+                                                                         sample_ref=sample_ref, value=fairified_value, counter=self.counter)
+        # the rows after the last ExaminationRecord instance may still give new samples and patients
+        while next_new_row is not None:
+            yield from self.generate_row_resources(values=values, row_index=next_new_row, new_sample_rows=new_sample_rows, new_patient_rows=new_patient_rows)
+            next_new_row = next(new_rows, None)
+
+    def generate_row_resources(self, values: np.ndarray, row_index: int, new_sample_rows: set, new_patient_rows: set) -> Iterator[tuple[str, Resource]]:
+        if row_index in new_sample_rows:
+            self.created_sample_barcodes.add(values[row_index, self.data.columns.get_loc("samplebarcode")])
+            yield TableNames.SAMPLE.value, self.create_sample(row=self.data.iloc[row_index])
+        if row_index in new_patient_rows:
+            patient_id = values[row_index, self.data.columns.get_loc(ID_COLUMNS[HospitalNames.IT_BUZZI_UC1.value][TableNames.PATIENT.value])]
+            self.created_patient_ids.add(patient_id)
+            yield TableNames.PATIENT.value, Patient(id_value=str(patient_id), counter=self.counter)
+
+    @classmethod
+    def get_first_rows(cls, ids: np.ndarray, row_mask: np.ndarray, created_ids: set) -> set:
+        # the positions of the rows where each ID first appears (among the rows in the mask), except the created IDs
+        row_ids = pd.Series(ids, dtype=object)[row_mask].drop_duplicates(keep="first")
+        row_ids = row_ids[~row_ids.isin(list(created_ids))]
+        return set(row_ids.index)
+
+    def save_resources(self, data_array: list, table_name: str) -> None:
+        if len(data_array) > 0:
+            if not self.config.get_direct_load() or self.config.get_debug_files():
+                # the resources of a table are written in successive files (Patient1.json, Patient2.json, ...),
+                # and this numbering continues from one data chunk to the next one to not overwrite previous files
+                count = self.file_counts.get(table_name, 1)
+                self.database.write_in_file(data_array=data_array, table_name=table_name, count=count)
+                self.file_counts[table_name] = count + 1
+            if self.loader_pool is not None:
+                # the resources are loaded by other threads, while we continue to create the next ones
+                self.loader_pool.submit(data_array=data_array, table_name=table_name)
+            elif self.config.get_direct_load():
+                # the resources are given to the database as is, without being parsed again from the files
+                self.database.write_in_table(data_array=data_array, table_name=table_name)
+
+    def load_reference_table(self, table_name: str) -> None:
+        if self.loader_pool is not None:
+            # the resources have been given to the loaders, and we need them in the database to get their identifiers
+            self.loader_pool.wait()
+        elif self.config.get_direct_load():
+            # the resources have already been upserted when they were saved
+            pass
         else:
-            ontology = get_ontology_system(ontology=ontology)  # get the URI of the ontology system instead of its string name
-            code = normalize_value(input_string=row[code_column])  # get the ontology code in the metadata for the given column and normalize it (just in case)
-            display = Examination.get_label(row=row)
-            # log.info("Found exactly an ontology code for the column '%s', i.e., %s", column_name, code)
-            cc_tuple = (str(ontology), str(code), str(display))
-            return cc_tuple
+            self.database.load_json_in_table(table_name=table_name, unique_variables=UNIQUE_VARIABLES[table_name])
+
+    def create_codeable_concept_from_column(self, column_name: str) -> CodeableConcept | None:
+        # this returns None when the column is not described in the metadata, or is described several times
+        return self.metadata_catalog.get_codeable_concept(column_name=column_name)
 
     def determine_examination_category(self, column_name: str) -> CodeableConcept:
         cc = CodeableConcept()
@@ -252,29 +380,28 @@ class Transform:
                 return True
         return False
 
-    def fairify_value(self, column_name, value) -> str | float | datetime | CodeableConcept:
-        if column_name in self.mapped_values:
-            # we iterate over all the mappings of a given column
-            for mapping in self.mapped_values[column_name]:
-                # we get the value of the mapping, e.g., F, or M, or NA
-                mapped_value = mapping['value']
-                # if the sample value is equal to the mapping value, we have found a match,
-                # and we will record the associated ontology term instead of the value
-                if is_equal_insensitive(value=value, compared=mapped_value):
-                    # we create a CodeableConcept with each code added to the mapping, e.g., snomed_ct and loinc
-                    # recall that a mapping is of the form: {'value': 'X', 'explanation': '...', 'snomed_ct': '123', 'loinc': '456' }
-                    # and we add each ontology code to that CodeableConcept
-                    cc = CodeableConcept()
-                    for key, val in mapping.items():
-                        # for any key value pair that is not about the value or the explanation
-                        # (i.e., loinc and snomed_ct columns), we create a Coding, which we add to the CodeableConcept
-                        # we need to do a loop because there may be several ontology terms for a single mapping
-                        if key != 'value' and key != 'explanation':
-                            system = get_ontology_system(ontology=key)
-                            code = normalize_value(input_string=val)
-                            display = mapping['explanation']
-                            cc.add_coding(triple=(system, code, display))
-                    return cc  # return the CC computed out of the corresponding mapping
-            return convert_value(value=value)  # no coded value for that value, trying at least to normalize it a bit
-        return convert_value(value=value)  # no coded value for that value, trying at least to normalize it a bit
+    def fairify_value(self, column_name, value) -> str | float | datetime | dict:
+        is_cached, fairified_value = self.value_cache.get(column_name=column_name, value=value)
+        if not is_cached:
+            # the JSON CodeableConcept of a coded value is shared by all the ExaminationRecord instances with that code
+            fairified_value = self.compute_fairified_value(column_name=column_name, value=value)
+            self.value_cache.put(column_name=column_name, value=value, result=fairified_value)
+        return fairified_value
+
+    def compute_fairified_value(self, column_name, value) -> str | float | datetime | dict:
+        column_codes = self.mapped_codes.get(column_name)
+        if column_codes is not None:
+            # if the sample value is equal to a mapping value, we have found a match,
+            # and we will record the associated ontology terms (as a JSON CodeableConcept) instead of the value
+            try:
+                return column_codes[MetadataCatalog.get_mapped_value_key(value=value)]
+            except (KeyError, TypeError):
+                pass  # this value is not mapped (or cannot be, e.g., because it is not hashable)
+        return self.convert_value(column_name=column_name, value=value)  # no coded value for that value, trying at least to normalize it a bit
+
+    def convert_value(self, column_name, value) -> str | float | datetime:
+        if column_name in self.converted_columns:
+            # the value has already been converted to the type of its column (or kept as is if it could not be)
+            return value
+        return convert_value(value=value)
 
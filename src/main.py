@@ -3,6 +3,7 @@ import os.path
 import pathlib
 import sys
 import argparse
+import atexit
 import shutil
 import traceback
 
@@ -13,11 +14,16 @@ sys.path.append('.')  # add the current project to the python path to be runnabl
 from config.BetterConfig import BetterConfig
 from etl.ETL import ETL
 from utils.HospitalNames import HospitalNames
-from utils.constants import DEFAULT_DB_NAME
-from utils.setup_logger import log
+from utils.constants import DEFAULT_DB_NAME, DEFAULT_NB_LOADERS, DEFAULT_LOADING_QUEUE_SIZE, IDENTIFIER_BLOCK_SIZE, \
+    BATCH_SIZE, DEFAULT_DB_BATCH_SIZE, DEFAULT_NB_WRITERS, DEFAULT_NB_WRITE_RETRIES, VALUE_CACHE_SIZE, DEFAULT_LOG_LEVEL
+from utils.setup_logger import log, start_log_listener, stop_log_listener
 
 
 if __name__ == '__main__':
+    # the thread writing the log records is started by the script (and not when the logger is imported),
+    # and it is stopped at exit, whether the script ends normally or not
+    start_log_listener()
+    atexit.register(stop_log_listener)
 
     # the code is supposed to be run like this:
     # python3 main.py <hospital_name> <path/to/data.csv> <drop_db>
@@ -35,6 +41,31 @@ if __name__ == '__main__':
     parser.add_argument("--load", help="Whether to perform the Load step of the ETL.", choices={"True", "False"}, required=True)
     parser.add_argument("--use_en_locale", help="Whether to use the en_US locale instead of the one automatically assigned by the ETL.", choices={"True", "False"}, required=True)
     parser.add_argument("--no_index", help="Whether to NOT compute the indexes after the data is loaded in the database.", choices={"True", "False"}, required=True)
+    parser.add_argument("--chunk_size", help="Set the maximum number of lines of the data chunks, to read data files chunk by chunk (0 reads them at once).", required=False, default="0")
+    parser.add_argument("--chunk_bytes", help="Set the maximum size (in bytes, once in memory) of the data chunks, to read data files chunk by chunk (0 reads them at once).", required=False, default="0")
+    parser.add_argument("--direct_load", help="Whether to load the resources in the database directly, without going through intermediate JSON files.", choices={"True", "False"}, required=False, default="False")
+    parser.add_argument("--debug_files", help="Whether to still write the intermediate JSON files when resources are loaded directly.", choices={"True", "False"}, required=False, default="False")
+    parser.add_argument("--intermediate_format", help="Set the format of the intermediate files: one JSON file per batch, or one BSON file per table.", choices={"json", "bson"}, required=False, default="json")
+    parser.add_argument("--batch_size", help="Set the number of resources written in one intermediate file (or loaded at once in the direct load mode).", required=False, default=str(BATCH_SIZE))
+    parser.add_argument("--db_batch_size", help="Set the number of upserts sent in one bulk write (the initial one in the adaptive mode).", required=False, default=str(DEFAULT_DB_BATCH_SIZE))
+    parser.add_argument("--adaptive_batching", help="Whether to adapt the number of upserts per bulk write to the observed latency and document sizes.", choices={"True", "False"}, required=False, default="False")
+    parser.add_argument("--unordered_upserts", help="Whether to send unordered bulk writes, in parallel, instead of ordered ones.", choices={"True", "False"}, required=False, default="False")
+    parser.add_argument("--nb_writers", help="Set the number of threads sending bulk writes in parallel in the unordered mode.", required=False, default=str(DEFAULT_NB_WRITERS))
+    parser.add_argument("--nb_write_retries", help="Set the maximum number of retries of a bulk write failing with a transient error.", required=False, default=str(DEFAULT_NB_WRITE_RETRIES))
+    parser.add_argument("--incremental", help="Whether to only write the resources that are new or have changed since the last run.", choices={"True", "False"}, required=False, default="False")
+    parser.add_argument("--analysis_nb_processes", help="Set the number of worker processes analysing the data columns in parallel (1 analyses them one after the other).", required=False, default="1")
+    parser.add_argument("--analysis_sample_size", help="Set the maximum number of rows of a data file that are analysed (0 analyses all of them).", required=False, default="0")
+    parser.add_argument("--columnar_transform", help="Whether to create Sample, Patient and ExaminationRecord instances column-wise instead of row by row.", choices={"True", "False"}, required=False, default="False")
+    parser.add_argument("--convert_columns", help="Whether to convert the values of typed columns at once, based on their vartype in the metadata, instead of guessing the type of each cell.", choices={"True", "False"}, required=False, default="False")
+    parser.add_argument("--pipelined", help="Whether to load batches of resources in the database while the next ones are created.", choices={"True", "False"}, required=False, default="False")
+    parser.add_argument("--nb_loaders", help="Set the number of threads loading batches in the pipelined mode.", required=False, default=str(DEFAULT_NB_LOADERS))
+    parser.add_argument("--loading_queue_size", help="Set the maximum number of batches waiting to be loaded in the pipelined mode.", required=False, default=str(DEFAULT_LOADING_QUEUE_SIZE))
+    parser.add_argument("--nb_processes", help="Set the number of worker processes ingesting the data files in parallel (1 ingests them one after the other).", required=False, default="1")
+    parser.add_argument("--metadata_cache", help="Whether to keep the compiled metadata on disk, to reuse it in the next runs with the same metadata file.", choices={"True", "False"}, required=False, default="False")
+    parser.add_argument("--log_level", help="Set the log level of the application.", choices={"DEBUG", "INFO", "WARNING", "ERROR"}, required=False, default=DEFAULT_LOG_LEVEL)
+    parser.add_argument("--subsystem_log_levels", help="Set the log level of some subsystems (i.e., packages), e.g., database=DEBUG,etl=WARNING.", required=False, default="")
+    parser.add_argument("--value_cache_size", help="Set the maximum number of distinct values per column whose fairified value is cached (0 disables the cache).", required=False, default=str(VALUE_CACHE_SIZE))
+    parser.add_argument("--identifier_block_size", help="Set the number of resource IDs allocated at once in the database by each process.", required=False, default=str(IDENTIFIER_BLOCK_SIZE))
 
     args = parser.parse_args()
     config = BetterConfig()
@@ -46,8 +77,8 @@ if __name__ == '__main__':
 
     # everything has been written in the log file,
     # so we move it (the file with the latest timestamp) to its respective database folder in working-dir
-    # first: close handlers that were writing the log files
-    log.handlers.clear()
+    # first: write the remaining log records and close the handlers that were writing the log files
+    stop_log_listener()
     # now we can move the latest log file to its destination
     latest_log_filename = max([f for f in pathlib.Path('.').glob('*.log')], key=os.path.getctime)
     shutil.move(latest_log_filename, os.path.join(config.get_working_dir_current(), latest_log_filename))
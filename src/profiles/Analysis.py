@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from datatypes.CodeableConcept import CodeableConcept
 from profiles.Resource import Resource
 from utils.Counter import Counter
@@ -20,9 +22,10 @@ class Analysis(Resource):
         # instead we nest them (as JSON dicts) in GenomicData analysis
         return "Analysis"
 
-    def to_json(self) -> dict:
+    def to_json(self, created_at: datetime = None) -> dict:
         return {
             "identifier": self.identifier.to_json(),
+            "identifierNumber": self.identifier.number,
             "resourceType": self.get_type(),
             "methodType": self.method_type.to_json(),
             "changeType": self.change_type.to_json(),
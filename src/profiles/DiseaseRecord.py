@@ -25,9 +25,10 @@ class DiseaseRecord(Resource):
     def get_type(self) -> str:
         return TableNames.DISEASE_RECORD.value
 
-    def to_json(self) -> dict:
+    def to_json(self, created_at: datetime = None) -> dict:
         return {
             "identifier": self.identifier.to_json(),
+            "identifierNumber": self.identifier.number,
             "resourceType": self.get_type(),
             "clinicalStatus": self.clinical_status,
             "recordedDate": get_mongodb_date_from_datetime(current_datetime=self.recorded_date),
@@ -35,5 +36,5 @@ class DiseaseRecord(Resource):
             "subject": self.subject.to_json(),
             "recordedBy": self.recorded_by.to_json(),
             "instantiates": self.instantiate.to_json(),
-            "createdAt": get_mongodb_date_from_datetime(current_datetime=datetime.now())
+            "createdAt": self.get_created_at_json(created_at=created_at)
         }
@@ -4,7 +4,7 @@ from utils.MetadataColumns import MetadataColumns
 from datatypes.CodeableConcept import CodeableConcept
 from profiles.Resource import Resource
 from utils.TableNames import TableNames
-from utils.utils import is_not_nan, get_mongodb_date_from_datetime
+from utils.utils import is_not_nan
 from utils.Counter import Counter
 
 
@@ -22,14 +22,15 @@ class Examination(Resource):
     def get_type(self) -> str:
         return TableNames.EXAMINATION.value
 
-    def to_json(self) -> dict:
+    def to_json(self, created_at: datetime = None) -> dict:
         return {
             "identifier": self.identifier.to_json(),
+            "identifierNumber": self.identifier.number,
             "resourceType": self.get_type(),
             "code": self.code.to_json(),
             "category": self.category.to_json(),
             "permittedDatatype": self.permitted_data_types,
-            "createdAt": get_mongodb_date_from_datetime(current_datetime=datetime.now())
+            "createdAt": self.get_created_at_json(created_at=created_at)
         }
 
     @classmethod
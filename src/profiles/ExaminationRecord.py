@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Callable
 
 from datatypes.CodeableConcept import CodeableConcept
 from datatypes.Coding import Coding
@@ -6,11 +7,12 @@ from datatypes.Reference import Reference
 from profiles.Resource import Resource
 from utils.TableNames import TableNames
 from utils.Counter import Counter
-from utils.utils import get_mongodb_date_from_datetime
-from utils.setup_logger import log
+from utils.utils import get_mongodb_date_from_datetime, get_bson_date_from_datetime
 
 
 class ExaminationRecord(Resource):
+    __slots__ = ("value", "subject", "recorded_by", "instantiate", "based_on")
+
     def __init__(self, id_value: str, examination_ref: Reference, subject_ref: Reference,
                  hospital_ref: Reference, sample_ref: Reference, value, counter: Counter):
         """
@@ -35,24 +37,32 @@ class ExaminationRecord(Resource):
     def get_type(self) -> str:
         return TableNames.EXAMINATION_RECORD.value
 
-    def to_json(self) -> dict:
+    def to_json(self, created_at: datetime = None) -> dict:
+        return self.build_json(date_converter=get_mongodb_date_from_datetime,
+                               created_at=self.get_created_at_json(created_at=created_at))
+
+    def to_bson(self, created_at: datetime) -> dict:
+        return self.build_json(date_converter=get_bson_date_from_datetime, created_at=created_at)
+
+    def build_json(self, date_converter: Callable, created_at) -> dict:
+        # date_converter gives the representation of a date value, i.e., a MongoDB date (JSON) or a datetime (BSON)
         if isinstance(self.value, CodeableConcept) or isinstance(self.value, Coding) or isinstance(self.value, Reference):
             # complex type, we need to expand it with .to_json()
             expanded_value = self.value.to_json()
         elif isinstance(self.value, datetime):
-            log.debug("The datetime value in ExaminationRecord is %s", self.value)
-            expanded_value = get_mongodb_date_from_datetime(current_datetime=self.value)
+            expanded_value = date_converter(self.value)
         else:
             # primitive type, no need to expand it
             expanded_value = self.value
 
         return {
             "identifier": self.identifier.to_json(),
+            "identifierNumber": self.identifier.number,
             "resourceType": self.get_type(),
             "value": expanded_value,
             "subject": self.subject.to_json(),
             "recordedBy": self.recorded_by.to_json(),
             "instantiate": self.instantiate.to_json(),
             "basedOn": self.based_on.to_json(),
-            "createdAt": get_mongodb_date_from_datetime(current_datetime=datetime.now())
+            "createdAt": created_at
         }
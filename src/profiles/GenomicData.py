@@ -5,7 +5,6 @@ from profiles.Analysis import Analysis
 from profiles.Resource import Resource
 from utils.TableNames import TableNames
 from utils.Counter import Counter
-from utils.utils import get_mongodb_date_from_datetime
 
 
 class GenomicData(Resource):
@@ -19,12 +18,13 @@ class GenomicData(Resource):
     def get_type(self) -> str:
         return TableNames.GENOMIC_DATA.value
 
-    def to_json(self) -> dict:
+    def to_json(self, created_at: datetime = None) -> dict:
         return {
             "identifier": self.identifier.to_json(),
+            "identifierNumber": self.identifier.number,
             "resourceType": self.get_type(),
             "analysis": self.analysis.to_json(),
             "subject": self.subject.to_json(),
             "recordedBy": self.recorded_by.to_json(),
-            "createdAt": get_mongodb_date_from_datetime(current_datetime=datetime.now())
+            "createdAt": self.get_created_at_json(created_at=created_at)
         }
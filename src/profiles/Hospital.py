@@ -3,7 +3,6 @@ from datetime import datetime
 from profiles.Resource import Resource
 from utils.TableNames import TableNames
 from utils.Counter import Counter
-from utils.utils import get_mongodb_date_from_datetime
 
 
 class Hospital(Resource):
@@ -27,14 +26,15 @@ class Hospital(Resource):
         """
         return TableNames.HOSPITAL.value
 
-    def to_json(self) -> dict:
+    def to_json(self, created_at: datetime = None) -> dict:
         """
         Get the JSON representation of the resource.
         :return: A JSON dict being the Hospital with all its attributes.
         """
         return {
             "identifier": self.identifier.to_json(),
+            "identifierNumber": self.identifier.number,
             "resourceType": self.get_type(),
             "name": self.name,
-            "createdAt": get_mongodb_date_from_datetime(current_datetime=datetime.now())
+            "createdAt": self.get_created_at_json(created_at=created_at)
         }
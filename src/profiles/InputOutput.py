@@ -1,4 +1,5 @@
 import os.path
+from datetime import datetime
 
 from datatypes.CodeableConcept import CodeableConcept
 from profiles.Resource import Resource
@@ -29,9 +30,10 @@ class InputOutput(Resource):
         # instead we nest them (as JSON dicts) in Analysis input and output
         return "InputOutput"
 
-    def to_json(self) -> dict:
+    def to_json(self, created_at: datetime = None) -> dict:
         return {
             "identifier": self.identifier.to_json(),
+            "identifierNumber": self.identifier.number,
             "resourceType": self.get_type(),
             "file": self.file,
             "type": self.type,
@@ -4,7 +4,6 @@ from datatypes.CodeableConcept import CodeableConcept
 from profiles.Resource import Resource
 from utils.TableNames import TableNames
 from utils.Counter import Counter
-from utils.utils import get_mongodb_date_from_datetime
 
 
 class Medicine(Resource):
@@ -16,10 +15,11 @@ class Medicine(Resource):
     def get_type(self) -> str:
         return TableNames.MEDICINE.value
 
-    def to_json(self) -> dict:
+    def to_json(self, created_at: datetime = None) -> dict:
         return {
             "identifier": self.identifier.to_json(),
+            "identifierNumber": self.identifier.number,
             "resourceType": self.get_type(),
             "code": self.code.to_json(),
-            "createdAt": get_mongodb_date_from_datetime(current_datetime=datetime.now())
+            "createdAt": self.get_created_at_json(created_at=created_at)
         }
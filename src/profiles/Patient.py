@@ -3,10 +3,11 @@ from datetime import datetime
 from profiles.Resource import Resource
 from utils.TableNames import TableNames
 from utils.Counter import Counter
-from utils.utils import get_mongodb_date_from_datetime
 
 
 class Patient(Resource):
+    __slots__ = ()
+
     def __init__(self, id_value: str, counter: Counter):
         """
         A new patient instance, either built from existing data or from scratch.
@@ -23,7 +24,7 @@ class Patient(Resource):
         """
         return TableNames.PATIENT.value
 
-    def to_json(self) -> dict:
+    def to_json(self, created_at: datetime = None) -> dict:
         """
         Get the JSON representation of the resource.
         :return: A JSON dict being the Patient with all its attributes.
@@ -31,5 +32,12 @@ class Patient(Resource):
         return {
             "identifier": self.identifier.to_json(),
             "resourceType": self.get_type(),
-            "createdAt": get_mongodb_date_from_datetime(current_datetime=datetime.now())
+            "createdAt": self.get_created_at_json(created_at=created_at)
+        }
+
+    def to_bson(self, created_at: datetime) -> dict:
+        return {
+            "identifier": self.identifier.to_json(),
+            "resourceType": self.get_type(),
+            "createdAt": created_at
         }
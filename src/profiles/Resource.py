@@ -1,12 +1,17 @@
 import json
+from datetime import datetime
 
 from datatypes.Identifier import Identifier
 from utils.TableNames import TableNames
 from utils import constants
 from utils.Counter import Counter
+from utils.utils import convert_mongodb_dates, get_mongodb_date_from_datetime
 
 
 class Resource:
+    # resources are created by millions, thus they do not have a __dict__ (subclasses declare their own slots)
+    __slots__ = ("identifier", "timestamp")
+
     def __init__(self, id_value: str, resource_type: str, counter: Counter):
         """
 
@@ -20,7 +25,8 @@ class Resource:
                 raise ValueError("Patient and Sample instances should have an ID.")
             else:
                 # We assign an ID to the new resource
-                self.identifier = Identifier(id_value=str(counter.increment()), resource_type=resource_type)
+                number = counter.increment()
+                self.identifier = Identifier(id_value=str(number), resource_type=resource_type, number=number)
         else:
             # This case covers when we retrieve resources from the DB, and we reconstruct them in-memory:
             # they already have an identifier, thus we simply reconstruct it with the value
@@ -31,9 +37,26 @@ class Resource:
     def get_type(self):
         raise NotImplementedError("The method get_resource_type() has to be overridden in every child class.")
 
-    def to_json(self):
+    def to_json(self, created_at: datetime = None):
         raise NotImplementedError("The method to_json() has to be overridden in every child class.")
 
+    @staticmethod
+    def get_created_at_json(created_at: datetime | None) -> dict:
+        # the creation date is given once for a batch of resources (see Database.write_in_file),
+        # otherwise (e.g., when a single resource is printed) this is the current date
+        return get_mongodb_date_from_datetime(current_datetime=created_at if created_at is not None else datetime.now())
+
+    def to_bson(self, created_at: datetime) -> dict:
+        """
+        Get the representation of the resource that is given to pymongo, i.e., with datetime objects instead of
+        MongoDB dates. The high-volume resources override it to build it directly.
+        :param created_at: A datetime being the creation date of the resource, shared by the resources of a batch.
+        :return: A dict being the resource with all its attributes.
+        """
+        resource = convert_mongodb_dates(value=self.to_json(created_at=created_at))
+        resource["createdAt"] = created_at  # the exact given date, which is not rounded to the second
+        return resource
+
     def __str__(self) -> str:
         return json.dumps(self.to_json())
 
@@ -1,12 +1,15 @@
 from datetime import datetime
+from typing import Callable
 
 from profiles.Resource import Resource
 from utils.TableNames import TableNames
 from utils.Counter import Counter
-from utils.utils import get_mongodb_date_from_datetime, is_not_nan
+from utils.utils import get_mongodb_date_from_datetime, is_not_nan, get_bson_date_from_datetime
 
 
 class Sample(Resource):
+    __slots__ = ("sampling", "quality", "time_collected", "time_received", "too_young", "bis")
+
     def __init__(self, id_value: str, quality: str, sampling: str, time_collected: datetime, time_received: datetime,
                  too_young: bool, bis: bool, counter: Counter):
         # set up the resource ID
@@ -24,11 +27,19 @@ class Sample(Resource):
     def get_type(self) -> str:
         return TableNames.SAMPLE.value
 
-    def to_json(self) -> dict:
+    def to_json(self, created_at: datetime = None) -> dict:
+        return self.build_json(date_converter=get_mongodb_date_from_datetime,
+                               created_at=self.get_created_at_json(created_at=created_at))
+
+    def to_bson(self, created_at: datetime) -> dict:
+        return self.build_json(date_converter=get_bson_date_from_datetime, created_at=created_at)
+
+    def build_json(self, date_converter: Callable, created_at) -> dict:
+        # date_converter gives the representation of the sample dates, i.e., MongoDB dates (JSON) or datetime (BSON)
         json_sample = {
             "identifier": self.identifier.to_json(),
             "resourceType": self.get_type(),
-            "createdAt": get_mongodb_date_from_datetime(current_datetime=datetime.now())
+            "createdAt": created_at
         }
 
         # we need to check whether each field is a NaN value or not because we do not want to add fields for NaN values
@@ -38,9 +49,9 @@ class Sample(Resource):
         if is_not_nan(self.sampling):
             json_sample["sampling"] = self.sampling
         if is_not_nan(self.time_collected):
-            json_sample["timeCollected"] = get_mongodb_date_from_datetime(current_datetime=self.time_collected)
+            json_sample["timeCollected"] = date_converter(self.time_collected)
         if is_not_nan(self.time_collected):
-            json_sample["timeReceived"] = get_mongodb_date_from_datetime(current_datetime=self.time_collected)
+            json_sample["timeReceived"] = date_converter(self.time_collected)
         if is_not_nan(self.too_young):
             json_sample["tooYoung"] = self.too_young
         if is_not_nan(self.bis):
@@ -1,12 +1,19 @@
 from database.Database import Database
-from utils.setup_logger import log
+from database.IdentifierAllocator import IdentifierAllocator
 
 
 class Counter:
     def __init__(self):
         self.resource_id = 0
+        # when the counter is set with the database, IDs are taken by blocks from the counters table
+        self.identifier_allocator = None
+        self.last_id_of_block = 0
 
     def increment(self) -> int:
+        if self.identifier_allocator is not None and self.resource_id >= self.last_id_of_block:
+            # the current block of IDs is exhausted, thus we ask for a new one
+            first_id, self.last_id_of_block = self.identifier_allocator.allocate_block()
+            self.resource_id = first_id - 1
         self.resource_id = self.resource_id + 1
         return self.resource_id
 
@@ -14,11 +21,12 @@ class Counter:
         self.resource_id = new_value
 
     def set_with_database(self, database: Database) -> None:
-        max_value = database.get_resource_counter_id()
-        # Resource.set_counter(max_value + 1)  # start 1 after the current counter to avoid resources with the same ID
-        if max_value > -1:
-            log.debug("will set the counter with %s", max_value)
-            self.set(max_value)
+        # the next IDs are allocated by the database, thus they never collide with the IDs of other processes
+        self.set_identifier_allocator(identifier_allocator=IdentifierAllocator(database=database, block_size=database.config.get_identifier_block_size()))
+
+    def set_identifier_allocator(self, identifier_allocator: IdentifierAllocator) -> None:
+        self.identifier_allocator = identifier_allocator
+        self.last_id_of_block = self.resource_id  # the next increment will ask for a block
 
     def reset(self) -> None:
         self.resource_id = 0
@@ -0,0 +1,6 @@
+from enum import Enum
+
+
+class IntermediateFormats(Enum):
+    JSON = "json"  # one JSON file per batch of resources, e.g., Patient1.json, Patient2.json, ...
+    BSON = "bson"  # one file of concatenated BSON documents per table, e.g., Patient.bson
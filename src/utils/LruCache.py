@@ -0,0 +1,46 @@
+from collections import OrderedDict
+from typing import Any
+
+
+class LruCache:
+    """
+    The class LruCache keeps at most max_size values, each one under a key. Once it is full, the least recently used
+    value is forgotten to keep the new one, thus the values that are used often stay in the cache.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Create a new empty cache.
+        :param max_size: An integer being the maximum number of values kept in the cache.
+        """
+        self.max_size = max_size
+        self.values = OrderedDict()  # from the least recently used value to the most recently used one
+
+    def get(self, key: Any) -> Any:
+        """
+        Get the value kept under the given key.
+        :param key: The (hashable) key of the value.
+        :return: The value, or None when it is not in the cache.
+        """
+        value = self.values.get(key)
+        if value is not None:
+            self.values.move_to_end(key)
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        """
+        Keep the given value under the given key, and forget the least recently used value if the cache is full.
+        :param key: The (hashable) key of the value.
+        :param value: The value to keep.
+        :return: Nothing.
+        """
+        self.values[key] = value
+        self.values.move_to_end(key)
+        if len(self.values) > self.max_size:
+            self.values.popitem(last=False)
+
+    def clear(self) -> None:
+        self.values.clear()
+
+    def __len__(self) -> int:
+        return len(self.values)
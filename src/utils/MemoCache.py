@@ -0,0 +1,62 @@
+from typing import Any
+
+from utils.setup_logger import log
+
+
+class MemoCache:
+    """
+    The class MemoCache remembers the results of a computation per column and per value, e.g., the fairified value
+    of each cell. This saves time for columns in which the same values are repeated many times (categorical values,
+    dates, etc.). Each column keeps at most max_size values: once a column is full, new values are computed but not
+    kept, thus columns with many distinct values do not fill the memory.
+    """
+
+    def __init__(self, max_size: int):
+        """
+        Create a new empty cache.
+        :param max_size: An integer being the maximum number of values kept per column (0 disables the cache).
+        """
+        self.max_size = max_size
+        self.values = {}  # map each column to a dict mapping each value to its result
+        self.hits = {}  # map each column to the number of values found in the cache
+        self.misses = {}  # map each column to the number of values not found in the cache
+
+    def get(self, column_name: str, value: Any) -> tuple[bool, Any]:
+        """
+        Get the result of the given value in the given column.
+        :param column_name: A string being the column of the value.
+        :param value: The value for which the result is looked for.
+        :return: A tuple being whether the value was in the cache, and its result (None when it was not).
+        """
+        column_values = self.values.get(column_name)
+        key = MemoCache.get_key(value=value)
+        if column_values is not None and key in column_values:
+            self.hits[column_name] = self.hits.get(column_name, 0) + 1
+            return True, column_values[key]
+        self.misses[column_name] = self.misses.get(column_name, 0) + 1
+        return False, None
+
+    def put(self, column_name: str, value: Any, result: Any) -> None:
+        """
+        Keep the result of the given value in the given column, unless the column is already full.
+        :param column_name: A string being the column of the value.
+        :param value: The value for which the result has been computed.
+        :param result: The result to keep. It is shared by all the cells with that value, thus it should not be modified.
+        :return: Nothing.
+        """
+        column_values = self.values.setdefault(column_name, {})
+        if len(column_values) < self.max_size:
+            column_values[MemoCache.get_key(value=value)] = result
+
+    @classmethod
+    def get_key(cls, value: Any) -> tuple:
+        # 1, 1.0 and True are equal (and have the same hash) in Python, but are not converted to the same values
+        return type(value), value
+
+    def log_stats(self) -> None:
+        for column_name in self.misses:
+            log.debug("Cache of column %s: %s hits, %s misses, %s kept values", column_name, self.hits.get(column_name, 0), self.misses[column_name], len(self.values.get(column_name, {})))
+        nb_hits = sum(self.hits.values())
+        nb_lookups = nb_hits + sum(self.misses.values())
+        if nb_lookups > 0:
+            log.info("The value cache has been hit %s times over %s lookups (%.1f%%)", nb_hits, nb_lookups, 100 * nb_hits / nb_lookups)
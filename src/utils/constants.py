@@ -49,8 +49,75 @@ SAMPLE_VARIABLES = ["Sampling", "SampleQuality", "SamTimeCollected", "SamTimeRec
 NO_EXAMINATION_COLUMNS = {"line", "unnamed", "id", "samplebarcode", "sampling", "samplequality", "samtimecollected",
                           "samtimereceived"}
 
+# the fields on which resources are unique, i.e., the fields on which we check whether a resource already exists in the database
+# see https://github.com/Nelly-Barret/BETTER-fairificator/issues/3
+UNIQUE_VARIABLES = {
+    TableNames.HOSPITAL.value: ["name"],
+    TableNames.EXAMINATION.value: ["code"],
+    TableNames.PATIENT.value: ["identifier"],
+    TableNames.SAMPLE.value: ["identifier"],
+    TableNames.EXAMINATION_RECORD.value: ["recordedBy", "subject", "basedOn", "instantiate"]
+}
+
+# default number of resources saved at once (in a file or in the database) by the Transform step
 BATCH_SIZE = 50
 
+# default number of operations sent in one bulk write, and the bounds of the adaptive batching
+# MongoDB accepts at most 100,000 operations and 48MB per bulk write (maxWriteBatchSize and maxMessageSizeBytes)
+DEFAULT_DB_BATCH_SIZE = 1000
+MIN_DB_BATCH_SIZE = 10
+MAX_DB_BATCH_SIZE = 100000
+MAX_DB_BATCH_BYTES = 48000000
+# number of tuples used to estimate the size of the tuples of a batch (in any mode)
+DB_BATCH_NB_SAMPLES = 10
+# in the adaptive mode, batches grow when bulk writes are faster than half this latency (in seconds),
+# and shrink when they are slower than twice this latency
+ADAPTIVE_BATCH_TARGET_LATENCY = 1.0
+
+# default number of threads sending the bulk writes in the unordered mode, and of retries of a failed bulk write
+DEFAULT_NB_WRITERS = 4
+DEFAULT_NB_WRITE_RETRIES = 3
+# delay (in seconds) before the first retry, the next ones wait twice as long as the previous one
+WRITE_RETRY_DELAY = 0.5
+# the write errors that may succeed when retried: 112 (write conflict)
+RETRYABLE_WRITE_ERROR_CODES = {112}
+# the duplicate key error, which may succeed when retried only when two upserts of the same document run concurrently
+DUPLICATE_KEY_ERROR_CODE = 11000
+
+# default number of loader threads and maximum number of batches waiting for them in the pipelined mode
+DEFAULT_NB_LOADERS = 4
+DEFAULT_LOADING_QUEUE_SIZE = 8
+
+# the table keeping the last allocated resource ID, and the name of the counter of resource IDs in this table
+COUNTERS_TABLE_NAME = "Counter"
+RESOURCE_COUNTER_NAME = "resource_id"
+# default number of resource IDs given at once to each process by the counters table
+IDENTIFIER_BLOCK_SIZE = 1000
+
+# maximum number of distinct values whose fairified value is kept, per column, during the Transform step
+VALUE_CACHE_SIZE = 10000
+
+# maximum number of shared data types (references, identifiers and codings) kept for each data type, see get_interned()
+MAX_INTERNED_VALUES = 100000
+
+# the table keeping a hash of the content of each written resource, to skip unchanged resources in the incremental mode
+HASHES_TABLE_NAME = "ResourceHash"
+
+# the folder (in the working directory) keeping the compiled metadata across runs, see Extract.load_compiled_metadata()
+METADATA_CACHE_FOLDER = "metadata-cache"
+# the version of the compiled metadata, to increase each time its content (or the classes it pickles) changes,
+# so that the files written by a previous version of the code are not used
+METADATA_CACHE_VERSION = 1
+
+# the log level of the application, when none is given
+DEFAULT_LOG_LEVEL = "INFO"
+
+# number of lines read to estimate the size (in memory) of a data line when data chunks are given in bytes
+CHUNK_ESTIMATION_NB_LINES = 1000
+
+# number of lines read to infer the type of each data column, which is then the same in the whole file and in its chunks
+DTYPES_INFERENCE_NB_LINES = 1000
+
 DEFAULT_CONFIG_FILE = "properties.ini"
 
 DEFAULT_DB_NAME = "better_default"
@@ -1,16 +1,98 @@
 import logging
+import logging.handlers
+import multiprocessing.util
+import os
+import queue
 from time import strftime
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s, %(levelname)-5s [%(module)s:%(funcName)s:%(lineno)d] %(message)s',
-    datefmt='%Y-%m-%d:%H:%M:%S',
-    handlers=[
-        logging.FileHandler('log-{}.log'.format(strftime('%Y-%m-%d:%H:%M:%S'))),
-        logging.StreamHandler()
-    ]
-)
+# worker processes (see ETL.run_in_parallel) inherit this variable, thus they write in the log file of the main process
+os.environ.setdefault("BETTER_FAIRIFICATOR_LOG_FILE", 'log-{}.log'.format(strftime('%Y-%m-%d:%H:%M:%S')))
+
+LOG_FORMAT = '%(asctime)s, %(levelname)-5s [%(module)s:%(funcName)s:%(lineno)d] %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d:%H:%M:%S'
+
+# the level of the whole application, and the ones of the subsystems (i.e., the packages of the project, such as
+# etl or database) which do not use it, see set_log_levels()
+application_log_level = logging.INFO
+subsystem_log_levels = {}
+# the thread writing the log records in the log file and the console, started by the main script (and by each worker
+# process), see start_log_listener()
+log_listener = None
+
+
+class SubsystemLogFilter(logging.Filter):
+    """
+    Keep the log records whose level is at least the one of their subsystem, i.e., the package of their module.
+    Records which are not kept are never formatted.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        subsystem = os.path.basename(os.path.dirname(record.pathname))
+        return record.levelno >= subsystem_log_levels.get(subsystem, application_log_level)
+
+
+def start_log_listener() -> None:
+    # the log records are put in a queue, and a dedicated thread writes them in the log file and in the console
+    # thus, the threads that log do not wait for these writes
+    global log_listener
+    formatter = logging.Formatter(fmt=LOG_FORMAT, datefmt=LOG_DATE_FORMAT)
+    handlers = [logging.FileHandler(os.environ["BETTER_FAIRIFICATOR_LOG_FILE"]), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SubsystemLogFilter())
+    logging.getLogger().handlers = [queue_handler]
+    log_listener = logging.handlers.QueueListener(log_queue, *handlers)
+    log_listener.start()
+
+
+def stop_log_listener() -> None:
+    # write the remaining log records, and close the log file (e.g., before moving it)
+    global log_listener
+    logging.getLogger().handlers.clear()
+    if log_listener is not None:
+        log_listener.stop()
+        for handler in log_listener.handlers:
+            handler.close()
+        log_listener = None
+
+
+def start_log_listener_in_worker(log_level: str, subsystem_levels: dict) -> None:
+    # the initializer of worker processes: they are spawned, thus they have neither the log levels nor the listener
+    # of the main process, and they exit without running atexit functions, thus we stop their listener with
+    # multiprocessing's finalizers
+    set_log_levels(log_level=log_level, subsystem_levels=subsystem_levels)
+    start_log_listener()
+    multiprocessing.util.Finalize(None, stop_log_listener, exitpriority=0)
+
+
+def set_log_levels(log_level: str, subsystem_levels: dict) -> None:
+    """
+    Set the level of the application, and the ones of some subsystems.
+    :param log_level: A string being the name of the level of the application, e.g., INFO.
+    :param subsystem_levels: A dict mapping subsystem (package) names to level names, e.g., { "database": "DEBUG" }.
+    :return: Nothing. Raise a ValueError if a level name is unknown.
+    """
+    global application_log_level
+    application_log_level = get_log_level(level_name=log_level)
+    subsystem_log_levels.clear()
+    for subsystem, level_name in subsystem_levels.items():
+        subsystem_log_levels[subsystem] = get_log_level(level_name=level_name)
+    # the logger lets the records of the most verbose subsystem go through, and the filter of the queue handler
+    # drops the ones of the other subsystems
+    log.setLevel(min([application_log_level] + list(subsystem_log_levels.values())))
+
+
+def get_log_level(level_name: str) -> int:
+    level = logging.getLevelName(level_name.strip().upper())
+    if not isinstance(level, int):
+        raise ValueError("The log level '" + level_name + "' is not known.")
+    return level
+
+
 log = logging.getLogger()
+log.setLevel(application_log_level)
 # do not allow PyMongo to print everything,
 # only important messages (warning, error and fatal) wil be shown
 logging.getLogger("pymongo").setLevel(logging.WARNING)
@@ -1,11 +1,18 @@
+import hashlib
+import json
 import locale
 import math
+import mmap
+import os
 import re
-from datetime import datetime
-from typing import Any
+import struct
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterator
 
+import bson
+import pandas as pd
 from dateutil.parser import parse
-from pandas import DataFrame
+from pandas import DataFrame, Series
 
 from utils.Ontologies import Ontologies
 
@@ -28,6 +35,17 @@ def is_not_nan(value: Any) -> bool:
     return not is_float(value=value) or (is_float(value=value) and not math.isnan(float(value)))
 
 
+def get_not_empty_mask(values: Series) -> Series:
+    # vectorized counterpart of "value is not None and value != '' and is_not_nan(value)"
+    # is_not_nan also considers as NaN the strings that float() parses to NaN, e.g., "nan" or " NaN "
+    mask = ~values.isna()
+    # object values without any string (e.g., only dates) have no .str accessor, and cannot be empty strings
+    if values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) in ["string", "empty", "mixed", "mixed-integer"]:
+        is_nan_string = values.str.fullmatch(r"\s*[+-]?nan\s*", case=False, na=False).astype(bool)
+        mask = mask & (values != "") & ~is_nan_string
+    return mask
+
+
 def is_not_empty(variable: Any) -> bool:
     if isinstance(variable, int) or isinstance(variable, float):
         return True
@@ -114,6 +132,100 @@ def get_mongodb_date_from_datetime(current_datetime: datetime) -> dict:
     return { "$date": current_datetime.strftime('%Y-%m-%dT%H:%M:%SZ') }
 
 
+def get_bson_date_from_datetime(current_datetime: datetime) -> datetime:
+    # the datetime that pymongo stores as a BSON date, i.e., the one obtained by parsing get_mongodb_date_from_datetime
+    return current_datetime.replace(microsecond=0, tzinfo=None)
+
+
+def get_datetime_from_mongodb_date(mongodb_date: dict) -> datetime:
+    return datetime.strptime(mongodb_date["$date"], '%Y-%m-%dT%H:%M:%SZ')
+
+
+def convert_mongodb_dates(value: Any) -> Any:
+    # replace the MongoDB dates, i.e., { "$date": "..." }, nested in the given JSON value by datetime objects
+    # this gives the same values as parsing the JSON with bson.json_util, but without going through a string
+    if isinstance(value, dict):
+        if len(value) == 1 and "$date" in value:
+            return get_datetime_from_mongodb_date(mongodb_date=value)
+        return {key: convert_mongodb_dates(value=nested_value) for key, nested_value in value.items()}
+    elif isinstance(value, list):
+        return [convert_mongodb_dates(value=nested_value) for nested_value in value]
+    else:
+        return value
+
+
+# the vectorized counterparts of convert_value, for columns whose type is known (column "vartype" in metadata)
+# values that cannot be converted are kept as is, as convert_value does
+
+def convert_int_values(values: Series) -> Series:
+    numeric_values = pd.to_numeric(values, errors="coerce")
+    is_converted = (numeric_values.notna() & (numeric_values % 1 == 0)).to_numpy()
+    converted_values = values.to_numpy(dtype=object, copy=True)
+    converted_values[is_converted] = numeric_values[is_converted].astype("int64").tolist()  # Python ints
+    return Series(converted_values, index=values.index, dtype=object)
+
+
+def convert_float_values(values: Series) -> Series:
+    numeric_values = get_numeric_values(values=values)
+    is_converted = numeric_values.notna().to_numpy()
+    converted_values = values.to_numpy(dtype=object, copy=True)
+    converted_values[is_converted] = numeric_values[is_converted].astype(float).tolist()  # Python floats
+    return Series(converted_values, index=values.index, dtype=object)
+
+
+def get_delocalized_values(str_values: Series) -> Series:
+    # vectorized counterpart of locale.delocalize: numbers written as strings follow the current locale (set by the ETL),
+    # e.g., 1.234,5 in Italian, and are written back as 1234.5
+    conventions = locale.localeconv()
+    if conventions["thousands_sep"] != "":
+        str_values = str_values.str.replace(conventions["thousands_sep"], "", regex=False)
+    if conventions["decimal_point"] != ".":
+        str_values = str_values.str.replace(conventions["decimal_point"], ".", regex=False)
+    return str_values
+
+
+def get_numeric_values(values: Series) -> Series:
+    # the numbers of the given values (NaN for the values which are not numbers)
+    is_str = values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+    str_values = get_delocalized_values(str_values=values[is_str].astype(str))
+    normalized_values = values.astype(object).copy()
+    normalized_values[is_str] = str_values.str.strip()
+    return pd.to_numeric(normalized_values, errors="coerce")
+
+
+def convert_datetime_values(values: Series) -> Series:
+    # the date format is inferred once (on the first date) and used for the whole column
+    # only strings are parsed, numbers would be taken as timestamps
+    is_str = values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+    datetime_values = pd.to_datetime(values.where(is_str), errors="coerce")
+    is_converted = datetime_values.notna().to_numpy()
+    converted_values = values.to_numpy(dtype=object, copy=True)
+    converted_values[is_converted] = [timestamp.to_pydatetime() for timestamp in datetime_values[is_converted]]
+    return Series(converted_values, index=values.index, dtype=object)
+
+
+def convert_str_values(values: Series) -> Series:
+    # numbers in string columns have been parsed by pandas when reading the data file, thus we put them back as strings
+    is_number = values.map(lambda value: not isinstance(value, str) and is_not_empty(variable=value) and is_not_nan(value=value)).to_numpy(dtype=bool)
+    converted_values = values.to_numpy(dtype=object, copy=True)
+    converted_values[is_number] = [str(value) for value in converted_values[is_number]]
+    return Series(converted_values, index=values.index, dtype=object)
+
+
+def get_values_converter(var_type: str) -> Callable[[Series], Series] | None:
+    if is_equal_insensitive(value=var_type, compared="int"):
+        return convert_int_values
+    elif is_equal_insensitive(value=var_type, compared="float"):
+        return convert_float_values
+    elif is_equal_insensitive(value=var_type, compared="datetime") or is_equal_insensitive(value=var_type, compared="datetime64"):
+        return convert_datetime_values
+    elif is_equal_insensitive(value=var_type, compared="str"):
+        return convert_str_values
+    else:
+        # categorical values are matched against their accepted values (column "JSON_values" in metadata)
+        return None
+
+
 def normalize_value(input_string: str) -> str:
     return input_string.upper().strip().replace(" ", "").replace("_", "")
 
@@ -243,9 +355,74 @@ def mongodb_min(field: str) -> dict:
         }
     }
 
+
+def get_projected_value(value: dict, projection: str) -> Any:
+    # get the value of a (possibly nested) key, e.g., code.text, or None if it does not exist
+    projected_value = value
+    for key in projection.split("."):
+        if not isinstance(projected_value, dict):
+            return None
+        projected_value = projected_value.get(key)
+    return projected_value
+
+
+def read_bson_file(filepath: str) -> Iterator[dict]:
+    # the file is memory-mapped and its BSON documents are decoded one at a time, thus it is never read at once
+    # each BSON document starts with its size (in bytes, including the size itself), as a little-endian int32
+    if os.path.getsize(filepath) == 0:
+        return
+    with open(filepath, "rb") as bson_file, mmap.mmap(bson_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        position = 0
+        while position < len(mapped_file):
+            size = struct.unpack_from("<i", mapped_file, position)[0] if position + 4 <= len(mapped_file) else 0
+            if size < 5 or position + size > len(mapped_file):
+                raise bson.errors.InvalidBSON("The file " + filepath + " has an invalid or truncated document at byte " + str(position) + ".")
+            yield bson.decode(mapped_file[position:position + size])
+            position += size
+
+# HASHES
+
+def get_file_hash(filepath: str) -> str:
+    # a hash of the content of the given file, read block by block
+    file_hash = hashlib.sha1()
+    with open(filepath, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def get_hash(value: Any) -> str:
+    # a hash of the BSON encoding of the given value, which does not depend on the order of the keys
+    # and which is the same for two dates stored as the same BSON date (e.g., a naive date and the same UTC date)
+    return hashlib.sha1(bson.encode({"value": get_canonical_value(value=value)})).hexdigest()
+
+
+def get_canonical_value(value: Any) -> Any:
+    # sort the keys of the (nested) dicts, and normalise the dates as BSON dates, i.e., naive UTC dates in milliseconds
+    if isinstance(value, dict):
+        return {key: get_canonical_value(value=value[key]) for key in sorted(value)}
+    elif isinstance(value, (list, tuple)):
+        return [get_canonical_value(value=element) for element in value]
+    elif isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return datetime(year=value.year, month=value.month, day=value.day, hour=value.hour, minute=value.minute,
+                        second=value.second, microsecond=value.microsecond // 1000 * 1000)
+    else:
+        return value
+
+
 # LIST AND DICT CONVERSIONS
 
 
+def parse_json_values(json_values: str) -> list[dict]:
+    # the JSON values in the metadata are of the form "{...}, {...}, ..." (i.e., a JSON list without its brackets)
+    json_values = json_values.strip()
+    if not json_values.startswith("["):
+        json_values = "[" + json_values + "]"
+    return json.loads(json_values)
+
+
 def get_values_from_json_values(json_values: dict) -> list[dict]:
     values = []
     for current_dict in json_values:
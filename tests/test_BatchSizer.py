@@ -0,0 +1,39 @@
+from database.BatchSizer import BatchSizer
+from utils.constants import MIN_DB_BATCH_SIZE, ADAPTIVE_BATCH_TARGET_LATENCY, MAX_DB_BATCH_BYTES
+
+
+class TestBatchSizer:
+    def test_compute_batches(self):
+        batch_sizer = BatchSizer(batch_size=3, adaptive=False)
+        tuples = [{"id": i} for i in range(7)]
+        batches = batch_sizer.compute_batches(tuples=tuples)
+        assert [len(batch) for batch in batches] == [3, 3, 1]
+        assert [one_tuple for batch in batches for one_tuple in batch] == tuples
+
+        assert batch_sizer.compute_batches(tuples=[]) == []
+        assert batch_sizer.compute_batches(tuples=tuples[0:3]) == [tuples[0:3]]
+
+    def test_compute_batches_under_max_bytes(self):
+        # large tuples are split in smaller batches to stay under the maximum size of a bulk write, in any mode
+        tuples = [{"id": i, "text": "a" * (MAX_DB_BATCH_BYTES // 4)} for i in range(7)]
+        for adaptive in [False, True]:
+            batches = BatchSizer(batch_size=1000, adaptive=adaptive).compute_batches(tuples=tuples)
+            assert [len(batch) for batch in batches] == [3, 3, 1]
+
+    def test_record_bulk_write_not_adaptive(self):
+        batch_sizer = BatchSizer(batch_size=100, adaptive=False)
+        batch_sizer.record_bulk_write(nb_operations=100, duration=0)
+        assert batch_sizer.batch_size == 100
+
+    def test_record_bulk_write_adaptive(self):
+        batch_sizer = BatchSizer(batch_size=100, adaptive=True)
+        # fast full batches make the batch size grow
+        batch_sizer.record_bulk_write(nb_operations=100, duration=0)
+        assert batch_sizer.batch_size == 200
+        # fast partial batches tell nothing about larger batches
+        batch_sizer.record_bulk_write(nb_operations=10, duration=0)
+        assert batch_sizer.batch_size == 200
+        # slow batches make the batch size shrink, but not under the minimum batch size
+        for _ in range(20):
+            batch_sizer.record_bulk_write(nb_operations=10, duration=3 * ADAPTIVE_BATCH_TARGET_LATENCY)
+        assert batch_sizer.batch_size == MIN_DB_BATCH_SIZE
@@ -32,3 +32,27 @@ class TestCounter:
         assert counter.resource_id == 2
         counter.reset()
         assert counter.resource_id == 0
+
+    def test_incr_with_identifier_allocator(self):
+        counter1 = Counter()
+        counter1.set_identifier_allocator(identifier_allocator=BlockAllocator(first_id=10, block_size=3))
+        counter2 = Counter()
+        counter2.set_identifier_allocator(identifier_allocator=counter1.identifier_allocator)
+
+        # each counter takes IDs in its own blocks, thus two counters never give the same ID
+        assert [counter1.increment() for _ in range(2)] == [10, 11]
+        assert [counter2.increment() for _ in range(4)] == [13, 14, 15, 16]
+        assert [counter1.increment() for _ in range(2)] == [12, 19]
+        assert counter1.identifier_allocator.next_id == 22
+
+
+class BlockAllocator:
+    # allocates blocks of IDs in memory, as the database does in its counters table
+    def __init__(self, first_id: int, block_size: int):
+        self.next_id = first_id
+        self.block_size = block_size
+
+    def allocate_block(self) -> tuple[int, int]:
+        first_id = self.next_id
+        self.next_id = self.next_id + self.block_size
+        return first_id, first_id + self.block_size - 1
@@ -1,6 +1,15 @@
+import os
+import threading
+
 from config.BetterConfig import BetterConfig
 from database.Database import Database
-from utils.constants import TEST_DB_NAME, TEST_TABLE_NAME
+from datatypes.Reference import Reference
+from profiles.ExaminationRecord import ExaminationRecord
+from profiles.Hospital import Hospital
+from profiles.Patient import Patient
+from utils.Counter import Counter
+from utils.TableNames import TableNames
+from utils.constants import TEST_DB_NAME, TEST_TABLE_NAME, UNIQUE_VARIABLES, NONE_VALUE
 
 
 class TestDatabase:
@@ -81,3 +90,172 @@ class TestDatabase:
 
         assert len(tuples) == len(docs)
         # TODO Nelly: test more
+
+    def test_allocate_resource_ids(self):
+        config = BetterConfig()
+        config.set_db_name(db_name=TEST_DB_NAME)
+        config.set_db_drop(drop="True")
+
+        database = Database(config=config)
+        # on an empty database, IDs start at 1, and two blocks never overlap
+        assert database.allocate_resource_ids(nb_ids=10) == (1, 10)
+        assert database.allocate_resource_ids(nb_ids=5) == (11, 15)
+
+    def test_upsert_batch_of_tuples_unordered(self):
+        config = BetterConfig()
+        config.set_db_name(db_name=TEST_DB_NAME)
+        config.set_db_drop(drop="True")
+        config.set_db_batch_size(db_batch_size="2")
+        config.set_unordered_upserts(unordered_upserts="True")
+        config.set_nb_write_retries(nb_write_retries="0")
+
+        database = Database(config=config)
+        database.create_unique_index(table_name=TEST_TABLE_NAME, columns={"id": 1})
+        database.insert_one_tuple(table_name=TEST_TABLE_NAME, one_tuple={"id": 1, "name": "Louise"})
+        tuples = [{"id": 1, "name": "Francesca"}, {"id": 2, "name": "Martin"}, {"id": 3, "name": "Alice"}]
+        database.upsert_batch_of_tuples(table_name=TEST_TABLE_NAME, unique_variables=["name"], tuples=tuples)
+
+        # the conflicting upsert does not stop the other ones, and it is reported
+        assert database.count_documents(table_name=TEST_TABLE_NAME, filter_dict={}) == 3
+        assert len(database.write_errors) == 1
+        assert database.write_errors[0]["code"] == 11000
+
+    def test_upsert_batch_of_tuples_from_threads(self):
+        config = BetterConfig()
+        config.set_db_name(db_name=TEST_DB_NAME)
+        config.set_db_drop(drop="True")
+        config.set_db_batch_size(db_batch_size="2")
+        config.set_unordered_upserts(unordered_upserts="True")
+
+        # loader threads (pipelined mode) share the writer threads of the database
+        database = Database(config=config)
+        writers = database.writers
+        assert writers is not None
+        threads = [threading.Thread(target=database.upsert_batch_of_tuples,
+                                    kwargs={"table_name": TEST_TABLE_NAME, "unique_variables": ["id"],
+                                            "tuples": [{"id": 10 * i + j} for j in range(5)]}) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert database.writers is writers
+        assert database.count_documents(table_name=TEST_TABLE_NAME, filter_dict={}) == 20
+        database.close()
+
+    def test_is_retryable_write_error(self):
+        # a duplicate key is retried only when the upsert filter matches the duplicate key (an upsert race)
+        upsert = {"q": {"identifier": {"value": "Patient/1"}}, "u": {}, "multi": False, "upsert": True}
+        assert Database.is_retryable_write_error(write_error={"code": 11000, "op": upsert, "keyValue": {"identifier.value": "Patient/1"}})
+        assert not Database.is_retryable_write_error(write_error={"code": 11000, "op": upsert, "keyValue": {"identifier.value": "Patient/2"}})
+        assert not Database.is_retryable_write_error(write_error={"code": 11000, "op": dict(upsert, upsert=False), "keyValue": {"identifier.value": "Patient/1"}})
+        assert Database.is_retryable_write_error(write_error={"code": 112, "op": upsert})
+        assert not Database.is_retryable_write_error(write_error={"code": 121, "op": upsert})
+
+    def test_upsert_batch_of_tuples_incremental(self):
+        config = BetterConfig()
+        config.set_db_name(db_name=TEST_DB_NAME)
+        config.set_db_drop(drop="True")
+        config.set_incremental(incremental="True")
+
+        database = Database(config=config)
+        tuples = [{"id": 1, "name": "Louise"}, {"id": 2, "name": "Martin"}]
+        database.upsert_batch_of_tuples(table_name=TEST_TABLE_NAME, unique_variables=["id"], tuples=tuples)
+        assert database.count_documents(table_name=TEST_TABLE_NAME, filter_dict={}) == 2
+
+        # the table is dropped without its hashes, thus its resources are written again in the next run
+        database.db[TEST_TABLE_NAME].drop()
+        config.set_db_drop(drop="False")
+        database = Database(config=config)
+        database.upsert_batch_of_tuples(table_name=TEST_TABLE_NAME, unique_variables=["id"], tuples=tuples)
+        assert database.count_documents(table_name=TEST_TABLE_NAME, filter_dict={}) == 2
+
+    def test_load_bson_in_table(self, tmp_path):
+        config = BetterConfig()
+        config.set_db_name(db_name=TEST_DB_NAME)
+        config.set_db_drop(drop="True")
+        config.set_working_dir_current(working_dir_current=str(tmp_path))
+        config.set_intermediate_format(intermediate_format="bson")
+        config.set_db_batch_size(db_batch_size="2")
+
+        database = Database(config=config)
+        patients = [Patient(id_value=str(i), counter=Counter()) for i in range(5)]
+        # batches are appended to a single file per table
+        database.write_in_file(data_array=patients[0:3], table_name=TableNames.PATIENT.value, count=1)
+        database.write_in_file(data_array=patients[3:5], table_name=TableNames.PATIENT.value, count=2)
+        assert os.listdir(str(tmp_path)) == [TableNames.PATIENT.value + ".bson"]
+
+        database.load_json_in_table(table_name=TableNames.PATIENT.value, unique_variables=UNIQUE_VARIABLES[TableNames.PATIENT.value])
+        assert database.count_documents(table_name=TableNames.PATIENT.value, filter_dict={}) == 5
+
+    def test_clear_intermediate_files(self, tmp_path):
+        config = BetterConfig()
+        config.set_db_name(db_name=TEST_DB_NAME)
+        config.set_working_dir_current(working_dir_current=str(tmp_path))
+        os.makedirs(os.path.join(str(tmp_path), "file-0"))
+
+        database = Database(config=config)
+        patients = [Patient(id_value=str(i), counter=Counter()) for i in range(2)]
+        config.set_intermediate_format(intermediate_format="bson")
+        database.write_in_file(data_array=patients, table_name=TableNames.PATIENT.value, count=1)
+        config.set_intermediate_format(intermediate_format="json")
+        database.write_in_file(data_array=patients, table_name=TableNames.PATIENT.value, count=1)
+        # the files of the previous data file are removed, but not the other ones
+        database.clear_intermediate_files()
+        assert os.listdir(str(tmp_path)) == ["file-0"]
+
+    def test_retrieve_identifiers(self):
+        config = BetterConfig()
+        config.set_db_name(db_name=TEST_DB_NAME)
+        config.set_db_drop(drop="True")
+
+        database = Database(config=config)
+        tuples = [{"identifier": {"value": str(i)}, "code": {"text": "column" + str(i)}} for i in range(3)]
+        database.upsert_batch_of_tuples(table_name=TEST_TABLE_NAME, unique_variables=["code"], tuples=tuples)
+        # only the asked values are retrieved, and they are cached
+        mapping = database.retrieve_identifiers(table_name=TEST_TABLE_NAME, projection="code.text", values=["column0", "column2", "unknown"])
+        assert mapping == {"column0": {"value": "0"}, "column2": {"value": "2"}}
+        assert database.identifiers_cache[(TEST_TABLE_NAME, "code.text")] == mapping
+        # the cache is kept when existing resources are upserted, and inserted resources are added to it
+        database.upsert_batch_of_tuples(table_name=TEST_TABLE_NAME, unique_variables=["code"], tuples=tuples[0:1])
+        assert database.identifiers_cache[(TEST_TABLE_NAME, "code.text")] == mapping
+        database.upsert_batch_of_tuples(table_name=TEST_TABLE_NAME, unique_variables=["code"],
+                                        tuples=[{"identifier": {"value": "3"}, "code": {"text": "column3"}}])
+        assert database.identifiers_cache[(TEST_TABLE_NAME, "code.text")] == {"column0": {"value": "0"}, "column2": {"value": "2"}, "column3": {"value": "3"}}
+        assert len(database.retrieve_identifiers(table_name=TEST_TABLE_NAME, projection="code.text")) == 3
+
+    def test_upsert_examination_record_twice(self):
+        config = BetterConfig()
+        config.set_db_name(db_name=TEST_DB_NAME)
+        config.set_db_drop(drop="True")
+
+        database = Database(config=config)
+        # the referred hospital has an identifier assigned by the FAIRificator, which has a number
+        database.write_in_table(data_array=[Hospital(id_value=NONE_VALUE, name="MyHospital", counter=Counter())], table_name=TableNames.HOSPITAL.value)
+        patient_ref = Reference(resource_identifier="Patient/1", resource_type=TableNames.PATIENT.value)
+        # the same record is ingested twice (e.g., when a file is ingested again), with another identifier each time
+        # and with references built from the stored identifiers, as in the Transform step
+        for counter_start in [0, 10]:
+            hospital_id = database.retrieve_identifiers(table_name=TableNames.HOSPITAL.value, projection="name")["MyHospital"]
+            hospital_ref = Reference(resource_identifier=hospital_id, resource_type=TableNames.HOSPITAL.value)
+            counter = Counter()
+            counter.set(new_value=counter_start)
+            examination_record = ExaminationRecord(id_value=NONE_VALUE, examination_ref=hospital_ref, subject_ref=patient_ref,
+                                                   hospital_ref=hospital_ref, sample_ref=patient_ref, value=1.5, counter=counter)
+            database.write_in_table(data_array=[examination_record], table_name=TableNames.EXAMINATION_RECORD.value)
+        assert database.count_documents(table_name=TableNames.EXAMINATION_RECORD.value, filter_dict={}) == 1
+        # the number of the identifier is not copied in the references
+        stored_record = database.find_operation(table_name=TableNames.EXAMINATION_RECORD.value, filter_dict={}, projection={"recordedBy": 1})[0]
+        assert stored_record["recordedBy"]["reference"] == {"value": TableNames.HOSPITAL.value + "/1"}
+
+    def test_get_max_identifier_number(self):
+        config = BetterConfig()
+        config.set_db_name(db_name=TEST_DB_NAME)
+        config.set_db_drop(drop="True")
+
+        database = Database(config=config)
+        # resources created before identifiers had a number are parsed
+        database.insert_one_tuple(table_name=TEST_TABLE_NAME, one_tuple={"identifier": {"value": "Test/12"}})
+        assert database.get_max_identifier_number(table_name=TEST_TABLE_NAME) == 12
+        database.insert_one_tuple(table_name=TEST_TABLE_NAME, one_tuple={"identifier": {"value": "Test/9"}, "identifierNumber": 9})
+        database.insert_one_tuple(table_name=TEST_TABLE_NAME, one_tuple={"identifier": {"value": "Test/15"}, "identifierNumber": 15})
+        assert database.get_max_identifier_number(table_name=TEST_TABLE_NAME) == 15
@@ -0,0 +1,26 @@
+from datetime import datetime
+
+from datatypes.CodeableConcept import CodeableConcept
+from datatypes.Reference import Reference
+from profiles.ExaminationRecord import ExaminationRecord
+from utils.Counter import Counter
+from utils.TableNames import TableNames
+from utils.constants import NONE_VALUE
+from utils.utils import convert_mongodb_dates
+
+
+class TestExaminationRecord:
+    def test_to_bson(self):
+        counter = Counter()
+        reference = Reference(resource_identifier="Patient/1", resource_type=TableNames.PATIENT.value)
+        cc = CodeableConcept()
+        cc.add_coding(triple=("http://loinc.org", "LA3-6", "female"))
+        created_at = datetime(year=2024, month=1, day=2)
+        for value in [1.5, "text", cc, datetime(year=2023, month=5, day=6, hour=7, minute=8, second=9, microsecond=10)]:
+            examination_record = ExaminationRecord(id_value=NONE_VALUE, examination_ref=reference, subject_ref=reference,
+                                                   hospital_ref=reference, sample_ref=reference, value=value, counter=counter)
+            # to_bson gives the same document as to_json, with datetime objects instead of MongoDB dates
+            expected_bson = convert_mongodb_dates(value=examination_record.to_json())
+            expected_bson["createdAt"] = created_at
+            assert examination_record.to_bson(created_at=created_at) == expected_bson
+        assert type(examination_record.to_bson(created_at=created_at)["value"]) is datetime
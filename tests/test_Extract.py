@@ -1,3 +1,15 @@
+import os
+from datetime import datetime
+
+import numpy as np
+from pandas import DataFrame
+
+from analysis.ExecutionAnalysis import ExecutionAnalysis
+from config.BetterConfig import BetterConfig
+from etl.Extract import Extract
+from utils.HospitalNames import HospitalNames
+from utils.constants import METADATA_CACHE_FOLDER, DTYPES_INFERENCE_NB_LINES
+from utils.utils import convert_str_values
 # from database.Database import Database
 # from etl.Extract import Extract
 # from datatypes.CodeableConcept import CodeableConcept
@@ -45,3 +57,211 @@
 #     #
 #     # def test_run_variable_analysis(self):
 #     #     self.fail()
+
+
+def write_data_file(folder: str, nb_lines: int) -> str:
+    filepath = os.path.join(folder, "data.csv")
+    with open(filepath, "w") as data_file:
+        data_file.write("ID,SampleBarcode,Weight\n")
+        for i in range(nb_lines):
+            data_file.write(str(i) + ",s" + str(i) + "," + str(i * 1.5) + "\n")
+    return filepath
+
+
+class TestExtractChunks:
+    def test_load_data_file_in_chunks(self, tmp_path):
+        config = BetterConfig()
+        config.set_current_filepath(current_filepath=write_data_file(folder=str(tmp_path), nb_lines=25))
+        config.set_chunk_size(chunk_size="10")
+        extract = Extract(database=None, config=config)
+
+        assert extract.is_streaming()
+        chunks = list(extract.load_data_file_in_chunks())
+        assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+        assert chunks[0].columns.tolist() == ["id", "samplebarcode", "weight"]
+        assert chunks[2]["id"].tolist() == [20, 21, 22, 23, 24]
+
+    def test_compute_nb_lines_per_chunk_with_bytes(self, tmp_path):
+        config = BetterConfig()
+        config.set_current_filepath(current_filepath=write_data_file(folder=str(tmp_path), nb_lines=100))
+        config.set_chunk_bytes(chunk_bytes="1000")
+        extract = Extract(database=None, config=config)
+
+        nb_lines_per_chunk = extract.compute_nb_lines_per_chunk()
+        assert 1 <= nb_lines_per_chunk < 100
+        for chunk in extract.load_data_file_in_chunks():
+            assert chunk.memory_usage(index=False, deep=True).sum() <= 1000
+
+        # the number of lines, when given, is an upper bound
+        config.set_chunk_size(chunk_size="2")
+        assert extract.compute_nb_lines_per_chunk() == 2
+
+    def test_chunks_have_the_types_of_the_whole_file(self, tmp_path):
+        # after the first lines, a chunk has NaN in an int column, and only numbers in a string column
+        filepath = os.path.join(str(tmp_path), "data.csv")
+        with open(filepath, "w") as data_file:
+            data_file.write("ID,Age,Code\n")
+            for i in range(DTYPES_INFERENCE_NB_LINES + 200):
+                age = "" if i == DTYPES_INFERENCE_NB_LINES + 50 else str(i % 90)
+                code = "c" + str(i) if i < DTYPES_INFERENCE_NB_LINES else str(i)
+                data_file.write(str(i) + "," + age + "," + code + "\n")
+        config = BetterConfig()
+        config.set_current_filepath(current_filepath=filepath)
+        extract = Extract(database=None, config=config)
+        extract.load_data_file()
+        config.set_chunk_size(chunk_size="100")
+        chunks = list(extract.load_data_file_in_chunks())
+
+        for column_name in ["id", "age", "code"]:
+            whole_values = [(type(value), value) for value in extract.data[column_name].tolist() if value == value]
+            chunked_values = [(type(value), value) for chunk in chunks for value in chunk[column_name].tolist() if value == value]
+            assert chunked_values == whole_values
+        assert chunks[-1]["age"].tolist()[0] == (DTYPES_INFERENCE_NB_LINES + 100) % 90
+        assert chunks[-1]["code"].tolist()[0] == str(DTYPES_INFERENCE_NB_LINES + 100)
+
+    def test_load_first_data_chunk(self, tmp_path):
+        config = BetterConfig()
+        config.set_current_filepath(current_filepath=write_data_file(folder=str(tmp_path), nb_lines=25))
+        config.set_chunk_size(chunk_size="10")
+        extract = Extract(database=None, config=config)
+        extract.column_converters = {"weight": convert_str_values}
+
+        # the first chunk is analysed before its conversion, as the whole data file in the non-streaming mode
+        first_chunk = extract.load_first_data_chunk()
+        assert len(first_chunk) == 10
+        assert first_chunk["weight"].tolist()[1] == 1.5
+        assert next(extract.load_data_file_in_chunks())["weight"].tolist()[1] == "1.5"
+
+    def test_not_streaming(self):
+        config = BetterConfig()
+        extract = Extract(database=None, config=config)
+        assert not extract.is_streaming()
+
+
+class TestExtractConverters:
+    def test_convert_columns(self):
+        config = BetterConfig()
+        config.set_convert_columns(convert_columns="True")
+        extract = Extract(database=None, config=config)
+        extract.mapped_types = {"id": "str", "weight": "float", "birth": "datetime", "sex": "category"}
+        extract.compute_column_converters()
+        assert set(extract.column_converters.keys()) == {"id", "weight", "birth"}
+
+        data = DataFrame({"id": [1, 2], "weight": ["3.5", "x"], "birth": ["2024-01-02", np.nan], "sex": ["F", "M"]})
+        data = extract.convert_columns(data=data)
+        assert data["id"].tolist() == ["1", "2"]
+        assert data["weight"].tolist() == [3.5, "x"]
+        assert data["birth"].tolist()[0] == datetime(year=2024, month=1, day=2)
+        assert data["sex"].tolist() == ["F", "M"]
+
+    def test_no_converters(self):
+        config = BetterConfig()
+        extract = Extract(database=None, config=config)
+        extract.mapped_types = {"weight": "float"}
+        extract.compute_column_converters()
+        assert extract.column_converters == {}
+
+
+def write_metadata_file(folder: str, vartype: str) -> str:
+    filepath = os.path.join(folder, "metadata.csv")
+    with open(filepath, "w") as metadata_file:
+        metadata_file.write("dataset,name,ontology,ontology_code,secondary_ontology,secondary_ontology_code,description,vartype,JSON_values\n")
+        metadata_file.write("data.csv,Sex,LOINC,46098-0,,,,category,\"{\"\"value\"\": \"\"f\"\", \"\"explanation\"\": \"\"female\"\"}\"\n")
+        metadata_file.write("data.csv,Weight,LOINC,29463-7,,,,"+ vartype + ",\n")
+    return filepath
+
+
+class TestExtractMetadataCache:
+    def get_config(self, folder: str) -> BetterConfig:
+        config = BetterConfig()
+        config.set_working_dir(working_dir=folder)
+        config.set_metadata_filepath(metadata_filepath=write_metadata_file(folder=folder, vartype="float"))
+        config.set_data_filepaths(data_filepaths=write_data_file(folder=folder, nb_lines=5))
+        config.set_current_filepath(current_filepath=config.get_data_filepaths()[0])
+        config.set_hospital_name(hospital_name=HospitalNames.IT_BUZZI_UC1.value)
+        config.set_metadata_cache(metadata_cache="True")
+        return config
+
+    def test_load_compiled_metadata(self, tmp_path):
+        config = self.get_config(folder=str(tmp_path))
+        extract = Extract(database=None, config=config)
+        assert not extract.load_compiled_metadata()
+        extract.run()
+        assert os.path.isfile(extract.get_compiled_metadata_filepath())
+
+        # the next run uses the compiled metadata
+        cached_extract = Extract(database=None, config=config)
+        assert cached_extract.load_compiled_metadata()
+        assert cached_extract.mapped_values == extract.mapped_values == {"sex": [{"value": "f", "explanation": "female"}]}
+        assert cached_extract.mapped_types == {"sex": "category", "weight": "float"}
+        assert cached_extract.metadata_catalog.get_codeable_concept(column_name="weight").to_json() == extract.metadata_catalog.get_codeable_concept(column_name="weight").to_json()
+
+    def test_compiled_metadata_invalidation(self, tmp_path):
+        config = self.get_config(folder=str(tmp_path))
+        Extract(database=None, config=config).run()
+
+        # when the metadata file changes, it is compiled again
+        write_metadata_file(folder=str(tmp_path), vartype="int")
+        extract = Extract(database=None, config=config)
+        assert not extract.load_compiled_metadata()
+        extract.run()
+        assert extract.mapped_types == {"sex": "category", "weight": "int"}
+
+    def test_unreadable_compiled_metadata(self, tmp_path):
+        config = self.get_config(folder=str(tmp_path))
+        extract = Extract(database=None, config=config)
+        extract.run()
+        with open(extract.get_compiled_metadata_filepath(), "wb") as compiled_metadata_file:
+            compiled_metadata_file.write(b"not a pickle")
+
+        # a compiled metadata that cannot be read is computed again
+        extract = Extract(database=None, config=config)
+        assert not extract.load_compiled_metadata()
+        extract.run()
+        assert Extract(database=None, config=config).load_compiled_metadata()
+
+    def test_no_metadata_cache(self, tmp_path):
+        config = self.get_config(folder=str(tmp_path))
+        config.set_metadata_cache(metadata_cache="False")
+        Extract(database=None, config=config).run()
+        assert not os.path.exists(os.path.join(str(tmp_path), METADATA_CACHE_FOLDER))
+
+
+class TestExtractAnalysis:
+    def get_extract(self, analysis_nb_processes: str, analysis_sample_size: str) -> Extract:
+        config = BetterConfig()
+        config.set_analysis_nb_processes(analysis_nb_processes=analysis_nb_processes)
+        config.set_analysis_sample_size(analysis_sample_size=analysis_sample_size)
+        extract = Extract(database=None, config=config)
+        extract.data = DataFrame({"sex": ["F", "m", "x", np.nan], "weight": ["3.5", "x", 2.5, np.nan], "unknown": [1, 2, 3, 4]})
+        extract.mapped_types = {"sex": "category", "weight": "float"}
+        extract.mapped_values = {"sex": [{"value": "f", "explanation": "female"}, {"value": "m", "explanation": "male"}]}
+        return extract
+
+    def run_value_analysis(self, extract: Extract) -> list:
+        extract.analysed_data = extract.get_analysed_data()
+        extract.analysis_report = {}
+        extract.run_value_analysis()
+        return extract.analysis_report["values"]
+
+    def test_run_value_analysis(self):
+        value_analyses = self.run_value_analysis(extract=self.get_extract(analysis_nb_processes="1", analysis_sample_size="0"))
+        assert [value_analysis["column"] for value_analysis in value_analyses] == ["sex", "weight", "unknown"]
+        assert value_analyses[0]["ratio_non_empty_values_matching_accepted"] == str(2 / 3)
+        assert value_analyses[1]["nb_wrongly_typed_values_in_column"] == "1"
+
+        # columns analysed in parallel give the same report
+        assert self.run_value_analysis(extract=self.get_extract(analysis_nb_processes="2", analysis_sample_size="0")) == value_analyses
+
+        execution_analysis = ExecutionAnalysis(database=None, analysis_reports=[{"values": value_analyses}])
+        execution_analysis.run()
+        assert execution_analysis.to_json()["nb_wrongly_typed_columns"] == "1"
+
+    def test_get_analysed_data(self):
+        extract = self.get_extract(analysis_nb_processes="1", analysis_sample_size="2")
+        analysed_data = extract.get_analysed_data()
+        assert len(analysed_data) == 2
+        assert set(analysed_data.index).issubset(set(extract.data.index))
+        # the same rows are sampled from one run to the next
+        assert analysed_data.index.tolist() == extract.get_analysed_data().index.tolist()
+        assert len(self.get_extract(analysis_nb_processes="1", analysis_sample_size="10").get_analysed_data()) == 4
@@ -1,7 +1,10 @@
+from datetime import datetime
+
 from profiles.Hospital import Hospital
 from utils.TableNames import TableNames
 from utils.constants import NONE_VALUE
 from utils.Counter import Counter
+from utils.utils import get_mongodb_date_from_datetime
 
 
 class TestHospital:
@@ -38,3 +41,16 @@ class TestHospital:
         assert hospital1_json["identifier"]["value"] == TableNames.HOSPITAL.value + "/123"
         assert "resourceType" in hospital1_json
         assert hospital1_json["resourceType"] == TableNames.HOSPITAL.value
+        # the creation date may be given, e.g., once for a batch of resources
+        created_at = datetime(year=2024, month=1, day=2)
+        assert hospital1.to_json(created_at=created_at)["createdAt"] == get_mongodb_date_from_datetime(current_datetime=created_at)
+
+    def test_identifier_number(self):
+        counter = Counter()
+        # only the identifiers assigned by the FAIRificator have a number, which is kept out of the identifier
+        hospital1 = Hospital(id_value="123", name="MyHospital", counter=counter)
+        assert hospital1.to_json()["identifier"] == {"value": TableNames.HOSPITAL.value + "/123"}
+        assert hospital1.to_json()["identifierNumber"] is None
+        hospital2 = Hospital(id_value=NONE_VALUE, name="MyHospital", counter=counter)
+        assert hospital2.to_json()["identifier"] == {"value": TableNames.HOSPITAL.value + "/1"}
+        assert hospital2.to_json()["identifierNumber"] == 1
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from etl.LoaderPool import LoaderPool
+
+
+class RecordingDatabase:
+    """
+    A stand-in for the Database class, recording the batches it is asked to write (and failing on demand).
+    """
+    def __init__(self, failing_table: str = None):
+        self.failing_table = failing_table
+        self.written_batches = []
+        self.lock = threading.Lock()
+
+    def write_in_table(self, data_array: list, table_name: str) -> None:
+        if table_name == "Slow":
+            time.sleep(0.05)
+        if table_name == self.failing_table:
+            raise ValueError("Cannot write in " + table_name)
+        with self.lock:
+            self.written_batches.append((table_name, data_array))
+
+
+class TestLoaderPool:
+    def test_load_all_batches(self):
+        database = RecordingDatabase()
+        loader_pool = LoaderPool(database=database, nb_loaders=3, queue_size=2)
+        for i in range(20):
+            loader_pool.submit(data_array=[i], table_name="Patient")
+        loader_pool.wait()
+        assert len(database.written_batches) == 20
+        loader_pool.close()
+        assert sorted(batch[1][0] for batch in database.written_batches) == list(range(20))
+
+    def test_error_is_propagated(self):
+        database = RecordingDatabase(failing_table="Sample")
+        loader_pool = LoaderPool(database=database, nb_loaders=2, queue_size=1)
+        loader_pool.submit(data_array=[1], table_name="Sample")
+        with pytest.raises(ValueError):
+            loader_pool.wait()
+        with pytest.raises(ValueError):
+            loader_pool.submit(data_array=[2], table_name="Patient")
+        with pytest.raises(ValueError):
+            loader_pool.close()
+        # the loaders are stopped even though a batch failed
+        assert all(not loader.is_alive() for loader in loader_pool.loaders)
+
+    def test_abort(self):
+        database = RecordingDatabase()
+        loader_pool = LoaderPool(database=database, nb_loaders=2, queue_size=10)
+        for i in range(10):
+            loader_pool.submit(data_array=[i], table_name="Slow")
+        # the batches which are still in the queue are not loaded
+        loader_pool.abort()
+        assert len(database.written_batches) <= 2
+        assert all(not loader.is_alive() for loader in loader_pool.loaders)
+
+    def test_abort_does_not_raise(self):
+        database = RecordingDatabase(failing_table="Sample")
+        loader_pool = LoaderPool(database=database, nb_loaders=2, queue_size=1)
+        loader_pool.submit(data_array=[1], table_name="Sample")
+        loader_pool.batches.join()
+        # the loading error is logged, not raised
+        loader_pool.abort()
+        assert all(not loader.is_alive() for loader in loader_pool.loaders)
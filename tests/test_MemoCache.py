@@ -0,0 +1,31 @@
+from utils.MemoCache import MemoCache
+
+
+class TestMemoCache:
+    def test_get_put(self):
+        cache = MemoCache(max_size=10)
+        assert cache.get(column_name="a", value="x") == (False, None)
+        cache.put(column_name="a", value="x", result=1)
+        assert cache.get(column_name="a", value="x") == (True, 1)
+        assert cache.get(column_name="b", value="x") == (False, None)
+        assert cache.hits == {"a": 1}
+        assert cache.misses == {"a": 1, "b": 1}
+
+    def test_types_are_not_mixed(self):
+        cache = MemoCache(max_size=10)
+        cache.put(column_name="a", value=1, result="int")
+        assert cache.get(column_name="a", value=1.0) == (False, None)
+        assert cache.get(column_name="a", value=True) == (False, None)
+        assert cache.get(column_name="a", value=1) == (True, "int")
+
+    def test_max_size(self):
+        cache = MemoCache(max_size=2)
+        for value in ["x", "y", "z"]:
+            cache.put(column_name="a", value=value, result=value)
+        # once a column is full, new values are not kept, but the kept ones are still there
+        assert cache.get(column_name="a", value="z") == (False, None)
+        assert cache.get(column_name="a", value="x") == (True, "x")
+
+        cache = MemoCache(max_size=0)
+        cache.put(column_name="a", value="x", result="x")
+        assert cache.get(column_name="a", value="x") == (False, None)
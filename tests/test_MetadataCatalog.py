@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from pandas import DataFrame
+
+from etl.MetadataCatalog import MetadataCatalog
+
+
+def get_metadata() -> DataFrame:
+    return DataFrame({
+        "name": ["sex", "weight", "weight", "age", "other"],
+        "ontology": ["LOINC", "LOINC", "LOINC", "nan", "UNKNOWN"],
+        "ontology_code": ["46098-0", "29463-7", "29463-7", "nan", "123"],
+        "secondary_ontology": ["PUBCHEM", "nan", "nan", "nan", "nan"],
+        "secondary_ontology_code": ["42", "nan", "nan", "nan", "nan"],
+        "description": ["Sex of the patient", np.nan, np.nan, np.nan, np.nan],
+        "vartype": ["category", "float", "float", "int", np.nan],
+        "JSON_values": ['[{"value": "f"}]', np.nan, np.nan, np.nan, np.nan]
+    })
+
+
+class TestMetadataCatalog:
+    def test_get_codeable_concept(self):
+        catalog = MetadataCatalog(metadata=get_metadata())
+        cc = catalog.get_codeable_concept(column_name="sex")
+        assert cc.text == "sex"
+        assert [coding.to_json()["system"] for coding in cc.codings] == ["http://loinc.org", "https://pubchem.ncbi.nlm.nih.gov/"]
+        assert cc.codings[0].to_json()["display"] == "sex (Sex of the patient)"
+        # columns are looked up case-insensitively
+        assert catalog.get_codeable_concept(column_name="SEX").to_json() == cc.to_json()
+        # a new CodeableConcept is returned each time
+        assert catalog.get_codeable_concept(column_name="sex") is not cc
+
+    def test_get_codeable_concept_no_ontology(self):
+        catalog = MetadataCatalog(metadata=get_metadata())
+        cc = catalog.get_codeable_concept(column_name="age")
+        assert cc.text == "age"
+        assert cc.codings == []
+
+    def test_get_codeable_concept_not_once(self):
+        catalog = MetadataCatalog(metadata=get_metadata())
+        assert catalog.get_codeable_concept(column_name="unknown") is None  # not described
+        assert catalog.get_codeable_concept(column_name="weight") is None  # described twice
+
+    def test_get_codeable_concept_unknown_ontology(self):
+        # the error is raised when the variable is used, not when the catalog is built
+        catalog = MetadataCatalog(metadata=get_metadata())
+        with pytest.raises(ValueError):
+            catalog.get_codeable_concept(column_name="other")
+
+    def test_get_var_types(self):
+        catalog = MetadataCatalog(metadata=get_metadata())
+        assert catalog.get_var_types() == {"sex": "category", "weight": "float", "age": "int"}
+        assert catalog.get_names() == ["sex", "weight", "weight", "age", "other"]
+
+    def test_get_mapped_codes(self):
+        mapped_values = {
+            "sex": [{"value": "F", "explanation": "female", "loinc": "LA3-6"},
+                    {"value": "f", "explanation": "another female", "loinc": "LA0-0"},
+                    {"value": 1.0, "explanation": "one", "loinc": "LA1-1"}]
+        }
+        mapped_codes = MetadataCatalog.get_mapped_codes(mapped_values=mapped_values)
+        assert set(mapped_codes["sex"].keys()) == {"f", 1.0}
+        # when several mappings have the same (casefolded) value, the first one is used
+        assert mapped_codes["sex"]["f"]["coding"][0]["code"] == "LA3-6"
+        assert mapped_codes["sex"][1]["coding"][0]["display"] == "one"
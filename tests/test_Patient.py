@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from profiles.Patient import Patient
 from utils.TableNames import TableNames
 from utils.Counter import Counter
@@ -37,3 +39,12 @@ class TestPatient:
         assert patient1_json["identifier"]["value"] == TableNames.PATIENT.value + "/123"
         assert "resourceType" in patient1_json
         assert patient1_json["resourceType"] == TableNames.PATIENT.value
+
+    def test_to_bson(self):
+        counter = Counter()
+        patient1 = Patient(id_value="123", counter=counter)
+        created_at = datetime(year=2024, month=1, day=2)
+        patient1_bson = patient1.to_bson(created_at=created_at)
+
+        assert patient1_bson == {"identifier": {"value": TableNames.PATIENT.value + "/123"}, "resourceType": TableNames.PATIENT.value, "createdAt": created_at}
+        assert not hasattr(patient1, "__dict__")
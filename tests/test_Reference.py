@@ -0,0 +1,62 @@
+from datatypes.CodeableConcept import CodeableConcept
+from datatypes.Coding import Coding
+from datatypes.Identifier import Identifier
+from datatypes.Reference import Reference
+from utils.TableNames import TableNames
+
+
+class TestReference:
+    def test_get_interned(self):
+        hospital_id = {"value": "Hospital:1"}
+        reference = Reference.get_interned(resource_identifier=hospital_id, resource_type=TableNames.HOSPITAL.value)
+        assert reference.reference == hospital_id
+        assert reference.type == TableNames.HOSPITAL.value
+        # the same resource gives the same reference, even with an equal (but not identical) identifier
+        assert Reference.get_interned(resource_identifier=dict(hospital_id), resource_type=TableNames.HOSPITAL.value) is reference
+        # another resource or another type give another reference
+        assert Reference.get_interned(resource_identifier={"value": "Hospital:2"}, resource_type=TableNames.HOSPITAL.value) is not reference
+        assert Reference.get_interned(resource_identifier="p1", resource_type=TableNames.PATIENT.value) is not Reference.get_interned(resource_identifier="p1", resource_type=TableNames.SAMPLE.value)
+
+    def test_get_interned_is_bounded(self):
+        max_size = Reference.interned_references.max_size
+        Reference.interned_references.max_size = 2
+        try:
+            Reference.interned_references.clear()
+            first = Reference.get_interned(resource_identifier="p1", resource_type=TableNames.PATIENT.value)
+            second = Reference.get_interned(resource_identifier="p2", resource_type=TableNames.PATIENT.value)
+            # the first reference is used again, thus the second one is the least recently used
+            assert Reference.get_interned(resource_identifier="p1", resource_type=TableNames.PATIENT.value) is first
+            Reference.get_interned(resource_identifier="p3", resource_type=TableNames.PATIENT.value)
+            assert len(Reference.interned_references) == 2
+            assert Reference.get_interned(resource_identifier="p1", resource_type=TableNames.PATIENT.value) is first
+            assert Reference.get_interned(resource_identifier="p2", resource_type=TableNames.PATIENT.value) is not second
+        finally:
+            Reference.interned_references.max_size = max_size
+
+    def test_get_interned_with_equal_values(self):
+        # 1, 1.0 and True are equal in Python, but they are different identifiers once stored
+        references = [Reference.get_interned(resource_identifier=value, resource_type=TableNames.PATIENT.value) for value in [1, 1.0, True]]
+        assert [reference.reference for reference in references] == [1, 1.0, True]
+        identifiers = [Identifier.get_interned(id_value=value, resource_type=TableNames.PATIENT.value) for value in [1, 1.0, "1"]]
+        assert [identifier.value for identifier in identifiers] == ["Patient/1", "Patient/1.0", "Patient/1"]
+        assert identifiers[2] is identifiers[0]
+        # NaN values are not equal to themselves, but they give the same identifier
+        assert Identifier.get_interned(id_value=float("nan"), resource_type=TableNames.PATIENT.value) is Identifier.get_interned(id_value=float("nan"), resource_type=TableNames.PATIENT.value)
+        assert Coding.get_interned(triple=("http://loinc.org", 1, "one")) is not Coding.get_interned(triple=("http://loinc.org", 1.0, "one"))
+
+    def test_to_json(self):
+        reference = Reference(resource_identifier="p1", resource_type=TableNames.PATIENT.value)
+        assert reference.to_json() == {"reference": "p1", "type": TableNames.PATIENT.value}
+        # the JSON is computed once
+        assert reference.to_json() is reference.to_json()
+
+    def test_interned_identifier_and_coding(self):
+        identifier = Identifier.get_interned(id_value="p1", resource_type=TableNames.PATIENT.value)
+        assert Identifier.get_interned(id_value="p1", resource_type=TableNames.PATIENT.value) is identifier
+        assert identifier.to_json() == {"value": TableNames.PATIENT.value + "/p1"}
+        cc1 = CodeableConcept()
+        cc1.add_coding(triple=("http://loinc.org", "LA3-6", "female"))
+        cc2 = CodeableConcept()
+        cc2.add_coding(triple=("http://loinc.org", "LA3-6", "female"))
+        assert cc1.codings[0] is cc2.codings[0]
+        assert cc1.to_json() == cc2.to_json()
@@ -0,0 +1,101 @@
+from datetime import datetime
+
+import numpy as np
+from pandas import DataFrame
+
+from config.BetterConfig import BetterConfig
+from etl.Transform import Transform
+from utils.Counter import Counter
+from utils.HospitalNames import HospitalNames
+from utils.TableNames import TableNames
+from tests.test_Counter import BlockAllocator
+
+
+def build_transform(columnar_transform: str) -> Transform:
+    config = BetterConfig()
+    config.set_columnar_transform(columnar_transform=columnar_transform)
+    data = DataFrame({
+        "id": [1, 1, 2, 3],
+        "samplebarcode": ["s1", "s2", "s3", np.nan],
+        "sex": ["F", "m", "", "NaN"],
+        "weight": [3.5, np.nan, 2.8, 4.1],
+        "city": ["Milano", " nan ", "Roma", None],
+        "unknown": ["a", "b", "c", "d"],
+        "sampling": ["x", "y", "z", "w"],
+        "samtimecollected": [datetime(year=2024, month=1, day=2)] * 4
+    })
+    mapped_values = {
+        "sex": [{"value": "F", "explanation": "female", "loinc": "LA3-6"},
+                {"value": "M", "explanation": "male", "loinc": "LA2-8"}]
+    }
+    transform = Transform(database=None, config=config, data=data, metadata=None, mapped_values=mapped_values)
+    transform.counter = Counter()
+    transform.mapping_hospital_to_hospital_id = {HospitalNames.IT_BUZZI_UC1.value: {"value": "Hospital/1"}}
+    transform.mapping_column_to_examination_id = {
+        "sex": {"value": "Examination/2"},
+        "weight": {"value": "Examination/3"},
+        "city": {"value": "Examination/4"},
+        "sampling": {"value": "Examination/5"}
+    }
+    return transform
+
+
+def to_json_without_date(resources: list) -> list:
+    json_resources = []
+    for table_name, resource in resources:
+        json_resource = resource.to_json()
+        json_resource.pop("createdAt")
+        json_resources.append((table_name, json_resource))
+    return json_resources
+
+
+class TestTransform:
+    def test_generate_data_resources_columnar(self):
+        row_wise_resources = to_json_without_date(list(build_transform(columnar_transform="False").generate_data_resources_row_wise()))
+        columnar_resources = to_json_without_date(list(build_transform(columnar_transform="True").generate_data_resources_columnar()))
+
+        table_names = [table_name for table_name, resource in row_wise_resources]
+        assert table_names.count(TableNames.EXAMINATION_RECORD.value) == 7
+        assert table_names.count(TableNames.PATIENT.value) == 3
+        assert table_names.count(TableNames.SAMPLE.value) == 4
+        # the Sample and Patient instances of a row come before its ExaminationRecord instances
+        assert table_names[:3] == [TableNames.SAMPLE.value, TableNames.PATIENT.value, TableNames.EXAMINATION_RECORD.value]
+        assert columnar_resources == row_wise_resources
+
+    def test_generate_data_resources_columnar_no_mapping(self):
+        transform = build_transform(columnar_transform="True")
+        transform.mapping_column_to_examination_id = {}
+        table_names = [table_name for table_name, resource in transform.generate_data_resources_columnar()]
+        assert TableNames.EXAMINATION_RECORD.value not in table_names
+        assert len(table_names) == 7
+
+    def test_generate_data_resources_on_chunks(self):
+        # patients and samples created out of a previous chunk are not created again
+        for columnar_transform in ["False", "True"]:
+            transform = build_transform(columnar_transform=columnar_transform)
+            transform.created_patient_ids = {1}
+            transform.created_sample_barcodes = {"s1", "s3"}
+            generate_data_resources = transform.generate_data_resources_columnar if columnar_transform == "True" else transform.generate_data_resources_row_wise
+            resources = [(table_name, resource) for table_name, resource in generate_data_resources() if table_name != TableNames.EXAMINATION_RECORD.value]
+            assert [(table_name, resource.identifier.value) for table_name, resource in resources] == [
+                (TableNames.SAMPLE.value, "Sample/s2"), (TableNames.PATIENT.value, "Patient/2"),
+                (TableNames.SAMPLE.value, "Sample/nan"), (TableNames.PATIENT.value, "Patient/3")]
+
+    def test_fairify_value_cache(self):
+        transform = build_transform(columnar_transform="False")
+        female = transform.fairify_value(column_name="sex", value="F")
+        assert female["coding"][0]["code"] == "LA3-6"
+        # repeated codes share the same JSON value (whatever the case of the value), and the cache is per column
+        assert transform.fairify_value(column_name="sex", value="f") is female
+        assert transform.fairify_value(column_name="sex", value="F") is female
+        assert transform.fairify_value(column_name="city", value="F") == "F"
+        assert transform.value_cache.hits == {"sex": 1}
+        assert transform.value_cache.misses == {"sex": 2, "city": 1}
+
+    def test_set_resource_counter_id_keeps_block(self):
+        # a counter shared by several Transform instances (e.g., one per file) does not take a new block of IDs
+        transform = build_transform(columnar_transform="False")
+        transform.counter.set_identifier_allocator(identifier_allocator=BlockAllocator(first_id=10, block_size=3))
+        assert transform.counter.increment() == 10
+        transform.set_resource_counter_id()
+        assert transform.counter.increment() == 11
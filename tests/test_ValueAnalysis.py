@@ -0,0 +1,88 @@
+from datetime import datetime, date
+
+import numpy as np
+import pandas as pd
+from pandas import Series
+
+from analysis.ValueAnalysis import ValueAnalysis
+from utils.utils import get_int_from_str, get_float_from_str, get_mongodb_date_from_datetime, is_not_nan
+
+
+def run_value_analysis(values: list, expected_type: str, accepted_values: list = None) -> ValueAnalysis:
+    value_analysis = ValueAnalysis(column_name="a", values=Series(values, dtype=object), expected_type=expected_type,
+                                   accepted_values=accepted_values if accepted_values is not None else [])
+    value_analysis.run_analysis()
+    return value_analysis
+
+
+def run_value_per_value_analysis(values: list, expected_type: str) -> int:
+    # the number of wrongly typed values found by checking the values one by one, as the value analysis used to do
+    converters = {
+        "int": lambda value: get_int_from_str(str_value=value) is not None,
+        "float": lambda value: get_float_from_str(str_value=value) is not None,
+        "datetime": lambda value: get_mongodb_date_from_datetime(current_datetime=value) is not None,
+        "str": lambda value: isinstance(value, str)
+    }
+    wrong_type = any(is_not_nan(value=value) and not converters[expected_type](value) for value in set(Series(values, dtype=object).unique()))
+    return 1 if wrong_type else 0
+
+
+class TestValueAnalysis:
+    def test_compare_values_with_expected_type(self):
+        assert run_value_analysis(values=[1, "2", 3.0, np.nan, None, "nan"], expected_type="int").nb_wrongly_typed_values_in_column == 0
+        assert run_value_analysis(values=[1, "2.5"], expected_type="int").nb_wrongly_typed_values_in_column == 1
+        assert run_value_analysis(values=[1.5, " 2.5 ", 3, np.nan], expected_type="float").nb_wrongly_typed_values_in_column == 0
+        assert run_value_analysis(values=[1.5, "abc"], expected_type="float").nb_wrongly_typed_values_in_column == 1
+        assert run_value_analysis(values=[datetime(year=2024, month=1, day=2), "2024-01-03", np.nan], expected_type="datetime64").nb_wrongly_typed_values_in_column == 0
+        assert run_value_analysis(values=[datetime(year=2024, month=1, day=2), 3], expected_type="datetime").nb_wrongly_typed_values_in_column == 1
+        assert run_value_analysis(values=["a", np.nan], expected_type="str").nb_wrongly_typed_values_in_column == 0
+        assert run_value_analysis(values=["a", 3], expected_type="str").nb_wrongly_typed_values_in_column == 1
+
+    def test_compare_values_with_expected_type_as_value_per_value(self):
+        # mixed-type columns on which checking the values one by one did not raise
+        columns = {
+            "int": [[1, "2", " 3 ", "+4", "1_000", 5.0, True, np.nan, "nan", " NaN "], [1, "1.0"], [1, 1.5], [1, ""],
+                    [1, "1e3"], [1, "1__0"], [1, "abc"], ["inf"], [np.float64(2.5), np.int64(3)]],
+            "float": [["1.5", " 2 ", "-3e2", ".5", "5.", "1_000.5", "inf", "-Infinity", "nan"], ["1.5", ""], ["1.5", "1,5"],
+                      ["1.5", "1.5.2"], ["abc"], ["1e"]],
+            "datetime": [[datetime(year=2024, month=1, day=2), date(year=2024, month=1, day=3), pd.Timestamp("2024-01-04")]],
+            "str": [["a", "", np.nan, "nan"], ["a", 1], ["a", 1.5], ["a", datetime(year=2024, month=1, day=2)], ["a", True]]
+        }
+        for expected_type, values_of_columns in columns.items():
+            for values in values_of_columns:
+                value_analysis = run_value_analysis(values=values, expected_type=expected_type)
+                assert value_analysis.nb_wrongly_typed_values_in_column == run_value_per_value_analysis(values=values, expected_type=expected_type), (expected_type, values)
+
+    def test_compare_values_with_expected_type_where_value_per_value_raised(self):
+        # None and NaT are empty values (checking values one by one raised on them, except in str columns, where they were wrongly typed)
+        for expected_type in ["int", "float", "datetime", "str"]:
+            assert run_value_analysis(values=[None, pd.NaT], expected_type=expected_type).nb_wrongly_typed_values_in_column == 0
+        # infinite numbers and objects other than numbers and strings are not int values
+        assert run_value_analysis(values=[1, float("inf")], expected_type="int").nb_wrongly_typed_values_in_column == 1
+        assert run_value_analysis(values=[1, datetime(year=2024, month=1, day=2)], expected_type="int").nb_wrongly_typed_values_in_column == 1
+        # numbers are float values, including infinite ones, and NaN are empty values
+        assert run_value_analysis(values=[1.5, 2, np.int64(3), float("inf"), np.nan], expected_type="float").nb_wrongly_typed_values_in_column == 0
+        assert run_value_analysis(values=[1.5, datetime(year=2024, month=1, day=2)], expected_type="float").nb_wrongly_typed_values_in_column == 1
+        # strings are datetime values when pandas parses them, and NaN are empty values
+        assert run_value_analysis(values=[datetime(year=2024, month=1, day=2), "2024-01-03", np.nan], expected_type="datetime").nb_wrongly_typed_values_in_column == 0
+        assert run_value_analysis(values=[datetime(year=2024, month=1, day=2), "abc"], expected_type="datetime").nb_wrongly_typed_values_in_column == 1
+        assert run_value_analysis(values=[datetime(year=2024, month=1, day=2), ""], expected_type="datetime").nb_wrongly_typed_values_in_column == 1
+
+    def test_unrecognized_type(self):
+        value_analysis = run_value_analysis(values=["a"], expected_type="complex")
+        assert value_analysis.nb_unrecognized_data_types == 1
+        assert value_analysis.nb_wrongly_typed_values_in_column == 0
+
+    def test_compare_values_with_accepted_values(self):
+        # values are matched case-insensitively, and each occurrence of a matching value counts
+        values = ["female", "male", "Female", "unknown", np.nan, "female", np.nan, "other"]
+        value_analysis = run_value_analysis(values=values, expected_type="category", accepted_values=["Female", "Male"])
+        assert value_analysis.nb_empty_values == 2
+        assert value_analysis.ratio_empty_values == 2 / 8
+        assert value_analysis.ratio_values_matching_accepted == 4 / 8
+        assert value_analysis.ratio_non_empty_values_matching_accepted == 4 / 6
+
+    def test_compare_values_with_accepted_values_empty(self):
+        value_analysis = run_value_analysis(values=[np.nan, np.nan], expected_type="category", accepted_values=["Female"])
+        assert value_analysis.nb_empty_values == 2
+        assert value_analysis.ratio_non_empty_values_matching_accepted == 0.0
@@ -0,0 +1,43 @@
+import logging
+
+import pytest
+
+from utils import setup_logger
+from utils.setup_logger import SubsystemLogFilter, set_log_levels, log, start_log_listener, stop_log_listener
+
+
+def get_record(level: int, pathname: str) -> logging.LogRecord:
+    return logging.LogRecord(name="root", level=level, pathname=pathname, lineno=1, msg="message", args=None, exc_info=None)
+
+
+class TestSetupLogger:
+    def test_subsystem_log_levels(self):
+        try:
+            set_log_levels(log_level="warning", subsystem_levels={"database": "DEBUG"})
+            # the logger lets the most verbose subsystem go through, the filter drops the records of the other ones
+            assert log.level == logging.DEBUG
+            log_filter = SubsystemLogFilter()
+            assert log_filter.filter(get_record(level=logging.DEBUG, pathname="src/database/Database.py"))
+            assert not log_filter.filter(get_record(level=logging.INFO, pathname="src/etl/Transform.py"))
+            assert log_filter.filter(get_record(level=logging.WARNING, pathname="src/etl/Transform.py"))
+        finally:
+            set_log_levels(log_level="INFO", subsystem_levels={})
+        assert log.level == logging.INFO
+
+    def test_log_listener(self, tmp_path, monkeypatch):
+        # importing the logger does not start the listener, the main script does
+        assert setup_logger.log_listener is None
+        log_filepath = str(tmp_path / "test.log")
+        monkeypatch.setenv("BETTER_FAIRIFICATOR_LOG_FILE", log_filepath)
+        start_log_listener()
+        try:
+            log.info("a logged message")
+        finally:
+            stop_log_listener()
+        assert setup_logger.log_listener is None
+        with open(log_filepath) as log_file:
+            assert "a logged message" in log_file.read()
+
+    def test_unknown_log_level(self):
+        with pytest.raises(ValueError):
+            set_log_levels(log_level="VERBOSE", subsystem_levels={})
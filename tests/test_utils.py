@@ -0,0 +1,106 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import bson
+import numpy as np
+import pytest
+from bson.json_util import loads
+from pandas import Series
+
+from profiles.Patient import Patient
+from utils.Counter import Counter
+from utils.utils import get_not_empty_mask, convert_mongodb_dates, get_mongodb_date_from_datetime, get_hash, \
+    convert_int_values, convert_float_values, convert_datetime_values, convert_str_values, \
+    parse_json_values, get_file_hash, read_bson_file, get_projected_value
+
+
+class TestUtils:
+    def test_get_not_empty_mask(self):
+        values = Series(["a", "", " nan ", None, np.nan, 3, "  ", 4.5, "NaN"], dtype=object)
+        assert get_not_empty_mask(values=values).tolist() == [True, False, False, False, False, True, True, True, False]
+
+        values = Series([1.0, np.nan, 2.0])
+        assert get_not_empty_mask(values=values).tolist() == [True, False, True]
+
+        # object values without strings, e.g., already converted ones
+        values = Series([datetime(year=2024, month=1, day=2), None, 3], dtype=object)
+        assert get_not_empty_mask(values=values).tolist() == [True, False, True]
+
+    def test_convert_mongodb_dates(self):
+        a_date = datetime(year=2024, month=6, day=1, hour=10, minute=30, second=5)
+        json_value = {"a": get_mongodb_date_from_datetime(current_datetime=a_date), "b": [{"c": 1}, "d"]}
+        assert convert_mongodb_dates(value=json_value) == {"a": a_date, "b": [{"c": 1}, "d"]}
+
+        # converted resources are stored as if they had been parsed with bson.json_util
+        patient_json = Patient(id_value="123", counter=Counter()).to_json()
+        assert bson.encode(convert_mongodb_dates(value=patient_json)) == bson.encode(loads(bson.json_util.dumps(patient_json)))
+
+    def test_get_hash(self):
+        a_date = datetime(year=2024, month=6, day=1)
+        # the order of the keys does not change the hash, but the values do
+        assert get_hash(value={"a": 1, "b": [a_date, "c"]}) == get_hash(value={"b": [a_date, "c"], "a": 1})
+        assert get_hash(value={"a": 1, "b": [a_date, "c"]}) != get_hash(value={"a": 2, "b": [a_date, "c"]})
+        assert get_hash(value={"a": 1, "b": [a_date, "c"]}) != get_hash(value={"a": 1, "b": ["c", a_date]})
+        # dates stored as the same BSON date have the same hash
+        aware_date = datetime(year=2024, month=6, day=1, hour=2, tzinfo=timezone(timedelta(hours=2)))
+        assert get_hash(value={"a": a_date}) == get_hash(value={"a": aware_date})
+        assert get_hash(value={"a": a_date}) == get_hash(value={"a": a_date.replace(microsecond=10)})
+        assert get_hash(value={"a": a_date}) != get_hash(value={"a": a_date.replace(tzinfo=timezone(timedelta(hours=2)))})
+
+    def test_convert_int_values(self):
+        values = Series(["12", 13, "x", None, 3.5, np.nan, ""], dtype=object)
+        converted_values = convert_int_values(values=values).tolist()
+        assert converted_values[0:2] == [12, 13] and all(type(value) is int for value in converted_values[0:2])
+        assert converted_values[2:5] == ["x", None, 3.5]
+        assert np.isnan(converted_values[5]) and converted_values[6] == ""
+
+    def test_convert_float_values(self):
+        converted_values = convert_float_values(values=Series([" 3.5", 2, "x", np.nan], dtype=object)).tolist()
+        assert converted_values[0:3] == [3.5, 2.0, "x"]
+        assert type(converted_values[1]) is float and np.isnan(converted_values[3])
+
+    def test_convert_datetime_values(self):
+        converted_values = convert_datetime_values(values=Series(["2024-01-02", "2024-02-03", "x", 5], dtype=object)).tolist()
+        assert converted_values == [datetime(year=2024, month=1, day=2), datetime(year=2024, month=2, day=3), "x", 5]
+        assert type(converted_values[0]) is datetime
+
+    def test_convert_str_values(self):
+        converted_values = convert_str_values(values=Series([1, "a", np.nan, 2.5], dtype=object)).tolist()
+        assert converted_values[0:2] == ["1", "a"] and np.isnan(converted_values[2]) and converted_values[3] == "2.5"
+
+    def test_parse_json_values(self):
+        json_values = parse_json_values(json_values='{"value": "f", "explanation": "female"}, {"value": 1, "explanation": "one"}')
+        assert json_values == [{"value": "f", "explanation": "female"}, {"value": 1, "explanation": "one"}]
+        assert parse_json_values(json_values='[{"value": "f"}]') == [{"value": "f"}]
+
+    def test_get_file_hash(self, tmp_path):
+        filepath = os.path.join(tmp_path, "metadata.csv")
+        with open(filepath, "w") as file:
+            file.write("name,vartype\nsex,category\n")
+        file_hash = get_file_hash(filepath=filepath)
+        assert file_hash == get_file_hash(filepath=filepath)
+        with open(filepath, "a") as file:
+            file.write("age,int\n")
+        assert get_file_hash(filepath=filepath) != file_hash
+
+    def test_read_bson_file(self, tmp_path):
+        filepath = os.path.join(tmp_path, "Patient.bson")
+        documents = [{"identifier": {"value": str(i)}, "createdAt": datetime(year=2024, month=1, day=2)} for i in range(3)]
+        with open(filepath, "wb") as file:
+            file.write(b"".join([bson.encode(document) for document in documents]))
+        assert list(read_bson_file(filepath=filepath)) == documents
+
+        # an empty file has no documents, and a truncated one is reported
+        open(filepath, "wb").close()
+        assert list(read_bson_file(filepath=filepath)) == []
+        with open(filepath, "wb") as file:
+            file.write(bson.encode(documents[0])[0:10])
+        with pytest.raises(bson.errors.InvalidBSON):
+            list(read_bson_file(filepath=filepath))
+
+    def test_get_projected_value(self):
+        value = {"name": "Buzzi", "code": {"text": "sex"}}
+        assert get_projected_value(value=value, projection="name") == "Buzzi"
+        assert get_projected_value(value=value, projection="code.text") == "sex"
+        assert get_projected_value(value=value, projection="code.coding") is None
+        assert get_projected_value(value=value, projection="name.text") is None